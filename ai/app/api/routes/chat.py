@@ -1,21 +1,197 @@
+import asyncio
 import json
-from typing import Optional
-from fastapi import APIRouter, HTTPException
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import APIRouter, HTTPException, Response
 from fastapi.responses import StreamingResponse
+from langchain_core.documents import Document
 
-from app.core.rag.dependencies import get_rag
-from app.schemas.chat import ChatRequest, ChatResponse
+from app.core.config import settings
+from app.core.context import ContextBuilder
+from app.core.metrics import observe_chat, server_timing
+from app.core.rag import RAG, InvalidFilterError, SearchError
+from app.core.rag.dependencies import get_embedding_model, get_rag
+from app.core.response_cache import CachedResponse, get_response_cache
+from app.schemas.chat import (
+    ChatBatchItem,
+    ChatBatchRequest,
+    ChatRequest,
+    ChatResponse,
+    ResponseCacheStats,
+)
 from app.core.llm import LLMService, _extract_reasoning
 
 router = APIRouter(prefix="/chat", tags=["Chat Bot"])
 
 
-def _retrieve_context(vector_index: Optional[str], query: str, k: int):
+async def _retrieve_context(
+    vector_index: Optional[str],
+    query: str,
+    k: int,
+    search_type: str = "similarity",
+    filter: Optional[Dict[str, Any]] = None,
+    timings: Optional[Dict[str, float]] = None,
+) -> Optional[List[Document]]:
+    """Embed ``query`` and search ``vector_index``; the ``embed`` and
+    ``search`` durations go into ``timings``."""
     if not vector_index:
         return None
+    timings = {} if timings is None else timings
     rag = get_rag()
-    rag.init_db(collection_name=vector_index)
-    return rag.similarity_search(query, k=k)
+    await rag.ainit_db(collection_name=vector_index)
+    if not query.strip():
+        raise SearchError("Search query cannot be empty.")
+    t0 = time.perf_counter()
+    try:
+        vector = await rag.embedding.aembed_query(query)
+    except Exception as e:
+        raise SearchError(f"Failed to embed query '{query}': {e}") from e
+    timings["embed"] = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    if search_type == "hybrid":
+        docs = await rag.ahybrid_search(query, k=k, vector=vector, filter=filter)
+    elif search_type == "mmr":
+        docs = await rag.amax_marginal_relevance_search_by_vector(
+            vector, k=k, filter=filter
+        )
+    else:
+        docs = await rag.asimilarity_search_by_vector(vector, k=k, filter=filter)
+    timings["search"] = time.perf_counter() - t0
+    return docs
+
+
+async def _context_builder(request: ChatRequest) -> ContextBuilder:
+    return await ContextBuilder.afrom_settings(
+        request.model_name,
+        context_budget=request.context_token_budget,
+        history_budget=request.history_token_budget,
+    )
+
+
+def _last_user_message(request: ChatRequest) -> str:
+    return next((m.content for m in reversed(request.messages) if m.role == "user"), "")
+
+
+def _usage(ai_message, context: ContextBuilder) -> Dict[str, Any]:
+    usage: Dict[str, Any] = {}
+    if ai_message.usage_metadata:
+        usage = {
+            "input_tokens": ai_message.usage_metadata.get("input_tokens"),
+            "output_tokens": ai_message.usage_metadata.get("output_tokens"),
+            "total_tokens": ai_message.usage_metadata.get("total_tokens"),
+        }
+    usage["context"] = context.usage.as_dict()
+    return usage
+
+
+def _stream_usage(usage: Dict[str, Any], chunk) -> None:
+    # Token counts arrive on the last chunk(s) when the model reports them.
+    for key, value in (chunk.usage_metadata or {}).items():
+        if isinstance(value, int):
+            usage[key] = usage.get(key, 0) + value
+
+
+def _observe(
+    route: str,
+    request: ChatRequest,
+    timings: Dict[str, float],
+    usage: Optional[Dict[str, Any]] = None,
+) -> None:
+    observe_chat(route, request.model_name, request.vector_index, timings, usage)
+
+
+def _timing_headers(timings: Dict[str, float]) -> Dict[str, str]:
+    if not settings.SERVER_TIMING_ENABLED or not timings:
+        return {}
+    return {"Server-Timing": server_timing(timings)}
+
+
+def _sse(payload) -> str:
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+def _pipelined_stream(request: ChatRequest, last_user_msg: str) -> StreamingResponse:
+    """Stream headers and a ``retrieval`` event right away, retrieve context
+    while the LLM connection is warmed up, then stream tokens followed by
+    per-stage ``timings`` (seconds)."""
+    messages_dicts = [m.model_dump() for m in request.messages]
+
+    async def event_generator():
+        t_start = time.perf_counter()
+        timings: Dict[str, float] = {}
+        yield _sse({"retrieval": {"status": "started"}})
+
+        warm_up = asyncio.create_task(
+            LLMService.warm_up(request.model_name, **request.kwargs)
+        )
+        try:
+            try:
+                rag_context = await _retrieve_context(
+                    request.vector_index,
+                    last_user_msg,
+                    request.k,
+                    request.search_type,
+                    request.filter,
+                    timings,
+                )
+            except Exception as e:
+                yield _sse({"error": f"RAG retrieval failed: {e}"})
+                return
+            timings["retrieval"] = time.perf_counter() - t_start
+            yield _sse(
+                {
+                    "retrieval": {
+                        "status": "completed",
+                        "documents": len(rag_context or []),
+                    }
+                }
+            )
+            if request.include_sources and rag_context:
+                yield _sse(
+                    {
+                        "sources": [
+                            {"id": doc.id, "metadata": doc.metadata}
+                            for doc in rag_context
+                        ]
+                    }
+                )
+
+            context = await _context_builder(request)
+            usage: Dict[str, Any] = {}
+            try:
+                async for chunk in LLMService.stream(
+                    messages=messages_dicts,
+                    model_name=request.model_name,
+                    rag_context=rag_context,
+                    context=context,
+                    timings=timings,
+                    **request.kwargs,
+                ):
+                    _stream_usage(usage, chunk)
+                    if "ttft" not in timings and (
+                        chunk.content or _extract_reasoning(chunk)
+                    ):
+                        timings["ttft"] = time.perf_counter() - t_start
+                    if chunk.content:
+                        yield _sse({"token": chunk.content})
+
+                    reasoning = _extract_reasoning(chunk)
+                    if reasoning:
+                        yield _sse({"reasoning": reasoning})
+            except Exception as e:
+                yield _sse({"error": str(e)})
+                return
+
+            timings["total"] = time.perf_counter() - t_start
+            _observe("/chat/stream", request, timings, usage)
+            yield _sse({"usage": {"context": context.usage.as_dict()}})
+            yield _sse({"timings": timings})
+            yield "data: [DONE]\n\n"
+        finally:
+            if not warm_up.done():
+                warm_up.cancel()
+
+    return StreamingResponse(event_generator(), media_type="text/event-stream")
 
 
 @router.post("/stream")
@@ -23,25 +199,49 @@ async def stream_chat_response(request: ChatRequest):
     if not request.messages:
         raise HTTPException(status_code=400, detail="Messages list cannot be empty.")
 
-    last_user_msg = next(
-        (m.content for m in reversed(request.messages) if m.role == "user"), ""
-    )
+    last_user_msg = _last_user_message(request)
 
+    if request.pipeline:
+        return _pipelined_stream(request, last_user_msg)
+
+    t_start = time.perf_counter()
+    timings: Dict[str, float] = {}
     try:
-        rag_context = _retrieve_context(request.vector_index, last_user_msg, request.k)
+        rag_context = await _retrieve_context(
+            request.vector_index,
+            last_user_msg,
+            request.k,
+            request.search_type,
+            request.filter,
+            timings,
+        )
+    except InvalidFilterError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"RAG retrieval failed: {e}")
 
+    if request.vector_index:
+        timings["retrieval"] = time.perf_counter() - t_start
+    # Headers go out before the stream, so they only carry the retrieval stages.
+    headers = _timing_headers(timings)
     messages_dicts = [m.model_dump() for m in request.messages]
 
     async def event_generator():
+        usage: Dict[str, Any] = {}
         try:
             async for chunk in LLMService.stream(
                 messages=messages_dicts,
                 model_name=request.model_name,
                 rag_context=rag_context,
+                context=await _context_builder(request),
+                timings=timings,
                 **request.kwargs,
             ):
+                _stream_usage(usage, chunk)
+                if "ttft" not in timings and (
+                    chunk.content or _extract_reasoning(chunk)
+                ):
+                    timings["ttft"] = time.perf_counter() - t_start
                 if chunk.content:
                     yield f"data: {json.dumps({'token': chunk.content})}\n\n"
 
@@ -49,50 +249,251 @@ async def stream_chat_response(request: ChatRequest):
                 if reasoning:
                     yield f"data: {json.dumps({'reasoning': reasoning})}\n\n"
 
+            timings["total"] = time.perf_counter() - t_start
+            _observe("/chat/stream", request, timings, usage)
             yield "data: [DONE]\n\n"
         except Exception as e:
             yield f"data: {json.dumps({'error': str(e)})}\n\n"
 
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+    return StreamingResponse(
+        event_generator(), media_type="text/event-stream", headers=headers
+    )
 
 
 @router.post("/response", response_model=ChatResponse)
-async def get_chat_response(request: ChatRequest):
+async def get_chat_response(request: ChatRequest, http_response: Response):
     if not request.messages:
         raise HTTPException(status_code=400, detail="Messages list cannot be empty.")
 
-    last_user_msg = next(
-        (m.content for m in reversed(request.messages) if m.role == "user"), ""
-    )
+    last_user_msg = _last_user_message(request)
+    t_start = time.perf_counter()
+    timings: Dict[str, float] = {}
+
+    # Read before retrieval so an ingestion racing with this request keeps the
+    # (possibly stale) answer out of the cache.
+    cache = get_response_cache() if request.cache else None
+    generation = cache.generation(request.vector_index) if cache else 0
 
     try:
-        rag_context = _retrieve_context(request.vector_index, last_user_msg, request.k)
+        rag_context = await _retrieve_context(
+            request.vector_index,
+            last_user_msg,
+            request.k,
+            request.search_type,
+            request.filter,
+            timings,
+        )
+    except InvalidFilterError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"RAG retrieval failed: {e}")
+    if request.vector_index:
+        timings["retrieval"] = time.perf_counter() - t_start
 
     messages_dicts = [m.model_dump() for m in request.messages]
+    context = await _context_builder(request)
+
+    if cache is not None:
+        key, scope = cache.make_keys(
+            request.model_name,
+            messages_dicts,
+            request.vector_index,
+            [doc.id for doc in rag_context or []],
+            {
+                **request.kwargs,
+                "_budgets": [context.context_budget, context.history_budget],
+                "_filter": request.filter,
+            },
+        )
+        query_vector = None
+        if cache.semantic and last_user_msg.strip():
+            try:
+                query_vector = await get_embedding_model().aembed_query(last_user_msg)
+            except Exception:
+                query_vector = None
+        cached, match = cache.get(key, scope, query_vector)
+        if cached is not None:
+            timings["total"] = time.perf_counter() - t_start
+            _observe("/chat/response", request, timings)
+            http_response.headers.update(_timing_headers(timings))
+            return ChatResponse(**vars(cached), cached=match)
 
     try:
         ai_message = await LLMService.generate(
             messages=messages_dicts,
             model_name=request.model_name,
             rag_context=rag_context,
+            context=context,
+            timings=timings,
             **request.kwargs,
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"LLM generation failed: {e}")
+    timings["total"] = time.perf_counter() - t_start
 
-    usage = None
-    if ai_message.usage_metadata:
-        usage = {
-            "input_tokens": ai_message.usage_metadata.get("input_tokens"),
-            "output_tokens": ai_message.usage_metadata.get("output_tokens"),
-            "total_tokens": ai_message.usage_metadata.get("total_tokens"),
-        }
-
-    return ChatResponse(
+    response = CachedResponse(
         content=ai_message.content,
         model_name=request.model_name,
-        usage=usage,
+        usage=_usage(ai_message, context),
         reasoning_content=_extract_reasoning(ai_message),
     )
+    if cache is not None:
+        cache.set(key, scope, response, request.vector_index, generation, query_vector)
+    _observe("/chat/response", request, timings, response.usage)
+    http_response.headers.update(_timing_headers(timings))
+    return ChatResponse(**vars(response))
+
+
+async def _batch_retrieve(
+    requests: Dict[int, ChatRequest],
+) -> Tuple[Dict[int, List[Document]], Dict[int, str]]:
+    """Embed every RAG query in batched calls, then run the searches
+    concurrently. Returns the context and the retrieval error per index.
+
+    If a batched embedding call fails, each query is embedded on its own so
+    the error only fails the requests whose query caused it.
+    """
+    contexts: Dict[int, List[Document]] = {}
+    errors: Dict[int, str] = {}
+    queries: Dict[str, List[int]] = {}
+    for i, request in requests.items():
+        if not request.vector_index:
+            continue
+        query = _last_user_message(request)
+        if query.strip():
+            queries.setdefault(query, []).append(i)
+        else:
+            errors[i] = "RAG retrieval failed: Search query cannot be empty."
+    if not queries:
+        return contexts, errors
+
+    rags: Dict[str, asyncio.Task] = {}
+
+    async def open_rag(vector_index: str) -> RAG:
+        rag = get_rag()
+        await rag.ainit_db(collection_name=vector_index)
+        return rag
+
+    semaphore = asyncio.Semaphore(settings.CHAT_BATCH_SEARCH_CONCURRENCY)
+    embedder = get_rag()
+    vectors: Dict[str, List[float]] = {}
+
+    async def embed_one(query: str) -> None:
+        async with semaphore:
+            try:
+                vectors[query] = (await embedder.aembed_queries([query]))[0]
+            except Exception as e:
+                errors.update((i, f"RAG retrieval failed: {e}") for i in queries[query])
+
+    try:
+        vectors.update(zip(queries, await embedder.aembed_queries(list(queries))))
+    except Exception:
+        await asyncio.gather(*(embed_one(query) for query in queries))
+
+    async def search(i: int, request: ChatRequest, query: str) -> None:
+        async with semaphore:
+            try:
+                if request.vector_index not in rags:
+                    rags[request.vector_index] = asyncio.create_task(
+                        open_rag(request.vector_index)
+                    )
+                rag = await rags[request.vector_index]
+                if request.search_type == "hybrid":
+                    contexts[i] = await rag.ahybrid_search(
+                        query, k=request.k, vector=vectors[query], filter=request.filter
+                    )
+                elif request.search_type == "mmr":
+                    contexts[i] = await rag.amax_marginal_relevance_search_by_vector(
+                        vectors[query], k=request.k, filter=request.filter
+                    )
+                else:
+                    contexts[i] = await rag.asimilarity_search_by_vector(
+                        vectors[query], k=request.k, filter=request.filter
+                    )
+            except Exception as e:
+                errors[i] = f"RAG retrieval failed: {e}"
+
+    await asyncio.gather(
+        *(
+            search(i, requests[i], query)
+            for query, indexes in queries.items()
+            if query in vectors
+            for i in indexes
+        )
+    )
+    return contexts, errors
+
+
+@router.post("/batch")
+async def batch_chat_responses(batch: ChatBatchRequest):
+    """Answer many requests in one call, streamed back as NDJSON
+    ``ChatBatchItem`` lines in completion order. Failures are reported per
+    item."""
+    if len(batch.requests) > settings.CHAT_BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=413,
+            detail=(
+                f"A batch holds at most {settings.CHAT_BATCH_MAX_REQUESTS} requests."
+            ),
+        )
+
+    async def line_generator():
+        errors: Dict[int, str] = {
+            i: "Messages list cannot be empty."
+            for i, request in enumerate(batch.requests)
+            if not request.messages
+        }
+        contexts, retrieval_errors = await _batch_retrieve(
+            {i: request for i, request in enumerate(batch.requests) if i not in errors}
+        )
+        errors.update(retrieval_errors)
+        for i, error in errors.items():
+            yield ChatBatchItem(index=i, error=error).model_dump_json() + "\n"
+
+        runnable = [i for i in range(len(batch.requests)) if i not in errors]
+        builders = {i: await _context_builder(batch.requests[i]) for i in runnable}
+        items = [
+            {
+                "messages": [m.model_dump() for m in batch.requests[i].messages],
+                "model_name": batch.requests[i].model_name,
+                "rag_context": contexts.get(i),
+                "context": builders[i],
+                **batch.requests[i].kwargs,
+            }
+            for i in runnable
+        ]
+        async for j, result in LLMService.batch(
+            items,
+            max_concurrency=batch.max_concurrency or settings.CHAT_BATCH_CONCURRENCY,
+            max_retries=settings.CHAT_BATCH_MAX_RETRIES,
+        ):
+            i = runnable[j]
+            if isinstance(result, Exception):
+                item = ChatBatchItem(index=i, error=f"LLM generation failed: {result}")
+            else:
+                usage = _usage(result, builders[i])
+                _observe("/chat/batch", batch.requests[i], {}, usage)
+                item = ChatBatchItem(
+                    index=i,
+                    response=ChatResponse(
+                        content=result.content,
+                        model_name=batch.requests[i].model_name,
+                        usage=usage,
+                        reasoning_content=_extract_reasoning(result),
+                    ),
+                )
+            yield item.model_dump_json() + "\n"
+
+    return StreamingResponse(line_generator(), media_type="application/x-ndjson")
+
+
+@router.get("/cache", response_model=ResponseCacheStats)
+def get_response_cache_stats():
+    return ResponseCacheStats(**get_response_cache().stats())
+
+
+@router.delete("/cache", response_model=ResponseCacheStats)
+def clear_response_cache():
+    cache = get_response_cache()
+    cache.clear()
+    return ResponseCacheStats(**cache.stats())
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from app.core.admission import get_admission_controller
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics():
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled.")
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/admission", include_in_schema=False)
+def get_admission_stats():
+    if not settings.ADMISSION_CONTROL_ENABLED:
+        raise HTTPException(status_code=404, detail="Admission control is disabled.")
+    return get_admission_controller().stats()
@@ -1,69 +1,174 @@
+import json
 import os
+import shutil
 import tempfile
-from typing import Literal, Optional
-from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+import time
+from typing import Dict, List, Literal, Optional, Union
+from fastapi import APIRouter, File, Form, HTTPException, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
-from app.core.rag.dependencies import get_rag
-from app.core.rag.chunker import chunk_document
-from app.core.rag.parsers import create_parser
+from app.core.config import settings
+from app.core.metrics import observe_ingestion, server_timing
+from app.core.rag.bulk import (
+    ArchiveError,
+    BulkFileResult,
+    BulkIngestionSummary,
+    extract_pdfs,
+    ingest_files,
+    is_archive,
+)
+
+from app.core.rag.dependencies import (
+    get_embedding_model,
+    get_parse_result_cache,
+    get_rag,
+    get_search_index_setup,
+    get_vector_index_manager,
+    get_vector_store_pool,
+)
+from app.core.rag.embedding_cache import CachedEmbeddings
+from app.core.rag.indexes import (
+    CollectionNotFoundError,
+    IndexBuildInProgressError,
+    VectorIndexConfig,
+)
+from app.core.rag.ingestion import (
+    EmptyDocumentError,
+    IngestionTracker,
+    ParseCacheMissError,
+    UploadTooLargeError,
+    ingest_pdf,
+    save_upload,
+)
+from app.core.rag.jobs import (
+    IngestionJob,
+    JobNotFoundError,
+    JobNotRetryableError,
+    JobQueueFullError,
+    get_ingestion_job_manager,
+)
+from app.core.rag.parsers import get_parser_cache, get_parser_engine
 from app.core.rag.parsers.base import DocumentParserError
-from app.schemas.rag import RAGDeleteRequest, RAGDeleteResponse, RAGUploadResponse
+from app.core.rag.parsers.engine import ParserEngineBusyError, ParseTimeoutError
+from app.core.rag.search_indexes import SearchSetupInProgressError
+from app.core.rag.writer import PartialWriteError
+from app.core.response_cache import invalidate_response_cache
+from app.schemas.rag import (
+    EmbeddingCacheStats,
+    RAGBulkFileResult,
+    RAGBulkSummary,
+    RAGIndexRequest,
+    RAGIndexResponse,
+    RAGDeleteRequest,
+    RAGDeleteResponse,
+    RAGJobChunkProgress,
+    RAGJobResponse,
+    RAGJobStage,
+    RAGRechunkRequest,
+    RAGUploadJobResponse,
+    RAGUploadResponse,
+    VectorStorePoolStats,
+)
 
 router = APIRouter(prefix="/rag", tags=["RAG"])
 
 
-@router.post("/upload", response_model=RAGUploadResponse)
+@router.post("/upload", response_model=Union[RAGUploadResponse, RAGUploadJobResponse])
 async def upload_document(
+    response: Response,
     file: UploadFile = File(..., description="PDF file to upload."),
     vector_index: str = Form(
         ..., description="Collection name / vector index to store documents in."
     ),
-    chunk_size: int = Form(
-        default=1000, ge=100, description="Chunk size in characters."
+    chunk_size: Optional[int] = Form(
+        default=None,
+        ge=100,
+        description="Chunk size in embedding-model tokens (characters with the "
+        "'recursive' chunker). Defaults to 256 tokens or 1000 characters.",
+    ),
+    chunk_overlap: Optional[int] = Form(
+        default=None,
+        ge=0,
+        description="Overlap between chunks. Defaults to 50 tokens or 200 characters.",
     ),
-    chunk_overlap: int = Form(default=200, ge=0, description="Overlap between chunks."),
     parser_strategy: Literal["quality", "speed"] = Form(
         default="speed",
         description="Parser strategy: 'quality' (marker-pdf) or 'speed' (llama-parse).",
     ),
+    background: bool = Form(
+        default=False,
+        description="Return a job id immediately and ingest in the background.",
+    ),
 ):
     if not file.filename or not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are supported.")
 
     tmp_path: Optional[str] = None
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-            content = await file.read()
-            tmp.write(content)
-            tmp_path = tmp.name
+        t0 = time.perf_counter()
+        tmp_path = await save_upload(file)
+        timings = {"buffer": time.perf_counter() - t0}
+        observe_ingestion(parser_strategy, vector_index, timings)
 
-        parser = create_parser(strategy=parser_strategy)
-        raw_corpus, fmt, images = parser.parse(tmp_path)
+        if background:
+            job = get_ingestion_job_manager().submit(
+                IngestionJob(
+                    pdf_path=tmp_path,
+                    filename=file.filename,
+                    vector_index=vector_index,
+                    chunk_size=chunk_size,
+                    chunk_overlap=chunk_overlap,
+                    parser_strategy=parser_strategy,
+                )
+            )
+            tmp_path = None
+            response.status_code = 202
+            return RAGUploadJobResponse(job_id=job.id, status=job.status)
 
-        chunks = chunk_document(
-            text=raw_corpus,
-            metadata={"source": file.filename, "vector_index": vector_index},
+        tracker = IngestionTracker()
+        result = await ingest_pdf(
+            pdf_path=tmp_path,
+            filename=file.filename,
+            vector_index=vector_index,
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
+            parser_strategy=parser_strategy,
+            tracker=tracker,
         )
+        if settings.SERVER_TIMING_ENABLED:
+            for name, progress in tracker.stages.items():
+                if progress.duration_seconds is not None:
+                    timings[name] = progress.duration_seconds
+            response.headers["Server-Timing"] = server_timing(timings)
 
-        if not chunks:
-            raise HTTPException(
-                status_code=400, detail="No content extracted from the PDF."
-            )
-
-        rag = get_rag()
-        rag.init_db(collection_name=vector_index)
-        doc_ids = rag.add_documents(chunks)
-
-        return RAGUploadResponse(
-            vector_index=vector_index,
-            document_ids=doc_ids,
-            num_chunks=len(chunks),
+        response_data = RAGUploadResponse(
+            vector_index=result.vector_index,
+            document_ids=result.document_ids,
+            num_chunks=result.num_chunks,
+            reused=result.reused,
+            added=result.added,
+            deleted=result.deleted,
+            unchanged=result.unchanged,
         )
+        if result.unchanged:
+            response_data.message = "Document unchanged; existing chunks reused."
+        return response_data
 
+    except ParserEngineBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ParseTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except DocumentParserError as e:
         raise HTTPException(status_code=422, detail=f"Document parsing failed: {e}")
+    except EmptyDocumentError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except PartialWriteError as e:
+        raise HTTPException(status_code=502, detail=f"Embedding or storage failed: {e}")
     except HTTPException:
         raise
     except Exception as e:
@@ -73,6 +178,239 @@ async def upload_document(
             os.unlink(tmp_path)
 
 
+@router.post("/bulk-upload")
+async def bulk_upload_documents(
+    files: List[UploadFile] = File(
+        ..., description="PDF files and/or zip/tar archives of PDFs."
+    ),
+    vector_index: str = Form(
+        ..., description="Collection name / vector index to store documents in."
+    ),
+    chunk_size: Optional[int] = Form(
+        default=None,
+        ge=100,
+        description="Chunk size in embedding-model tokens (characters with the "
+        "'recursive' chunker). Defaults to 256 tokens or 1000 characters.",
+    ),
+    chunk_overlap: Optional[int] = Form(
+        default=None,
+        ge=0,
+        description="Overlap between chunks. Defaults to 50 tokens or 200 characters.",
+    ),
+    parser_strategy: Literal["quality", "speed"] = Form(
+        default="speed",
+        description="Parser strategy: 'quality' (marker-pdf) or 'speed' (llama-parse).",
+    ),
+    concurrency: Optional[int] = Form(
+        default=None, ge=1, description="Files ingested at the same time."
+    ),
+):
+    """Ingest many PDFs in one request. Streams NDJSON: one ``{"file": ...}``
+    line per document as it finishes, then a ``{"summary": ...}`` line with
+    aggregate throughput."""
+    workdir = tempfile.mkdtemp(prefix="rag-bulk-")
+    documents = []
+    rejected = []
+    # BULK_MAX_BYTES bounds the PDFs stored for the whole request, uploaded
+    # directly or extracted from archives.
+    stored_bytes = 0
+    try:
+        for upload in files:
+            name = upload.filename or ""
+            remaining = settings.BULK_MAX_BYTES - stored_bytes
+            if name.lower().endswith(".pdf"):
+                path = os.path.join(workdir, f"{len(documents):06d}.pdf")
+                shutil.move(
+                    await save_upload(
+                        upload, max_bytes=min(settings.UPLOAD_MAX_BYTES, remaining)
+                    ),
+                    path,
+                )
+                stored_bytes += os.path.getsize(path)
+                documents.append((name, path))
+            elif is_archive(name):
+                path = await save_upload(upload, suffix=".archive", max_bytes=remaining)
+                try:
+                    target = tempfile.mkdtemp(dir=workdir)
+                    extracted = await run_in_threadpool(
+                        extract_pdfs,
+                        path,
+                        target,
+                        settings.BULK_MAX_FILES - len(documents),
+                        remaining,
+                    )
+                finally:
+                    os.unlink(path)
+                stored_bytes += sum(os.path.getsize(p) for _, p in extracted)
+                documents.extend(extracted)
+            else:
+                rejected.append(
+                    BulkFileResult(
+                        filename=name,
+                        status="failed",
+                        error="Only PDF files and zip/tar archives are supported.",
+                    )
+                )
+        if len(documents) > settings.BULK_MAX_FILES:
+            raise ArchiveError(
+                f"At most {settings.BULK_MAX_FILES} documents per bulk upload."
+            )
+    except UploadTooLargeError as e:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise HTTPException(
+            status_code=413,
+            detail=f"{e} A bulk upload may hold at most "
+            f"{settings.BULK_MAX_BYTES} bytes of PDFs in total.",
+        )
+    except ArchiveError as e:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise HTTPException(status_code=400, detail=str(e))
+    except BaseException:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise
+
+    async def line_generator():
+        summary = BulkIngestionSummary(vector_index=vector_index)
+        try:
+            for result in rejected:
+                summary.add(result)
+                yield _ndjson({"file": RAGBulkFileResult(**vars(result))})
+            async for result in ingest_files(
+                documents,
+                vector_index=vector_index,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                parser_strategy=parser_strategy,
+                concurrency=concurrency or settings.BULK_INGESTION_CONCURRENCY,
+            ):
+                summary.add(result)
+                yield _ndjson({"file": RAGBulkFileResult(**vars(result))})
+            yield _ndjson({"summary": RAGBulkSummary(**summary.as_dict())})
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return StreamingResponse(line_generator(), media_type="application/x-ndjson")
+
+
+@router.post("/rechunk", response_model=RAGUploadResponse)
+async def rechunk_document(request: RAGRechunkRequest):
+    """Re-chunk an indexed file from the parse cache, without the original
+    PDF: with new chunk settings, or into another collection."""
+    try:
+        rag = get_rag()
+        await rag.ainit_db(collection_name=request.vector_index)
+        manifest = await rag.aget_manifest(request.filename)
+        if manifest is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"'{request.filename}' is not indexed in "
+                f"'{request.vector_index}'.",
+            )
+        result = await ingest_pdf(
+            pdf_path=None,
+            filename=request.filename,
+            vector_index=request.target_vector_index or request.vector_index,
+            chunk_size=request.chunk_size,
+            chunk_overlap=request.chunk_overlap,
+            parser_strategy=request.parser_strategy
+            or manifest.chunking.split(":", 1)[0],
+            document_hash=manifest.document_hash,
+        )
+    except ParseCacheMissError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except EmptyDocumentError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except PartialWriteError as e:
+        raise HTTPException(status_code=502, detail=f"Embedding or storage failed: {e}")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Re-chunking failed: {e}")
+
+    response_data = RAGUploadResponse(
+        vector_index=result.vector_index,
+        document_ids=result.document_ids,
+        num_chunks=result.num_chunks,
+        reused=result.reused,
+        added=result.added,
+        deleted=result.deleted,
+        unchanged=result.unchanged,
+        message="Document re-chunked from the parse cache.",
+    )
+    if result.unchanged:
+        response_data.message = "Document unchanged; existing chunks reused."
+    return response_data
+
+
+def _ndjson(payload: Dict) -> str:
+    return (
+        json.dumps({key: model.model_dump() for key, model in payload.items()}) + "\n"
+    )
+
+
+def _job_response(job: IngestionJob) -> RAGJobResponse:
+    return RAGJobResponse(
+        job_id=job.id,
+        status=job.status,
+        vector_index=job.vector_index,
+        filename=job.filename,
+        parser_strategy=job.parser_strategy,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        stages={
+            name: RAGJobStage(**vars(progress))
+            for name, progress in job.tracker.stages.items()
+        },
+        pages_total=job.tracker.pages_total,
+        pages_done=job.tracker.pages_done,
+        chunks=RAGJobChunkProgress(**vars(job.tracker.chunks)),
+        attempts=job.attempts,
+        document_ids=job.document_ids,
+        num_chunks=job.num_chunks,
+        reused=job.reused,
+        added=job.added,
+        deleted=job.deleted,
+        unchanged=job.unchanged,
+        error=job.error,
+    )
+
+
+@router.get("/jobs", response_model=Dict[str, int])
+async def get_job_stats():
+    return get_ingestion_job_manager().stats()
+
+
+@router.get("/jobs/{job_id}", response_model=RAGJobResponse)
+async def get_job(job_id: str):
+    try:
+        return _job_response(get_ingestion_job_manager().get(job_id))
+    except JobNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.delete("/jobs/{job_id}", response_model=RAGJobResponse)
+async def cancel_job(job_id: str):
+    try:
+        job = get_ingestion_job_manager().cancel(job_id)
+    except JobNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return _job_response(job)
+
+
+@router.post("/jobs/{job_id}/retry", response_model=RAGJobResponse)
+async def retry_job(job_id: str):
+    try:
+        job = get_ingestion_job_manager().retry(job_id)
+    except JobNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except JobNotRetryableError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return _job_response(job)
+
+
 @router.delete("/delete", response_model=RAGDeleteResponse)
 async def delete_documents(request: RAGDeleteRequest):
     if not request.document_ids:
@@ -80,8 +418,9 @@ async def delete_documents(request: RAGDeleteRequest):
 
     try:
         rag = get_rag()
-        rag.init_db(collection_name=request.vector_index)
-        rag.delete(request.document_ids)
+        await rag.ainit_db(collection_name=request.vector_index)
+        await rag.adelete(request.document_ids)
+        invalidate_response_cache(request.vector_index)
 
         return RAGDeleteResponse(
             vector_index=request.vector_index,
@@ -89,3 +428,89 @@ async def delete_documents(request: RAGDeleteRequest):
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Delete failed: {e}")
+
+
+def _index_response(config: VectorIndexConfig) -> RAGIndexResponse:
+    return RAGIndexResponse(
+        **{k: v for k, v in vars(config).items() if k != "collection_id"},
+        building=get_vector_index_manager().building(config.collection_name),
+    )
+
+
+@router.get("/indexes/{vector_index}", response_model=RAGIndexResponse)
+async def get_index(vector_index: str):
+    config = await get_vector_index_manager().aget(vector_index)
+    if config is None:
+        raise HTTPException(
+            status_code=404, detail=f"No index configured for '{vector_index}'."
+        )
+    return _index_response(config)
+
+
+@router.post("/indexes/{vector_index}", response_model=RAGIndexResponse)
+async def build_index(vector_index: str, request: RAGIndexRequest, response: Response):
+    """Build or rebuild the collection's ANN index concurrently. Searches keep
+    using the previous index (or a sequential scan) until the build finishes."""
+    try:
+        config = await get_vector_index_manager().astart_build(
+            VectorIndexConfig(collection_name=vector_index, **request.model_dump())
+        )
+    except CollectionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except IndexBuildInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    response.status_code = 202
+    return _index_response(config)
+
+
+@router.delete("/indexes/{vector_index}")
+async def drop_index(vector_index: str):
+    if not await get_vector_index_manager().adrop(vector_index):
+        raise HTTPException(
+            status_code=404, detail=f"No index configured for '{vector_index}'."
+        )
+    return {"vector_index": vector_index, "dropped": True}
+
+
+@router.get("/search-indexes")
+async def get_search_indexes():
+    return await get_search_index_setup().astatus()
+
+
+@router.post("/search-indexes")
+async def build_search_indexes(response: Response, text_search: bool = False):
+    """Create the metadata indexes in the background; invalid ones left by an
+    interrupted build are rebuilt. ``text_search`` also adds the full-text
+    column for hybrid search, which blocks all reads and writes on the
+    embeddings table while it is rewritten."""
+    setup = get_search_index_setup()
+    try:
+        setup.start(text_search=text_search)
+    except SearchSetupInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    response.status_code = 202
+    return await setup.astatus()
+
+
+@router.get("/pool", response_model=VectorStorePoolStats)
+def get_pool_stats():
+    pool = get_vector_store_pool()
+    return VectorStorePoolStats(**pool.stats(), healthy=pool.check_health())
+
+
+@router.get("/embedding-cache", response_model=EmbeddingCacheStats)
+def get_embedding_cache_stats():
+    embeddings = get_embedding_model()
+    if not isinstance(embeddings, CachedEmbeddings):
+        raise HTTPException(status_code=404, detail="Embedding cache is disabled.")
+    return EmbeddingCacheStats(**embeddings.stats())
+
+
+@router.get("/parsers")
+def get_parser_stats():
+    results = get_parse_result_cache()
+    return {
+        "cache": get_parser_cache().stats(),
+        "engine": get_parser_engine().stats(),
+        "results": results.stats() if results is not None else None,
+    }
@@ -0,0 +1,351 @@
+import asyncio
+import itertools
+import math
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Mapping, Optional, Sequence
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.metrics import (
+    ADMISSION_IN_FLIGHT,
+    ADMISSION_QUEUE_DEPTH,
+    ADMISSION_REJECTED,
+    ADMISSION_WAIT,
+    metrics_enabled,
+)
+
+# Bounds of the Retry-After estimate, in seconds.
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 60
+
+
+class AdmissionError(Exception):
+    """Base exception for admission control."""
+
+    pass
+
+
+class AdmissionRejectedError(AdmissionError):
+    """Raised when a request is shed instead of admitted."""
+
+    def __init__(self, message: str, status_code: int, retry_after: int, reason: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+@dataclass
+class Workload:
+    name: str
+    max_concurrency: int
+    max_queue: int
+    queue_timeout: float
+    # Lower ranks are admitted first when the shared limit is reached.
+    rank: int
+    in_flight: int = 0
+    waiting: int = 0
+    admitted: int = 0
+    rejected: Dict[str, int] = field(default_factory=dict)
+    # Moving average of how long an admitted request holds its slot.
+    service_time: float = 1.0
+
+
+@dataclass
+class AdmissionTicket:
+    workload: Workload
+    tenant: Optional[str]
+    admitted_at: float
+
+
+@dataclass
+class _Waiter:
+    workload: Workload
+    tenant: Optional[str]
+    seq: int
+    future: asyncio.Future
+
+
+class AdmissionController:
+    """Per-workload concurrency limits and bounded wait queues under a shared
+    concurrency limit.
+
+    A request runs when its workload and the shared limit both have room.
+    Otherwise it waits, unless its workload's queue is full, and is shed when
+    the wait exceeds the workload's timeout. Freed slots go to waiters by
+    workload rank, then to the tenant with the fewest active requests, then in
+    arrival order, so interactive chat overtakes queued ingestion and one
+    tenant cannot starve the others. A tenant may hold at most ``tenant_share``
+    of a workload's slots plus queue.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        concurrency: Mapping[str, int],
+        queue_sizes: Optional[Mapping[str, int]] = None,
+        queue_timeouts: Optional[Mapping[str, float]] = None,
+        priority: Sequence[str] = (),
+        routes: Optional[Mapping[str, str]] = None,
+        tenant_share: Optional[float] = None,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.tenant_share = tenant_share
+        self.routes = dict(routes or {})
+        queue_sizes = queue_sizes or {}
+        queue_timeouts = queue_timeouts or {}
+        priority = list(priority)
+        names = dict.fromkeys([*priority, *concurrency, *self.routes.values()])
+        self.workloads: Dict[str, Workload] = {
+            name: Workload(
+                name=name,
+                max_concurrency=max(1, concurrency.get(name, self.max_concurrency)),
+                max_queue=max(0, queue_sizes.get(name, 0)),
+                queue_timeout=queue_timeouts.get(name, 10.0),
+                rank=priority.index(name) if name in priority else len(priority),
+            )
+            for name in names
+        }
+        self.in_flight = 0
+        self._tenants: Dict[tuple, int] = {}
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+
+    def classify(self, path: str) -> Optional[str]:
+        return self.routes.get(path.rstrip("/") or "/")
+
+    async def acquire(
+        self, workload: str, tenant: Optional[str] = None
+    ) -> AdmissionTicket:
+        w = self.workloads[workload]
+        t0 = time.perf_counter()
+        if tenant is not None and self.tenant_share is not None:
+            cap = max(1, int(self.tenant_share * (w.max_concurrency + w.max_queue)))
+            if self._tenants.get((w.name, tenant), 0) >= cap:
+                raise self._reject(
+                    w,
+                    "tenant_limit",
+                    429,
+                    f"Too many concurrent '{w.name}' requests for this client "
+                    f"(limit {cap}).",
+                )
+
+        if self._has_room(w):
+            self._start(w, tenant)
+            self._observe_wait(w, t0)
+            return AdmissionTicket(w, tenant, time.perf_counter())
+        if w.waiting >= w.max_queue:
+            raise self._reject(
+                w,
+                "queue_full",
+                503,
+                f"Server is busy: the '{w.name}' queue is full "
+                f"({w.max_queue} waiting).",
+            )
+
+        waiter = _Waiter(
+            w, tenant, next(self._seq), asyncio.get_running_loop().create_future()
+        )
+        self._waiters.append(waiter)
+        w.waiting += 1
+        self._add_tenant(w, tenant, 1)
+        self._update_gauges(w)
+        try:
+            await asyncio.wait_for(waiter.future, w.queue_timeout)
+        except BaseException as e:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Admitted just as the wait ended; give the slot back.
+                self._finish(w, tenant)
+            else:
+                self._waiters.remove(waiter)
+                w.waiting -= 1
+                self._add_tenant(w, tenant, -1)
+                self._update_gauges(w)
+            self._observe_wait(w, t0)
+            if isinstance(e, asyncio.TimeoutError):
+                raise self._reject(
+                    w,
+                    "timeout",
+                    503,
+                    f"Server is busy: no '{w.name}' slot within "
+                    f"{w.queue_timeout:g}s.",
+                ) from None
+            raise
+        self._observe_wait(w, t0)
+        return AdmissionTicket(w, tenant, time.perf_counter())
+
+    def release(self, ticket: AdmissionTicket) -> None:
+        w = ticket.workload
+        elapsed = time.perf_counter() - ticket.admitted_at
+        w.service_time += 0.2 * (elapsed - w.service_time)
+        self._finish(w, ticket.tenant)
+
+    def retry_after(self, w: Workload) -> int:
+        """Seconds until the queue ahead would drain at the recent pace."""
+        estimate = w.service_time * (w.waiting + 1) / w.max_concurrency
+        return min(MAX_RETRY_AFTER, max(MIN_RETRY_AFTER, math.ceil(estimate)))
+
+    def stats(self) -> Dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "tenants": len({tenant for _, tenant in self._tenants}),
+            "workloads": {
+                w.name: {
+                    "max_concurrency": w.max_concurrency,
+                    "max_queue": w.max_queue,
+                    "queue_timeout": w.queue_timeout,
+                    "rank": w.rank,
+                    "in_flight": w.in_flight,
+                    "waiting": w.waiting,
+                    "admitted": w.admitted,
+                    "rejected": dict(w.rejected),
+                    "service_time": round(w.service_time, 4),
+                }
+                for w in self.workloads.values()
+            },
+        }
+
+    def _has_room(self, w: Workload) -> bool:
+        return w.in_flight < w.max_concurrency and self.in_flight < self.max_concurrency
+
+    def _start(self, w: Workload, tenant: Optional[str]) -> None:
+        w.in_flight += 1
+        w.admitted += 1
+        self.in_flight += 1
+        self._add_tenant(w, tenant, 1)
+        self._update_gauges(w)
+
+    def _finish(self, w: Workload, tenant: Optional[str]) -> None:
+        w.in_flight -= 1
+        self.in_flight -= 1
+        self._add_tenant(w, tenant, -1)
+        self._update_gauges(w)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._waiters and self.in_flight < self.max_concurrency:
+            eligible = [
+                waiter
+                for waiter in self._waiters
+                # Cancelled waiters are removed by their own task.
+                if not waiter.future.done()
+                and waiter.workload.in_flight < waiter.workload.max_concurrency
+            ]
+            if not eligible:
+                return
+            waiter = min(
+                eligible,
+                key=lambda x: (
+                    x.workload.rank,
+                    self._tenants.get((x.workload.name, x.tenant), 0),
+                    x.seq,
+                ),
+            )
+            self._waiters.remove(waiter)
+            w = waiter.workload
+            w.waiting -= 1
+            # The tenant's count already includes this request.
+            self._add_tenant(w, waiter.tenant, -1)
+            self._start(w, waiter.tenant)
+            waiter.future.set_result(None)
+
+    def _add_tenant(self, w: Workload, tenant: Optional[str], delta: int) -> None:
+        if tenant is None:
+            return
+        key = (w.name, tenant)
+        count = self._tenants.get(key, 0) + delta
+        if count > 0:
+            self._tenants[key] = count
+        else:
+            self._tenants.pop(key, None)
+
+    def _reject(
+        self, w: Workload, reason: str, status_code: int, message: str
+    ) -> AdmissionRejectedError:
+        w.rejected[reason] = w.rejected.get(reason, 0) + 1
+        if metrics_enabled():
+            ADMISSION_REJECTED.inc(workload=w.name, reason=reason)
+        return AdmissionRejectedError(message, status_code, self.retry_after(w), reason)
+
+    def _observe_wait(self, w: Workload, t0: float) -> None:
+        if metrics_enabled():
+            ADMISSION_WAIT.observe(time.perf_counter() - t0, workload=w.name)
+
+    def _update_gauges(self, w: Workload) -> None:
+        if metrics_enabled():
+            ADMISSION_IN_FLIGHT.set(w.in_flight, workload=w.name)
+            ADMISSION_QUEUE_DEPTH.set(w.waiting, workload=w.name)
+
+
+@lru_cache(maxsize=1)
+def get_admission_controller() -> AdmissionController:
+    from app.core.config import settings
+
+    return AdmissionController(
+        max_concurrency=settings.ADMISSION_MAX_CONCURRENCY,
+        concurrency=settings.ADMISSION_CONCURRENCY,
+        queue_sizes=settings.ADMISSION_QUEUE_SIZE,
+        queue_timeouts=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        priority=settings.ADMISSION_PRIORITY,
+        routes={
+            settings.API_V1_STR + path: workload
+            for path, workload in settings.ADMISSION_ROUTES.items()
+        },
+        tenant_share=settings.ADMISSION_TENANT_MAX_SHARE,
+    )
+
+
+def admission_enabled() -> bool:
+    from app.core.config import settings
+
+    return settings.ADMISSION_CONTROL_ENABLED
+
+
+def _tenant(scope: Scope) -> Optional[str]:
+    from app.core.config import settings
+
+    if not settings.ADMISSION_TENANT_HEADER:
+        return None
+    name = settings.ADMISSION_TENANT_HEADER.lower().encode("latin-1")
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+class AdmissionMiddleware:
+    """Admits requests to the routes in ``ADMISSION_ROUTES`` through the
+    admission controller, answering 429/503 with ``Retry-After`` when shed.
+    The slot is held until the last body byte is sent, streams included."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not admission_enabled():
+            await self.app(scope, receive, send)
+            return
+        controller = get_admission_controller()
+        workload = controller.classify(scope["path"])
+        if workload is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            ticket = await controller.acquire(workload, _tenant(scope))
+        except AdmissionRejectedError as e:
+            response = JSONResponse(
+                {"detail": str(e)},
+                status_code=e.status_code,
+                headers={"Retry-After": str(e.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release(ticket)
@@ -0,0 +1,112 @@
+import asyncio
+import random
+from typing import Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+def is_rate_limit_error(e: BaseException) -> bool:
+    try:
+        from openai import RateLimitError
+
+        if isinstance(e, RateLimitError):
+            return True
+    except ImportError:
+        pass
+    return getattr(e, "status_code", None) == 429
+
+
+def is_transient_error(e: BaseException) -> bool:
+    if is_rate_limit_error(e):
+        return True
+    try:
+        from openai import APIConnectionError, APITimeoutError, InternalServerError
+
+        return isinstance(e, (APIConnectionError, APITimeoutError, InternalServerError))
+    except ImportError:
+        return False
+
+
+def _retry_after(e: BaseException) -> Optional[float]:
+    response = getattr(e, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD concurrency limiter for rate-limited upstream APIs.
+
+    The limit halves whenever the upstream throttles us and grows by one after
+    ``increase_after`` consecutive successes, up to ``max_concurrency``.
+    """
+
+    def __init__(
+        self, max_concurrency: int, min_concurrency: int = 1, increase_after: int = 5
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.increase_after = increase_after
+        self.limit = self.max_concurrency
+        self.in_flight = 0
+        self.throttled = 0
+        self._successes = 0
+        self._cond = asyncio.Condition()
+
+    async def __aenter__(self) -> "AdaptiveConcurrencyLimiter":
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self) -> None:
+        self._successes += 1
+        if self._successes >= self.increase_after and self.limit < self.max_concurrency:
+            self.limit += 1
+            self._successes = 0
+
+    def on_throttle(self) -> None:
+        self.throttled += 1
+        self._successes = 0
+        self.limit = max(self.min_concurrency, self.limit // 2)
+
+
+async def call_with_backoff(
+    fn: Callable[[], Awaitable[T]],
+    *,
+    limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+    max_retries: int = 5,
+    base_delay: float = 1.0,
+    max_delay: float = 60.0,
+) -> T:
+    """Run ``fn`` under ``limiter``, retrying transient/rate-limit errors with
+    exponential backoff (honouring ``Retry-After`` when the upstream sends it)."""
+    attempt = 0
+    while True:
+        try:
+            if limiter is None:
+                result = await fn()
+            else:
+                async with limiter:
+                    result = await fn()
+                limiter.on_success()
+            return result
+        except Exception as e:
+            if not is_transient_error(e) or attempt >= max_retries:
+                raise
+            if limiter is not None and is_rate_limit_error(e):
+                limiter.on_throttle()
+            delay = _retry_after(e)
+            if delay is None:
+                delay = min(max_delay, base_delay * 2**attempt)
+                delay *= random.uniform(0.5, 1.0)
+            attempt += 1
+            await asyncio.sleep(delay)
@@ -1,4 +1,4 @@
-from typing import Literal, Annotated, Any, List, Optional
+from typing import Literal, Annotated, Any, Dict, List, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import HttpUrl, AnyUrl, BeforeValidator, computed_field
 
@@ -19,9 +19,158 @@ class Settings(BaseSettings):
     ENVIRONMENT: Literal["local", "staging", "production"] = "local"
     SENTRY_DSN: HttpUrl | None = None
     POSTGRES_URI: str
+    POSTGRES_ASYNC_URI: Optional[str] = None
 
     OPENAI_API_KEY: str
+    # OpenAI-compatible endpoint for chat and embeddings, e.g. a local stand-in.
+    OPENAI_BASE_URL: Optional[str] = None
     LLAMA_CLOUD_API_KEY: Optional[str] = None
+    LLAMA_CLOUD_BASE_URL: Optional[str] = None
+
+    LLM_CLIENT_CACHE_SIZE: int = 32
+    LLM_HTTP_MAX_CONNECTIONS: int = 100
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    LLM_HTTP_CONNECT_TIMEOUT: float = 5.0
+    LLM_HTTP_READ_TIMEOUT: float = 120.0
+    LLM_HTTP2: bool = False
+    LLM_MAX_RETRIES: int = 2
+
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1000
+    RESPONSE_CACHE_TTL_SECONDS: float = 3600.0
+    RESPONSE_CACHE_SIMILARITY_THRESHOLD: Optional[float] = None
+
+    CHAT_CONTEXT_TOKEN_BUDGET: int = 6000
+    CHAT_HISTORY_TOKEN_BUDGET: int = 4000
+    CHAT_CONTEXT_MIN_CHUNK_TOKENS: int = 64
+
+    CHAT_BATCH_MAX_REQUESTS: int = 50_000
+    CHAT_BATCH_CONCURRENCY: int = 16
+    CHAT_BATCH_SEARCH_CONCURRENCY: int = 8
+    CHAT_BATCH_MAX_RETRIES: int = 6
+
+    # Hybrid search. Its full-text column is added by
+    # POST /rag/search-indexes?text_search=true, or at startup when
+    # TEXT_SEARCH_SETUP_ON_STARTUP is set; adding it rewrites the embeddings
+    # table under an exclusive lock. TEXT_SEARCH_CONFIG is baked into it then.
+    TEXT_SEARCH_CONFIG: str = "english"
+    TEXT_SEARCH_SETUP_ON_STARTUP: bool = False
+    HYBRID_FETCH_K: int = 40
+    HYBRID_RRF_K: int = 60
+    HYBRID_VECTOR_WEIGHT: float = 1.0
+    HYBRID_TEXT_WEIGHT: float = 1.0
+    # search_type="mmr": candidates fetched, relevance vs diversity trade-off
+    # (1.0 = pure relevance) and the cosine similarity treated as a duplicate.
+    MMR_FETCH_K: int = 100
+    MMR_LAMBDA: float = 0.5
+    MMR_DUPLICATE_THRESHOLD: Optional[float] = 0.95
+
+    EMBEDDING_MODEL: str = "text-embedding-3-small"
+    EMBEDDING_DIMENSIONS: int = 1536
+    EMBEDDING_CACHE_BACKEND: Literal["none", "memory", "sqlite", "postgres"] = "memory"
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 10_000
+    EMBEDDING_CACHE_PERSISTENT_MAX_ENTRIES: int = 1_000_000
+    EMBEDDING_CACHE_TTL_SECONDS: float = 7 * 24 * 3600
+    EMBEDDING_CACHE_SQLITE_PATH: str = ".cache/embeddings.sqlite3"
+    EMBEDDING_BATCH_SIZE: int = 128
+    EMBEDDING_CONCURRENCY: int = 4
+    EMBEDDING_MAX_RETRIES: int = 6
+    INSERT_BATCH_SIZE: int = 500
+    INSERT_METHOD: Literal["copy", "insert"] = "copy"
+
+    PGVECTOR_POOL_SIZE: int = 5
+    PGVECTOR_MAX_OVERFLOW: int = 10
+    PGVECTOR_POOL_TIMEOUT: float = 30.0
+    PGVECTOR_POOL_RECYCLE: int = 1800
+    PGVECTOR_POOL_PRE_PING: bool = True
+    PGVECTOR_STORE_IDLE_TIMEOUT: float = 900.0
+    PGVECTOR_MAX_STORES: int = 256
+
+    VECTOR_INDEX_AUTO_CREATE: bool = True
+    VECTOR_INDEX_METHOD: Literal["hnsw", "ivfflat"] = "hnsw"
+    VECTOR_INDEX_HNSW_M: int = 16
+    VECTOR_INDEX_HNSW_EF_CONSTRUCTION: int = 64
+    VECTOR_INDEX_HNSW_EF_SEARCH: int = 40
+    VECTOR_INDEX_IVFFLAT_LISTS: Optional[int] = None
+    VECTOR_INDEX_IVFFLAT_PROBES: int = 10
+    # Automatic IVFFlat indexes without fixed lists wait for this many rows, so
+    # lists and centroids are not derived from the first document alone.
+    VECTOR_INDEX_IVFFLAT_MIN_ROWS: int = 10_000
+    # Index storage for new collections (pgvector >= 0.7): "halfvec" halves the
+    # index, "binary" stores 1 bit per dimension and re-scores
+    # k * VECTOR_INDEX_BINARY_RESCORE candidates exactly.
+    VECTOR_INDEX_QUANTIZATION: Literal["none", "halfvec", "binary"] = "none"
+    VECTOR_INDEX_BINARY_RESCORE: int = 10
+    VECTOR_INDEX_CACHE_TTL_SECONDS: float = 60.0
+    # Metadata-filtered searches keep scanning the index until k rows pass the
+    # filter (pgvector >= 0.8). "auto" uses relaxed_order when the server
+    # supports it; otherwise, or when None, filtered HNSW scans raise ef_search
+    # to VECTOR_INDEX_FILTERED_EF_SEARCH so fewer rows are filtered away.
+    VECTOR_INDEX_ITERATIVE_SCAN: Optional[
+        Literal["auto", "relaxed_order", "strict_order"]
+    ] = "auto"
+    VECTOR_INDEX_FILTERED_EF_SEARCH: int = 400
+    METADATA_INDEXED_FIELDS: List[str] = ["source"]
+    # Build the metadata indexes in the background at startup.
+    SEARCH_INDEXES_ON_STARTUP: bool = True
+
+    UPLOAD_MAX_BYTES: int = 256 * 1024 * 1024
+    UPLOAD_BLOCK_BYTES: int = 1024 * 1024
+    PARSE_PAGE_WINDOW: int = 20
+    # "markdown" sizes chunks in embedding-model tokens; "recursive" in characters.
+    CHUNKER: Literal["markdown", "recursive"] = "markdown"
+
+    # Prometheus text at GET /metrics; Server-Timing headers on chat and upload.
+    METRICS_ENABLED: bool = True
+    SERVER_TIMING_ENABLED: bool = True
+
+    # Admission control for ADMISSION_ROUTES (paths under API_V1_STR, mapped to
+    # workloads): per-workload concurrency and wait queues under a shared
+    # ADMISSION_MAX_CONCURRENCY, admitting waiters in ADMISSION_PRIORITY order.
+    # Shed requests get 503 (queue full, wait timed out) with Retry-After.
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_MAX_CONCURRENCY: int = 64
+    ADMISSION_ROUTES: Dict[str, str] = {
+        "/chat/stream": "chat",
+        "/chat/response": "chat",
+        "/chat/batch": "batch",
+        "/rag/upload": "ingestion",
+        "/rag/bulk-upload": "ingestion",
+        "/rag/rechunk": "ingestion",
+    }
+    ADMISSION_PRIORITY: List[str] = ["chat", "batch", "ingestion"]
+    ADMISSION_CONCURRENCY: Dict[str, int] = {"chat": 64, "batch": 4, "ingestion": 8}
+    ADMISSION_QUEUE_SIZE: Dict[str, int] = {"chat": 128, "batch": 8, "ingestion": 32}
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: Dict[str, float] = {
+        "chat": 5.0,
+        "batch": 60.0,
+        "ingestion": 30.0,
+    }
+    # Requests carrying this header (an API key, or e.g. a collection name) may
+    # hold at most this share of a workload's slots plus queue; 429 beyond it.
+    ADMISSION_TENANT_HEADER: Optional[str] = "X-API-Key"
+    ADMISSION_TENANT_MAX_SHARE: Optional[float] = 0.5
+
+    PARSER_POOL_SIZE: int = 1
+    PARSER_PRELOAD: List[Literal["quality", "speed"]] = []
+    PARSER_IDLE_UNLOAD_SECONDS: float = 0.0
+    PARSER_ENGINE_WORKERS: int = 2
+    PARSER_ENGINE_MAX_QUEUE: int = 16
+    PARSER_ENGINE_TIMEOUT_SECONDS: float = 900.0
+    PARSER_ENGINE_RECYCLE_AFTER: int = 50
+    # Parsed documents, keyed by file hash + parser, for re-chunking.
+    PARSE_CACHE_BACKEND: Literal["none", "disk", "postgres"] = "disk"
+    PARSE_CACHE_DIR: str = ".cache/parsed"
+    PARSE_CACHE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+
+    INGESTION_WORKERS: int = 2
+    INGESTION_QUEUE_SIZE: int = 100
+    INGESTION_PARSER_CONCURRENCY: Dict[str, int] = {"quality": 1, "speed": 4}
+    INGESTION_JOB_RETENTION_SECONDS: float = 3600.0
+
+    BULK_INGESTION_CONCURRENCY: int = 4
+    BULK_MAX_FILES: int = 10_000
+    BULK_MAX_BYTES: int = 4 * 1024 * 1024 * 1024
 
     FRONTEND_HOST: str = "http://localhost:5173"
     BACKEND_CORS_ORIGINS: Annotated[List[AnyUrl] | str, BeforeValidator(parse_cors)] = (
@@ -0,0 +1,250 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+# Roughly what the chat format adds around each message.
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+class Tokenizer:
+    def __init__(self, encoding):
+        self.encoding = encoding
+
+    @property
+    def name(self) -> str:
+        return self.encoding.name
+
+    def count(self, text: str) -> int:
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if max_tokens <= 0:
+            return ""
+        tokens = self.encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        return self.encoding.decode(tokens[:max_tokens])
+
+
+class _ApproxTokenizer(Tokenizer):
+    """~4 characters per token; used when no tiktoken encoding is available
+    (e.g. the BPE files cannot be downloaded)."""
+
+    def __init__(self):
+        super().__init__(None)
+
+    @property
+    def name(self) -> str:
+        return "approx"
+
+    def count(self, text: str) -> int:
+        return (len(text) + 3) // 4
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        return text[: max(0, max_tokens) * 4]
+
+
+@lru_cache(maxsize=32)
+def get_tokenizer(model_name: str) -> Tokenizer:
+    try:
+        import tiktoken
+
+        try:
+            encoding = tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+        return Tokenizer(encoding)
+    except Exception as e:
+        logger.warning("No tokenizer for %s, estimating tokens: %s", model_name, e)
+        return _ApproxTokenizer()
+
+
+async def aget_tokenizer(model_name: str) -> Tokenizer:
+    """``get_tokenizer`` off the event loop: on a cold cache tiktoken downloads
+    its BPE files."""
+    return await asyncio.to_thread(get_tokenizer, model_name)
+
+
+def _overlap(head: str, tail: str, min_chars: int = 20) -> int:
+    """Length of the longest suffix of ``head`` that is a prefix of ``tail``."""
+    for size in range(min(len(head), len(tail)), min_chars - 1, -1):
+        if head.endswith(tail[:size]):
+            return size
+    return 0
+
+
+@dataclass
+class ContextUsage:
+    tokenizer: str
+    context_tokens: int = 0
+    history_tokens: int = 0
+    documents_used: int = 0
+    documents_dropped: int = 0
+    duplicates_removed: int = 0
+    messages_dropped: int = 0
+
+    @property
+    def prompt_tokens(self) -> int:
+        return self.context_tokens + self.history_tokens
+
+    def as_dict(self) -> Dict[str, object]:
+        return {**vars(self), "prompt_tokens": self.prompt_tokens}
+
+
+@dataclass
+class ContextBuilder:
+    """Fits retrieved chunks and chat history into token budgets.
+
+    Chunks are taken in relevance order. Text repeated between neighbouring
+    chunks of the same source (from ``chunk_overlap``) is removed, chunks that
+    no longer fit are skipped, and the last one that partially fits is
+    truncated. History keeps system messages and the newest turns; older
+    turns are replaced by a short marker.
+    """
+
+    model_name: str
+    context_budget: int = 6000
+    history_budget: int = 4000
+    min_chunk_tokens: int = 64
+    tokenizer: Optional[Tokenizer] = None
+    usage: ContextUsage = field(init=False)
+
+    def __post_init__(self):
+        if self.tokenizer is None:
+            self.tokenizer = get_tokenizer(self.model_name)
+        self.usage = ContextUsage(tokenizer=self.tokenizer.name)
+
+    @classmethod
+    def from_settings(
+        cls,
+        model_name: str,
+        context_budget: Optional[int] = None,
+        history_budget: Optional[int] = None,
+        tokenizer: Optional[Tokenizer] = None,
+    ) -> "ContextBuilder":
+        from app.core.config import settings
+
+        return cls(
+            model_name=model_name,
+            context_budget=context_budget or settings.CHAT_CONTEXT_TOKEN_BUDGET,
+            history_budget=history_budget or settings.CHAT_HISTORY_TOKEN_BUDGET,
+            min_chunk_tokens=settings.CHAT_CONTEXT_MIN_CHUNK_TOKENS,
+            tokenizer=tokenizer,
+        )
+
+    @classmethod
+    async def afrom_settings(
+        cls,
+        model_name: str,
+        context_budget: Optional[int] = None,
+        history_budget: Optional[int] = None,
+    ) -> "ContextBuilder":
+        return cls.from_settings(
+            model_name,
+            context_budget,
+            history_budget,
+            tokenizer=await aget_tokenizer(model_name),
+        )
+
+    def pack_documents(self, docs: Sequence[Document]) -> List[str]:
+        selected: List[Tuple[Document, str]] = []
+        seen_ids = set()
+        remaining = self.context_budget
+        for doc in docs:
+            if doc.id is not None and doc.id in seen_ids:
+                self.usage.duplicates_removed += 1
+                continue
+            text = self._strip_overlap(doc, selected)
+            if text is None:
+                self.usage.duplicates_removed += 1
+                continue
+
+            tokens = self.tokenizer.count(text)
+            if tokens > remaining:
+                if remaining < self.min_chunk_tokens:
+                    self.usage.documents_dropped += 1
+                    continue
+                text = self.tokenizer.truncate(text, remaining)
+                tokens = self.tokenizer.count(text)
+            selected.append((doc, text))
+            seen_ids.add(doc.id)
+            remaining -= tokens
+            self.usage.context_tokens += tokens
+
+        self.usage.documents_used = len(selected)
+        return [text for _, text in selected]
+
+    def fit_history(self, messages: Sequence[Dict[str, str]]) -> List[Dict[str, str]]:
+        system = [m for m in messages if m["role"] == "system"]
+        turns = [m for m in messages if m["role"] != "system"]
+        last_user = max(
+            (i for i, m in enumerate(turns) if m["role"] == "user"),
+            default=max(len(turns) - 1, 0),
+        )
+        # The latest user message (and anything after it) is always sent.
+        pinned, older = list(turns[last_user:]), turns[:last_user]
+        remaining = self.history_budget - sum(
+            self._message_tokens(m) for m in system + pinned
+        )
+        if remaining < 0 and pinned:
+            question = pinned[0]
+            keep = self.tokenizer.count(question["content"]) + remaining
+            pinned[0] = {
+                **question,
+                "content": self.tokenizer.truncate(
+                    question["content"], max(keep, self.min_chunk_tokens)
+                ),
+            }
+
+        kept: List[Dict[str, str]] = []
+        for message in reversed(older):
+            tokens = self._message_tokens(message)
+            if tokens > remaining:
+                break
+            kept.append(message)
+            remaining -= tokens
+        kept.reverse()
+
+        dropped = len(older) - len(kept)
+        result = list(system)
+        if dropped:
+            self.usage.messages_dropped = dropped
+            result.append(
+                {"role": "system", "content": f"[{dropped} earlier messages omitted]"}
+            )
+        result.extend(kept + pinned)
+        self.usage.history_tokens = sum(self._message_tokens(m) for m in result)
+        return result
+
+    def _message_tokens(self, message: Dict[str, str]) -> int:
+        return self.tokenizer.count(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+    @staticmethod
+    def _strip_overlap(
+        doc: Document, selected: Sequence[Tuple[Document, str]]
+    ) -> Optional[str]:
+        """Return ``doc``'s text minus what already selected chunks of the same
+        source cover, or None if it adds nothing."""
+        text = doc.page_content
+        source = doc.metadata.get("source")
+        for other, other_text in selected:
+            if other.metadata.get("source") != source:
+                continue
+            if text in other_text:
+                return None
+            size = _overlap(other_text, text)
+            if size:
+                text = text[size:]
+            else:
+                size = _overlap(text, other_text)
+                if size:
+                    text = text[: len(text) - size]
+            if not text.strip():
+                return None
+        return text
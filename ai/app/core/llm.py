@@ -1,6 +1,14 @@
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+import httpx
 from langchain_openai import ChatOpenAI
 from langchain_core.documents import Document
-from typing import Any, AsyncIterator, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple, Union
 from langchain_core.messages import (
     AIMessage,
     AIMessageChunk,
@@ -9,10 +17,14 @@ from langchain_core.messages import (
     SystemMessage,
 )
 
+from app.core.concurrency import AdaptiveConcurrencyLimiter, call_with_backoff
+from app.core.context import ContextBuilder
+
 
 def _to_langchain_messages(
     messages: List[Dict[str, str]],
     rag_context: Optional[List[Document]] = None,
+    context: Optional[ContextBuilder] = None,
 ) -> List[BaseMessage]:
     role_map = {
         "system": SystemMessage,
@@ -22,8 +34,13 @@ def _to_langchain_messages(
 
     lc_messages: List[BaseMessage] = []
 
-    if rag_context:
-        context_str = "\n\n---\n\n".join(doc.page_content for doc in rag_context)
+    chunks = [doc.page_content for doc in rag_context or []]
+    if context is not None:
+        chunks = context.pack_documents(rag_context or [])
+        messages = context.fit_history(messages)
+
+    if chunks:
+        context_str = "\n\n---\n\n".join(chunks)
         lc_messages.append(
             SystemMessage(
                 content=(
@@ -57,40 +74,238 @@ def _extract_reasoning(message: AIMessage | AIMessageChunk) -> Optional[str]:
     return None
 
 
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class LLMClientCache:
+    """LRU cache of ChatOpenAI clients keyed by model and constructor kwargs.
+
+    Sampling parameters go through the constructor too (rather than
+    ``bind``), so ChatOpenAI's per-model normalization still applies, e.g.
+    dropping ``temperature`` for reasoning models. Every cached client shares
+    one httpx.AsyncClient, so connections (and TLS sessions) to the provider
+    are pooled and kept alive across requests.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        max_clients: int = 32,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 120.0,
+        http2: bool = False,
+        max_retries: int = 2,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_clients = max_clients
+        self.max_retries = max_retries
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self._http2 = http2 and _http2_available()
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._clients: "OrderedDict[str, ChatOpenAI]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.AsyncClient(
+                limits=self._limits, timeout=self._timeout, http2=self._http2
+            )
+        return self._http_client
+
+    def get(self, model_name: str, **kwargs: Any) -> ChatOpenAI:
+        key = json.dumps([model_name, kwargs], sort_keys=True, default=str)
+        with self._lock:
+            llm = self._clients.get(key)
+            if llm is not None:
+                self._clients.move_to_end(key)
+                self._hits += 1
+                return llm
+            self._misses += 1
+            options = {
+                "api_key": self.api_key,
+                "max_retries": self.max_retries,
+                **kwargs,
+            }
+            if self.base_url and not {"base_url", "openai_api_base"} & set(options):
+                options["base_url"] = self.base_url
+            # ChatOpenAI builds its own transport for proxies.
+            if "openai_proxy" not in kwargs:
+                options["http_async_client"] = self.http_client
+            llm = ChatOpenAI(model=model_name, **options)
+            self._clients[key] = llm
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+            return llm
+
+    async def awarm_up(self, llm: ChatOpenAI) -> None:
+        """Open (or refresh) a pooled connection to the provider so the next
+        completion request skips the TCP/TLS handshake. Errors are ignored."""
+        if llm.http_async_client is not self._http_client:
+            return
+        base_url = llm.openai_api_base or "https://api.openai.com/v1"
+        try:
+            await self.http_client.head(base_url, timeout=self._timeout.connect)
+        except httpx.HTTPError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "clients": len(self._clients),
+                "max_clients": self.max_clients,
+                "hits": self._hits,
+                "misses": self._misses,
+                "http2": self._http2,
+            }
+
+    async def aclose(self) -> None:
+        with self._lock:
+            self._clients.clear()
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+
+@lru_cache(maxsize=1)
+def get_llm_client_cache() -> LLMClientCache:
+    from app.core.config import settings
+
+    return LLMClientCache(
+        api_key=settings.OPENAI_API_KEY,
+        base_url=settings.OPENAI_BASE_URL,
+        max_clients=settings.LLM_CLIENT_CACHE_SIZE,
+        max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY,
+        connect_timeout=settings.LLM_HTTP_CONNECT_TIMEOUT,
+        read_timeout=settings.LLM_HTTP_READ_TIMEOUT,
+        http2=settings.LLM_HTTP2,
+        max_retries=settings.LLM_MAX_RETRIES,
+    )
+
+
+async def close_llm_clients() -> None:
+    if get_llm_client_cache.cache_info().currsize:
+        await get_llm_client_cache().aclose()
+        get_llm_client_cache.cache_clear()
+
+
 class LLMService:
 
     @staticmethod
-    def _build_llm(
-        model_name: str, streaming: bool = False, **kwargs: Any
-    ) -> ChatOpenAI:
-        from app.core.config import settings
-
-        return ChatOpenAI(
-            model=model_name,
-            streaming=streaming,
-            api_key=settings.OPENAI_API_KEY,
-            **kwargs,
-        )
+    def _build_llm(model_name: str, **kwargs: Any) -> ChatOpenAI:
+        return get_llm_client_cache().get(model_name, **kwargs)
+
+    @staticmethod
+    async def warm_up(model_name: str = "gpt-5-mini", **kwargs: Any) -> None:
+        cache = get_llm_client_cache()
+        await cache.awarm_up(cache.get(model_name, **kwargs))
 
     @staticmethod
     async def generate(
         messages: List[Dict[str, str]],
         model_name: str = "gpt-5-mini",
         rag_context: Optional[List[Document]] = None,
+        context: Optional[ContextBuilder] = None,
+        timings: Optional[Dict[str, float]] = None,
         **kwargs: Any,
     ) -> AIMessage:
-        llm = LLMService._build_llm(model_name, streaming=False, **kwargs)
-        lc_messages = _to_langchain_messages(messages, rag_context)
-        return await llm.ainvoke(lc_messages)
+        """``timings``, when given, receives the ``prompt`` assembly and
+        ``llm`` call durations in seconds."""
+        llm = LLMService._build_llm(model_name, **kwargs)
+        context = context or await ContextBuilder.afrom_settings(model_name)
+        t0 = time.perf_counter()
+        lc_messages = _to_langchain_messages(messages, rag_context, context)
+        t1 = time.perf_counter()
+        message = await llm.ainvoke(lc_messages)
+        if timings is not None:
+            timings["prompt"] = t1 - t0
+            timings["llm"] = time.perf_counter() - t1
+        return message
 
     @staticmethod
     async def stream(
         messages: List[Dict[str, str]],
         model_name: str = "gpt-5-mini",
         rag_context: Optional[List[Document]] = None,
+        context: Optional[ContextBuilder] = None,
+        timings: Optional[Dict[str, float]] = None,
         **kwargs: Any,
     ) -> AsyncIterator[AIMessageChunk]:
-        llm = LLMService._build_llm(model_name, streaming=True, **kwargs)
-        lc_messages = _to_langchain_messages(messages, rag_context)
+        """``timings``, when given, receives the ``prompt`` assembly and
+        ``llm`` stream durations in seconds."""
+        llm = LLMService._build_llm(model_name, **kwargs)
+        context = context or await ContextBuilder.afrom_settings(model_name)
+        t0 = time.perf_counter()
+        lc_messages = _to_langchain_messages(messages, rag_context, context)
+        t1 = time.perf_counter()
+        if timings is not None:
+            timings["prompt"] = t1 - t0
         async for chunk in llm.astream(lc_messages):
             yield chunk
+        if timings is not None:
+            timings["llm"] = time.perf_counter() - t1
+
+    @staticmethod
+    async def batch(
+        items: Sequence[Dict[str, Any]],
+        max_concurrency: int = 16,
+        max_retries: int = 6,
+    ) -> AsyncIterator[Tuple[int, Union[AIMessage, Exception]]]:
+        """Run ``generate(**item)`` for every item and yield ``(index, result)``
+        in completion order. A failed item yields its exception instead of
+        failing the batch.
+
+        A fixed pool of workers pulls items, and an AIMD limiter narrows the
+        effective concurrency when the provider returns 429s.
+        """
+        limiter = AdaptiveConcurrencyLimiter(max_concurrency)
+        pending: "asyncio.Queue[int]" = asyncio.Queue()
+        for index in range(len(items)):
+            pending.put_nowait(index)
+        results: "asyncio.Queue[Tuple[int, Union[AIMessage, Exception]]]" = (
+            asyncio.Queue()
+        )
+
+        async def worker() -> None:
+            while not pending.empty():
+                index = pending.get_nowait()
+                try:
+                    result = await call_with_backoff(
+                        lambda: LLMService.generate(**items[index]),
+                        limiter=limiter,
+                        max_retries=max_retries,
+                    )
+                except Exception as e:
+                    result = e
+                await results.put((index, result))
+
+        workers = [
+            asyncio.create_task(worker())
+            for _ in range(min(max(1, max_concurrency), len(items)))
+        ]
+        try:
+            for _ in range(len(items)):
+                yield await results.get()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
@@ -0,0 +1,380 @@
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LabelValues = Tuple[str, ...]
+
+# Seconds; spans a cache hit (ms) to a long parse or stream (minutes).
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+    300.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Mapping[str, object]) -> LabelValues:
+        try:
+            return tuple(str(labels[name]) for name in self.labelnames)
+        except KeyError as e:
+            raise ValueError(f"{self.name} requires label {e}") from None
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self._samples(),
+        ]
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase.")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: object) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        if not values and not self.labelnames:
+            values = [((), 0.0)]
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}"
+            for key, v in values
+        ]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: object) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: object) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        if not values and not self.labelnames:
+            values = [((), 0.0)]
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}"
+            for key, v in values
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: one count per bucket (plus +Inf), sum.
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    @contextmanager
+    def time(self, **labels: object) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def count(self, **labels: object) -> int:
+        series = self._series.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            series = [(k, list(c), s[0]) for k, (c, s) in self._series.items()]
+        names = self.labelnames + ("le",)
+        lines = []
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                labels = _format_labels(names, key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered.")
+        self._metrics[metric.name] = metric
+        return metric
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests_total", "HTTP requests.", ["route", "method", "status"]
+)
+HTTP_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "HTTP request duration, including streamed bodies.",
+    ["route", "method"],
+)
+CHAT_STAGE_DURATION = REGISTRY.histogram(
+    "chat_stage_duration_seconds",
+    "Chat latency by stage: embed, search, retrieval, prompt, ttft, llm, total.",
+    ["route", "stage", "model", "collection"],
+)
+CHAT_TOKENS = REGISTRY.counter(
+    "chat_tokens_total",
+    "LLM tokens by direction (input, output).",
+    ["route", "model", "direction"],
+)
+INGESTION_STAGE_DURATION = REGISTRY.histogram(
+    "ingestion_stage_duration_seconds",
+    "Ingestion latency by stage: buffer, parse, chunk, embed_store, total.",
+    ["stage", "parser", "collection"],
+)
+INGESTION_PAGES = REGISTRY.counter(
+    "ingestion_pages_total", "Pages parsed.", ["parser", "collection"]
+)
+INGESTION_CHUNKS = REGISTRY.counter(
+    "ingestion_chunks_total",
+    "Chunks produced, by whether they were embedded (added) or kept (reused).",
+    ["parser", "collection", "result"],
+)
+
+ADMISSION_IN_FLIGHT = REGISTRY.gauge(
+    "admission_in_flight", "Requests admitted and running.", ["workload"]
+)
+ADMISSION_QUEUE_DEPTH = REGISTRY.gauge(
+    "admission_queue_depth", "Requests waiting for admission.", ["workload"]
+)
+ADMISSION_WAIT = REGISTRY.histogram(
+    "admission_wait_seconds",
+    "Time requests waited for admission, until admitted or timed out.",
+    ["workload"],
+)
+ADMISSION_REJECTED = REGISTRY.counter(
+    "admission_rejected_total",
+    "Requests shed by admission control: queue_full, timeout, tenant_limit.",
+    ["workload", "reason"],
+)
+
+DB_STATEMENTS = REGISTRY.counter(
+    "db_statements_total", "SQL statements sent to the database (round-trips)."
+)
+
+
+def _count_statement(*args: object) -> None:
+    DB_STATEMENTS.inc()
+
+
+def instrument_sqlalchemy() -> None:
+    """Count statements on every SQLAlchemy engine, async ones included."""
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    if not event.contains(Engine, "before_cursor_execute", _count_statement):
+        event.listen(Engine, "before_cursor_execute", _count_statement)
+
+
+def metrics_enabled() -> bool:
+    from app.core.config import settings
+
+    return settings.METRICS_ENABLED
+
+
+def observe_chat(
+    route: str,
+    model: str,
+    collection: Optional[str],
+    timings: Mapping[str, float],
+    usage: Optional[Mapping[str, Optional[int]]] = None,
+) -> None:
+    if not metrics_enabled():
+        return
+    collection = collection or ""
+    for stage, seconds in timings.items():
+        CHAT_STAGE_DURATION.observe(
+            seconds, route=route, stage=stage, model=model, collection=collection
+        )
+    for direction in ("input", "output"):
+        tokens = (usage or {}).get(f"{direction}_tokens")
+        if tokens:
+            CHAT_TOKENS.inc(tokens, route=route, model=model, direction=direction)
+
+
+def observe_ingestion(
+    parser: str,
+    collection: str,
+    timings: Mapping[str, float],
+    pages: int = 0,
+    added: int = 0,
+    reused: int = 0,
+) -> None:
+    if not metrics_enabled():
+        return
+    for stage, seconds in timings.items():
+        INGESTION_STAGE_DURATION.observe(
+            seconds, stage=stage, parser=parser, collection=collection
+        )
+    if pages:
+        INGESTION_PAGES.inc(pages, parser=parser, collection=collection)
+    for result, count in (("added", added), ("reused", reused)):
+        if count:
+            INGESTION_CHUNKS.inc(
+                count, parser=parser, collection=collection, result=result
+            )
+
+
+def server_timing(timings: Mapping[str, float]) -> str:
+    """``Server-Timing`` header value; durations in milliseconds."""
+    return ", ".join(
+        f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items()
+    )
+
+
+class MetricsMiddleware:
+    """Counts requests and times them until the last body byte is sent,
+    labelled with the route template rather than the raw path."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not metrics_enabled():
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        t0 = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_DURATION.observe(time.perf_counter() - t0, route=path, method=method)
+            HTTP_REQUESTS.inc(route=path, method=method, status=status)
@@ -1,9 +1,38 @@
-from typing import List, Optional
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
 from langchain_postgres import PGVector
-from langchain_openai import OpenAIEmbeddings
+from langchain_core.embeddings import Embeddings
 from langchain_core.documents import Document
 
+from ..concurrency import AdaptiveConcurrencyLimiter, call_with_backoff
 from ..config import settings
+from .diversity import maximal_marginal_relevance, normalize_rows
+from .filters import MetadataFilter, compile_metadata_filter
+from .indexes import VectorIndexConfig
+from .manifest import (
+    DocumentManifest,
+    aget_document_manifest,
+    aset_document_manifest,
+)
+from .search import (
+    acollection_id,
+    asearch_by_text,
+    asearch_by_vector,
+    asearch_candidates,
+    atext_search_ready,
+    reciprocal_rank_fusion,
+)
+from .writer import IngestionWriter, ProgressCallback, WriteResult, WriterError
+
+if TYPE_CHECKING:
+    from .indexes import VectorIndexManager
+    from .pool import VectorStorePool
+
+logger = logging.getLogger(__name__)
+
+# Hybrid search without the full-text column is logged once per process.
+_text_search_warned = False
 
 
 class RAGError(Exception):
@@ -30,6 +59,12 @@ class SearchError(RAGError):
     pass
 
 
+class InvalidFilterError(SearchError):
+    """Raised when a metadata filter cannot be compiled."""
+
+    pass
+
+
 class DBConnectionError(RAGError):
     """Raised when database connection/initialization fails."""
 
@@ -37,12 +72,23 @@ class DBConnectionError(RAGError):
 
 
 class RAG:
-    def __init__(self, embedding: OpenAIEmbeddings):
+    def __init__(
+        self,
+        embedding: Embeddings,
+        pool: Optional["VectorStorePool"] = None,
+        indexes: Optional["VectorIndexManager"] = None,
+    ):
         self.embedding = embedding
+        self.pool = pool
+        self.indexes = indexes
         self.db: Optional[PGVector] = None
+        self.adb: Optional[PGVector] = None
 
     def init_db(self, collection_name: str = "default_collection") -> None:
         try:
+            if self.pool is not None:
+                self.db = self.pool.get(collection_name)
+                return
             self.db = PGVector(
                 embeddings=self.embedding,
                 collection_name=collection_name,
@@ -54,6 +100,24 @@ class RAG:
                 f"Failed to initialize database with collection '{collection_name}': {e}"
             ) from e
 
+    async def ainit_db(self, collection_name: str = "default_collection") -> None:
+        try:
+            if self.pool is not None:
+                self.adb = await self.pool.aget(collection_name)
+                return
+            self.adb = PGVector(
+                embeddings=self.embedding,
+                collection_name=collection_name,
+                connection=settings.POSTGRES_ASYNC_URI or settings.POSTGRES_URI,
+                use_jsonb=True,
+                async_mode=True,
+            )
+            await self.adb.acreate_collection()
+        except Exception as e:
+            raise DBConnectionError(
+                f"Failed to initialize database with collection '{collection_name}': {e}"
+            ) from e
+
     def _validate_db(self) -> PGVector:
         if not self.db:
             raise DBNotInitializedError(
@@ -61,6 +125,22 @@ class RAG:
             )
         return self.db
 
+    def _validate_adb(self) -> PGVector:
+        if not self.adb:
+            raise DBNotInitializedError(
+                "Async database not initialized. Call ainit_db() first."
+            )
+        return self.adb
+
+    @staticmethod
+    def _validate_filter(filter: Optional[MetadataFilter]) -> None:
+        if not filter:
+            return
+        try:
+            compile_metadata_filter(filter)
+        except ValueError as e:
+            raise InvalidFilterError(f"Invalid metadata filter: {e}") from e
+
     def add_documents(self, docs: List[Document], **kwargs) -> List[str]:
         db = self._validate_db()
         if not docs:
@@ -87,14 +167,20 @@ class RAG:
                 f"Failed to delete documents {ids}: {e}"
             ) from e
 
-    def similarity_search(self, query: str, k: int = 10, **kwargs) -> List[Document]:
+    def similarity_search(
+        self,
+        query: str,
+        k: int = 10,
+        filter: Optional[MetadataFilter] = None,
+        **kwargs,
+    ) -> List[Document]:
         db = self._validate_db()
         if not query.strip():
             raise SearchError("Search query cannot be empty.")
         if k < 1:
             raise SearchError(f"k must be >= 1, got {k}")
         try:
-            return db.similarity_search(query, k, **kwargs)
+            return db.similarity_search(query, k, filter=filter, **kwargs)
         except RAGError:
             raise
         except Exception as e:
@@ -103,7 +189,11 @@ class RAG:
             ) from e
 
     def retriever(
-        self, query: str, search_type: str = "mmr", **kwargs
+        self,
+        query: str,
+        search_type: str = "mmr",
+        filter: Optional[MetadataFilter] = None,
+        **kwargs,
     ) -> List[Document]:
         db = self._validate_db()
         if not query.strip():
@@ -114,6 +204,11 @@ class RAG:
             raise SearchError(
                 f"Invalid search_type '{search_type}'. Must be one of {valid_search_types}"
             )
+        if filter:
+            kwargs["search_kwargs"] = {
+                **kwargs.get("search_kwargs", {}),
+                "filter": filter,
+            }
         try:
             retriever = db.as_retriever(search_type=search_type, **kwargs)
             return retriever.invoke(query)
@@ -123,3 +218,393 @@ class RAG:
             raise SearchError(
                 f"Retrieval failed for query '{query}' with search_type '{search_type}': {e}"
             ) from e
+
+    async def aadd_documents(self, docs: List[Document], **kwargs) -> List[str]:
+        db = self._validate_adb()
+        if not docs:
+            raise DocumentOperationError("Cannot add an empty document list.")
+        try:
+            return await db.aadd_documents(docs, **kwargs)
+        except RAGError:
+            raise
+        except Exception as e:
+            raise DocumentOperationError(
+                f"Failed to add {len(docs)} documents: {e}"
+            ) from e
+
+    @staticmethod
+    def _writer(db: PGVector) -> IngestionWriter:
+        return IngestionWriter(
+            db,
+            batch_size=settings.EMBEDDING_BATCH_SIZE,
+            concurrency=settings.EMBEDDING_CONCURRENCY,
+            insert_batch_size=settings.INSERT_BATCH_SIZE,
+            insert_method=settings.INSERT_METHOD,
+            max_retries=settings.EMBEDDING_MAX_RETRIES,
+        )
+
+    async def awrite_documents(
+        self,
+        docs: Sequence[Document],
+        ids: Sequence[str],
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> WriteResult:
+        db = self._validate_adb()
+        if not docs:
+            raise DocumentOperationError("Cannot add an empty document list.")
+        try:
+            return await self._writer(db).write(docs, ids, on_progress=on_progress)
+        except (RAGError, WriterError):
+            raise
+        except Exception as e:
+            raise DocumentOperationError(
+                f"Failed to write {len(docs)} documents: {e}"
+            ) from e
+
+    async def afind_documents(self, metadata: Dict[str, Any]) -> Dict[str, Dict]:
+        db = self._validate_adb()
+        try:
+            return await self._writer(db).find(metadata)
+        except RAGError:
+            raise
+        except Exception as e:
+            raise DocumentOperationError(
+                f"Failed to look up documents matching {metadata}: {e}"
+            ) from e
+
+    async def aget_manifest(self, source: str) -> Optional[DocumentManifest]:
+        db = self._validate_adb()
+        try:
+            return await aget_document_manifest(
+                db._async_engine, db.collection_name, source
+            )
+        except Exception as e:
+            raise DocumentOperationError(
+                f"Failed to read the manifest for '{source}': {e}"
+            ) from e
+
+    async def aset_manifest(
+        self, source: str, document_hash: str, chunking: str, num_chunks: int
+    ) -> None:
+        db = self._validate_adb()
+        try:
+            await aset_document_manifest(
+                db._async_engine,
+                DocumentManifest(
+                    collection_name=db.collection_name,
+                    source=source,
+                    document_hash=document_hash,
+                    chunking=chunking,
+                    num_chunks=num_chunks,
+                ),
+            )
+        except Exception as e:
+            raise DocumentOperationError(
+                f"Failed to write the manifest for '{source}': {e}"
+            ) from e
+
+    async def adelete(self, ids: List[str]) -> bool:
+        db = self._validate_adb()
+        if not ids:
+            raise DocumentOperationError("Cannot delete with an empty ID list.")
+        try:
+            return await db.adelete(ids)
+        except RAGError:
+            raise
+        except Exception as e:
+            raise DocumentOperationError(
+                f"Failed to delete documents {ids}: {e}"
+            ) from e
+
+    async def aembed_queries(self, queries: Sequence[str]) -> List[List[float]]:
+        """Embed many queries in EMBEDDING_BATCH_SIZE requests, run
+        concurrently and backed off on rate limits."""
+        size = settings.EMBEDDING_BATCH_SIZE
+        batches = [list(queries[i : i + size]) for i in range(0, len(queries), size)]
+        limiter = AdaptiveConcurrencyLimiter(settings.EMBEDDING_CONCURRENCY)
+        try:
+            results = await asyncio.gather(
+                *(
+                    call_with_backoff(
+                        lambda batch=batch: self.embedding.aembed_documents(batch),
+                        limiter=limiter,
+                        max_retries=settings.EMBEDDING_MAX_RETRIES,
+                    )
+                    for batch in batches
+                )
+            )
+        except Exception as e:
+            raise SearchError(f"Failed to embed {len(queries)} queries: {e}") from e
+        return [vector for batch in results for vector in batch]
+
+    async def asimilarity_search(
+        self,
+        query: str,
+        k: int = 10,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        filter: Optional[MetadataFilter] = None,
+        **kwargs,
+    ) -> List[Document]:
+        self._validate_adb()
+        if not query.strip():
+            raise SearchError("Search query cannot be empty.")
+        try:
+            vector = await self.embedding.aembed_query(query)
+        except Exception as e:
+            raise SearchError(f"Failed to embed query '{query}': {e}") from e
+        return await self.asimilarity_search_by_vector(
+            vector, k, ef_search=ef_search, probes=probes, filter=filter, **kwargs
+        )
+
+    async def asimilarity_search_by_vector(
+        self,
+        vector: List[float],
+        k: int = 10,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        filter: Optional[MetadataFilter] = None,
+        **kwargs,
+    ) -> List[Document]:
+        db = self._validate_adb()
+        if k < 1:
+            raise SearchError(f"k must be >= 1, got {k}")
+        self._validate_filter(filter)
+        engine = db._async_engine
+        try:
+            if kwargs:
+                return await db.asimilarity_search_by_vector(
+                    vector, k, filter=filter, **kwargs
+                )
+            index = await self._aindex(db)
+            quantization, rescore = "none", 1
+            if index is not None:
+                collection_id = index.collection_id
+                quantization, rescore = index.quantization, index.rescore
+                scan = await self._ascan_settings(index, k, ef_search, probes, filter)
+            elif filter:
+                # Exact search, but over the rows the metadata indexes select.
+                collection_id = await acollection_id(engine, db.collection_name)
+                scan = []
+            else:
+                return await db.asimilarity_search_by_vector(vector, k)
+            results = await asearch_by_vector(
+                engine,
+                collection_id,
+                vector,
+                k,
+                dimensions=settings.EMBEDDING_DIMENSIONS,
+                settings=scan,
+                filter=filter,
+                quantization=quantization,
+                rescore=rescore,
+            )
+            return [doc for doc, _ in results]
+        except RAGError:
+            raise
+        except Exception as e:
+            raise SearchError(f"Similarity search failed: {e}") from e
+
+    async def ahybrid_search(
+        self,
+        query: str,
+        k: int = 10,
+        vector: Optional[List[float]] = None,
+        fetch_k: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        filter: Optional[MetadataFilter] = None,
+    ) -> List[Document]:
+        """Vector and full-text search run concurrently, fused with reciprocal
+        rank fusion. ``vector`` skips embedding ``query`` when already known."""
+        db = self._validate_adb()
+        if not query.strip():
+            raise SearchError("Search query cannot be empty.")
+        if k < 1:
+            raise SearchError(f"k must be >= 1, got {k}")
+        self._validate_filter(filter)
+        fetch_k = max(fetch_k or settings.HYBRID_FETCH_K, k)
+        engine = db._async_engine
+
+        async def dense() -> List[Document]:
+            query_vector = vector
+            if query_vector is None:
+                try:
+                    query_vector = await self.embedding.aembed_query(query)
+                except Exception as e:
+                    raise SearchError(f"Failed to embed query '{query}': {e}") from e
+            return await self.asimilarity_search_by_vector(
+                query_vector, fetch_k, ef_search=ef_search, probes=probes, filter=filter
+            )
+
+        async def lexical() -> List[Document]:
+            global _text_search_warned
+            try:
+                if not await atext_search_ready(engine):
+                    if not _text_search_warned:
+                        _text_search_warned = True
+                        logger.warning(
+                            "Full-text search is not set up; hybrid search is "
+                            "using vector results only. Run POST "
+                            "/rag/search-indexes?text_search=true."
+                        )
+                    return []
+                results = await asearch_by_text(
+                    engine,
+                    db.collection_name,
+                    query,
+                    fetch_k,
+                    config=settings.TEXT_SEARCH_CONFIG,
+                    filter=filter,
+                )
+            except Exception as e:
+                raise SearchError(f"Full-text search failed: {e}") from e
+            return [doc for doc, _ in results]
+
+        dense_hits, lexical_hits = await asyncio.gather(dense(), lexical())
+        fused = reciprocal_rank_fusion(
+            [dense_hits, lexical_hits],
+            weights=[settings.HYBRID_VECTOR_WEIGHT, settings.HYBRID_TEXT_WEIGHT],
+            k=settings.HYBRID_RRF_K,
+        )
+        return fused[:k]
+
+    async def amax_marginal_relevance_search_by_vector(
+        self,
+        vector: List[float],
+        k: int = 10,
+        fetch_k: Optional[int] = None,
+        lambda_mult: Optional[float] = None,
+        duplicate_threshold: Optional[float] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        filter: Optional[MetadataFilter] = None,
+    ) -> List[Document]:
+        """Diverse top-k: ``fetch_k`` nearest candidates are fetched with their
+        stored embeddings in one query, then re-ranked in-process by maximal
+        marginal relevance, dropping near-duplicates (e.g. overlapping chunks).
+        """
+        db = self._validate_adb()
+        if k < 1:
+            raise SearchError(f"k must be >= 1, got {k}")
+        self._validate_filter(filter)
+        fetch_k = max(fetch_k or settings.MMR_FETCH_K, k)
+        if lambda_mult is None:
+            lambda_mult = settings.MMR_LAMBDA
+        if duplicate_threshold is None:
+            duplicate_threshold = settings.MMR_DUPLICATE_THRESHOLD
+        engine = db._async_engine
+        try:
+            index = await self._aindex(db)
+            collection_id, scan = None, []
+            quantization, rescore = "none", 1
+            if index is not None:
+                collection_id = index.collection_id
+                quantization, rescore = index.quantization, index.rescore
+                scan = await self._ascan_settings(
+                    index, fetch_k, ef_search, probes, filter
+                )
+            documents, distances, embeddings = await asearch_candidates(
+                engine,
+                vector,
+                fetch_k,
+                dimensions=settings.EMBEDDING_DIMENSIONS,
+                collection_id=collection_id,
+                collection_name=db.collection_name,
+                settings=scan,
+                filter=filter,
+                quantization=quantization,
+                rescore=rescore,
+            )
+        except RAGError:
+            raise
+        except Exception as e:
+            raise SearchError(f"Similarity search failed: {e}") from e
+        picked = maximal_marginal_relevance(
+            1.0 - distances,
+            normalize_rows(embeddings),
+            k,
+            lambda_mult=lambda_mult,
+            duplicate_threshold=duplicate_threshold,
+        )
+        return [documents[i] for i in picked]
+
+    async def _ascan_settings(
+        self,
+        index: VectorIndexConfig,
+        k: int,
+        ef_search: Optional[int],
+        probes: Optional[int],
+        filter: Optional[MetadataFilter],
+    ) -> List[str]:
+        # Binary indexes are scanned for k * rescore candidates.
+        limit = k * index.rescore if index.quantization == "binary" else k
+        iterative_scan = None
+        if filter:
+            iterative_scan = await self.indexes.aiterative_scan(
+                settings.VECTOR_INDEX_ITERATIVE_SCAN
+            )
+            if iterative_scan is None:
+                # The filter is applied to at most ef_search index rows.
+                limit = max(limit, settings.VECTOR_INDEX_FILTERED_EF_SEARCH)
+        return self.indexes.search_settings(
+            index, ef_search, probes, iterative_scan=iterative_scan, limit=limit
+        )
+
+    async def _aindex(self, db: PGVector) -> Optional[VectorIndexConfig]:
+        if self.indexes is None:
+            return None
+        index = await self.indexes.aget(db.collection_name)
+        return index if index is not None and index.ready else None
+
+    async def aensure_index(self) -> None:
+        """Start building the default ANN index for the current collection if
+        it has none yet."""
+        db = self._validate_adb()
+        if self.indexes is None or not settings.VECTOR_INDEX_AUTO_CREATE:
+            return
+        await self.indexes.aensure(
+            VectorIndexConfig(
+                collection_name=db.collection_name,
+                method=settings.VECTOR_INDEX_METHOD,
+                m=settings.VECTOR_INDEX_HNSW_M,
+                ef_construction=settings.VECTOR_INDEX_HNSW_EF_CONSTRUCTION,
+                lists=settings.VECTOR_INDEX_IVFFLAT_LISTS,
+                ef_search=settings.VECTOR_INDEX_HNSW_EF_SEARCH,
+                probes=settings.VECTOR_INDEX_IVFFLAT_PROBES,
+                quantization=settings.VECTOR_INDEX_QUANTIZATION,
+                rescore=settings.VECTOR_INDEX_BINARY_RESCORE,
+            ),
+            ivfflat_min_rows=settings.VECTOR_INDEX_IVFFLAT_MIN_ROWS,
+        )
+
+    async def aretriever(
+        self,
+        query: str,
+        search_type: str = "mmr",
+        filter: Optional[MetadataFilter] = None,
+        **kwargs,
+    ) -> List[Document]:
+        db = self._validate_adb()
+        if not query.strip():
+            raise SearchError("Retriever query cannot be empty.")
+
+        valid_search_types = {"mmr", "similarity", "similarity_score_threshold"}
+        if search_type not in valid_search_types:
+            raise SearchError(
+                f"Invalid search_type '{search_type}'. Must be one of {valid_search_types}"
+            )
+        if filter:
+            kwargs["search_kwargs"] = {
+                **kwargs.get("search_kwargs", {}),
+                "filter": filter,
+            }
+        try:
+            retriever = db.as_retriever(search_type=search_type, **kwargs)
+            return await retriever.ainvoke(query)
+        except RAGError:
+            raise
+        except Exception as e:
+            raise SearchError(
+                f"Retrieval failed for query '{query}' with search_type '{search_type}': {e}"
+            ) from e
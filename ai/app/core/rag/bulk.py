@@ -0,0 +1,225 @@
+import asyncio
+import logging
+import os
+import shutil
+import tarfile
+import time
+import zipfile
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, Literal, Optional, Sequence, Tuple
+
+from .ingestion import (
+    IngestionError,
+    IngestionTracker,
+    UploadTooLargeError,
+    ingest_pdf,
+)
+from .parsers.factory import ParserStrategy
+from .writer import PartialWriteError
+
+logger = logging.getLogger(__name__)
+
+BulkFileStatus = Literal["completed", "unchanged", "failed"]
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+
+
+class ArchiveError(IngestionError):
+    """Raised when an uploaded archive cannot be read."""
+
+    pass
+
+
+@dataclass
+class BulkFileResult:
+    filename: str
+    status: BulkFileStatus
+    pages: int = 0
+    num_chunks: int = 0
+    reused: int = 0
+    added: int = 0
+    deleted: int = 0
+    duration_seconds: float = 0.0
+    error: Optional[str] = None
+
+
+@dataclass
+class BulkIngestionSummary:
+    vector_index: str
+    files: int = 0
+    completed: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    pages: int = 0
+    chunks: int = 0
+    added: int = 0
+    elapsed_seconds: float = 0.0
+    pages_per_second: float = 0.0
+    chunks_per_second: float = 0.0
+    _started: float = field(default_factory=time.perf_counter, repr=False)
+
+    def add(self, result: BulkFileResult) -> None:
+        self.files += 1
+        setattr(self, result.status, getattr(self, result.status) + 1)
+        self.pages += result.pages
+        self.chunks += result.num_chunks
+        self.added += result.added
+        self.elapsed_seconds = time.perf_counter() - self._started
+        if self.elapsed_seconds > 0:
+            self.pages_per_second = self.pages / self.elapsed_seconds
+            self.chunks_per_second = self.chunks / self.elapsed_seconds
+
+    def as_dict(self) -> Dict:
+        return {k: v for k, v in vars(self).items() if not k.startswith("_")}
+
+
+def is_archive(filename: str) -> bool:
+    return filename.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def find_pdfs(directory: str, recursive: bool = True) -> List[Tuple[str, str]]:
+    """``(source name, path)`` for every PDF under ``directory``; the source
+    name is the path relative to ``directory``."""
+    found = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(".pdf"):
+                path = os.path.join(root, name)
+                found.append((os.path.relpath(path, directory), path))
+        if not recursive:
+            break
+    return found
+
+
+def extract_pdfs(
+    archive_path: str, dest_dir: str, max_files: int, max_bytes: int
+) -> List[Tuple[str, str]]:
+    """Extract the PDFs of a zip or tar archive into ``dest_dir``.
+
+    Only regular files are extracted, under generated names, so member paths
+    cannot escape ``dest_dir``. ``max_bytes`` caps the uncompressed total.
+    """
+    members: List[Tuple[str, int, object]] = []
+    try:
+        if zipfile.is_zipfile(archive_path):
+            archive = zipfile.ZipFile(archive_path)
+            for info in archive.infolist():
+                if not info.is_dir() and info.filename.lower().endswith(".pdf"):
+                    members.append((info.filename, info.file_size, info))
+            open_member = archive.open
+        else:
+            archive = tarfile.open(archive_path)
+            for info in archive.getmembers():
+                if info.isfile() and info.name.lower().endswith(".pdf"):
+                    members.append((info.name, info.size, info))
+            open_member = archive.extractfile
+    except (zipfile.BadZipFile, tarfile.TarError, OSError) as e:
+        raise ArchiveError(f"Cannot read archive: {e}") from e
+
+    with archive:
+        if len(members) > max_files:
+            raise ArchiveError(
+                f"Archive holds {len(members)} PDFs; the limit is {max_files}."
+            )
+        if sum(size for _, size, _ in members) > max_bytes:
+            raise UploadTooLargeError(
+                f"Archive content exceeds the {max_bytes} byte limit."
+            )
+        extracted = []
+        for i, (name, _, info) in enumerate(members):
+            path = os.path.join(dest_dir, f"{i:06d}.pdf")
+            try:
+                with open_member(info) as src, open(path, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+            except (zipfile.BadZipFile, tarfile.TarError, RuntimeError) as e:
+                raise ArchiveError(f"Cannot extract '{name}': {e}") from e
+            extracted.append((name.lstrip("/"), path))
+        return extracted
+
+
+async def ingest_files(
+    files: Sequence[Tuple[str, str]],
+    vector_index: str,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None,
+    parser_strategy: ParserStrategy = "speed",
+    concurrency: int = 4,
+) -> AsyncIterator[BulkFileResult]:
+    """Ingest ``(filename, path)`` pairs, yielding one result per file in
+    completion order.
+
+    Files run through ``ingest_pdf`` on ``concurrency`` workers, so while one
+    file is being parsed (in the shared parser engine) others are embedding
+    and inserting through the shared vector store pool. One failing file
+    does not stop the others.
+    """
+    pending: "asyncio.Queue[Tuple[str, str]]" = asyncio.Queue()
+    results: "asyncio.Queue[BulkFileResult]" = asyncio.Queue()
+    seen = set()
+    for filename, path in files:
+        # Two files with the same source name would race on the same chunks.
+        if filename in seen:
+            results.put_nowait(
+                BulkFileResult(
+                    filename=filename,
+                    status="failed",
+                    error="Duplicate filename in this batch.",
+                )
+            )
+        else:
+            seen.add(filename)
+            pending.put_nowait((filename, path))
+
+    async def ingest_one(filename: str, path: str) -> BulkFileResult:
+        tracker = IngestionTracker()
+        t0 = time.perf_counter()
+        try:
+            result = await ingest_pdf(
+                pdf_path=path,
+                filename=filename,
+                vector_index=vector_index,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                parser_strategy=parser_strategy,
+                tracker=tracker,
+                rollback_on_error=False,
+            )
+        except Exception as e:
+            logger.warning("Bulk ingestion of %s failed: %s", filename, e)
+            stored = len(e.stored_ids) if isinstance(e, PartialWriteError) else 0
+            return BulkFileResult(
+                filename=filename,
+                status="failed",
+                pages=tracker.pages_done,
+                num_chunks=stored,
+                duration_seconds=time.perf_counter() - t0,
+                error=str(e),
+            )
+        return BulkFileResult(
+            filename=filename,
+            status="unchanged" if result.unchanged else "completed",
+            pages=tracker.pages_done,
+            num_chunks=result.num_chunks,
+            reused=result.reused,
+            added=result.added,
+            deleted=result.deleted,
+            duration_seconds=time.perf_counter() - t0,
+        )
+
+    async def worker() -> None:
+        while not pending.empty():
+            filename, path = pending.get_nowait()
+            await results.put(await ingest_one(filename, path))
+
+    workers = [
+        asyncio.create_task(worker())
+        for _ in range(min(max(1, concurrency), pending.qsize()))
+    ]
+    try:
+        for _ in range(len(files)):
+            yield await results.get()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
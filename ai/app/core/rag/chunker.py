@@ -1,23 +1,396 @@
-from typing import Dict, List, Optional
+import hashlib
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Pattern,
+    Tuple,
+    Union,
+)
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from ..context import Tokenizer, get_tokenizer
 
-def chunk_document(
-    text: str,
-    metadata: Optional[Dict] = None,
-    chunk_size: int = 1000,
-    chunk_overlap: int = 200,
-) -> List[Document]:
-    splitter = RecursiveCharacterTextSplitter(
+ChunkerName = Literal["markdown", "recursive"]
+BlockKind = Literal["heading", "text", "table", "code"]
+
+# Used when a request leaves chunk_size/chunk_overlap unset, in each chunker's
+# unit (tokens for "markdown", characters for "recursive"); both come to
+# roughly 1000/200 characters.
+DEFAULT_CHUNKING: Dict[str, Tuple[int, int]] = {
+    "markdown": (256, 50),
+    "recursive": (1000, 200),
+}
+
+# Marker's paginate_output writes "{page_id}" followed by dashes.
+_MARKER_PAGE = re.compile(r"^\{(\d+)\}-{3,}\s*$")
+# LlamaParser joins its per-page documents with a horizontal rule.
+_RULE_PAGE = re.compile(r"^-{3,}\s*$")
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_FENCE = re.compile(r"^\s*(```|~~~)")
+# Lines starting with anything else are plain text.
+_SPECIAL_STARTS = frozenset("{-#`~| \t")
+_TABLE_RULE = re.compile(r"^\s*\|?\s*:?-{3,}")
+_SPLIT_POINTS: Tuple[Pattern, ...] = (
+    re.compile(r"\n"),
+    re.compile(r"(?<=[.!?])\s+"),
+    re.compile(r"\s+"),
+)
+
+
+def chunk_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class Block:
+    """A heading, paragraph, table or code block. Blocks are only split when
+    one alone exceeds the chunk size."""
+
+    text: str
+    kind: BlockKind
+    page: int
+    headings: Tuple[str, ...]
+    tokens: int = 0
+    overlap: bool = False
+
+
+def _iter_lines(corpus: Union[str, Iterable[str]]) -> Iterator[str]:
+    if isinstance(corpus, str):
+        yield from corpus.split("\n")
+        return
+    partial = ""
+    for fragment in corpus:
+        lines = (partial + fragment).split("\n")
+        partial = lines.pop()
+        yield from lines
+    if partial:
+        yield partial
+
+
+def iter_blocks(
+    corpus: Union[str, Iterable[str]], page_offset: int = 0
+) -> Iterator[Block]:
+    """Split Markdown into blocks, tracking the 1-based page number and the
+    heading path. ``corpus`` may be a string or an iterable of text fragments.
+
+    Marker page separators carry the page id, so once one is seen ``---``
+    lines are ordinary rules; without them each ``---`` line starts a page.
+    """
+    page = page_offset + 1
+    first_page_id: Optional[int] = None
+    headings: List[Tuple[int, str]] = []
+    buffer: List[str] = []
+    kind: BlockKind = "text"
+    fence: Optional[str] = None
+
+    def flush() -> Iterator[Block]:
+        text = "\n".join(buffer).strip()
+        buffer.clear()
+        if text:
+            yield Block(text, kind, page, tuple(title for _, title in headings))
+
+    for line in _iter_lines(corpus):
+        line = line.rstrip("\r")
+        if fence is not None:
+            buffer.append(line)
+            if line.strip().startswith(fence):
+                yield from flush()
+                fence, kind = None, "text"
+            continue
+        if line and (line[0] not in _SPECIAL_STARTS or line[0] == "|"):
+            row_kind = "table" if line[0] == "|" else "text"
+            if kind != row_kind:
+                yield from flush()
+                kind = row_kind
+            buffer.append(line)
+            continue
+
+        page_marker = _MARKER_PAGE.match(line)
+        if page_marker or (first_page_id is None and _RULE_PAGE.match(line)):
+            yield from flush()
+            kind = "text"
+            if page_marker:
+                page_id = int(page_marker.group(1))
+                if first_page_id is None:
+                    first_page_id = page_id
+                page = page_offset + page_id - first_page_id + 1
+            else:
+                page += 1
+            continue
+
+        fenced = _FENCE.match(line)
+        heading = _HEADING.match(line)
+        is_table = line.lstrip().startswith("|")
+        if fenced or heading or not line.strip() or is_table != (kind == "table"):
+            yield from flush()
+            kind = "text"
+        if fenced:
+            fence, kind = fenced.group(1), "code"
+            buffer.append(line)
+        elif heading:
+            level = len(heading.group(1))
+            while headings and headings[-1][0] >= level:
+                headings.pop()
+            headings.append((level, heading.group(2)))
+            buffer.append(line)
+            kind = "heading"
+            yield from flush()
+            kind = "text"
+        elif line.strip():
+            kind = "table" if is_table else "text"
+            buffer.append(line)
+    yield from flush()
+
+
+class MarkdownChunker:
+    """Packs Markdown blocks into chunks of at most ``chunk_size`` tokens of
+    the embedding model.
+
+    A heading always starts a new chunk, and a page boundary does once the
+    chunk holds at least ``min_chunk_tokens``. Oversized blocks are split on
+    lines, then sentences, then words; split tables repeat their header row.
+    Chunks continuing a section start with up to ``chunk_overlap`` tokens of
+    trailing sentences from the previous chunk.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 256,
+        chunk_overlap: int = 50,
+        tokenizer: Optional[Tokenizer] = None,
+        min_chunk_tokens: Optional[int] = None,
+    ):
+        if chunk_overlap >= chunk_size:
+            raise ValueError(
+                f"chunk_overlap ({chunk_overlap}) must be smaller than "
+                f"chunk_size ({chunk_size})."
+            )
+        if tokenizer is None:
+            from app.core.config import settings
+
+            tokenizer = get_tokenizer(settings.EMBEDDING_MODEL)
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.tokenizer = tokenizer
+        self.min_chunk_tokens = (
+            chunk_size // 4 if min_chunk_tokens is None else min_chunk_tokens
+        )
+
+    def split(
+        self, corpus: Union[str, Iterable[str]], page_offset: int = 0
+    ) -> Iterator[List[Block]]:
+        """Yield chunks as lists of blocks, lazily over ``corpus``."""
+        current: List[Block] = []
+        size = 0
+        for block in iter_blocks(corpus, page_offset):
+            block.tokens = self._count(block.text)
+            pending = [block]
+            while pending:
+                piece = pending.pop()
+                if self._should_break(current, size, piece):
+                    yield current
+                    current = self._overlap(current, piece)
+                    size = sum(b.tokens + 1 for b in current)
+                room = max(self.chunk_size - size, self.min_chunk_tokens, 1)
+                if piece.tokens > room:
+                    piece, rest = self._split_block(piece, room)
+                    pending.append(rest)
+                current.append(piece)
+                size += piece.tokens + 1
+        if self._has_content(current):
+            yield current
+
+    @staticmethod
+    def _has_content(blocks: List[Block]) -> bool:
+        return any(b.kind != "heading" and not b.overlap for b in blocks)
+
+    def _should_break(self, current: List[Block], size: int, piece: Block) -> bool:
+        if not self._has_content(current):
+            return False
+        return (
+            piece.kind == "heading"
+            or size + piece.tokens > self.chunk_size
+            or (piece.page != current[-1].page and size >= self.min_chunk_tokens)
+        )
+
+    def _count(self, text: str) -> int:
+        return self.tokenizer.count(text)
+
+    def _overlap(self, previous: List[Block], piece: Block) -> List[Block]:
+        if self.chunk_overlap <= 0 or piece.kind == "heading":
+            return []
+        # Trailing sentences of the section's prose; tables and code are not
+        # repeated piecemeal.
+        sentences: List[str] = []
+        budget = self.chunk_overlap
+        for block in reversed(previous):
+            if block.kind != "text" or block.headings != piece.headings:
+                break
+            units = _SPLIT_POINTS[1].split(block.text)
+            for unit in reversed(units):
+                budget -= self._count(unit) + 1
+                if budget < 0:
+                    break
+                sentences.append(unit)
+            if budget < 0:
+                break
+        if not sentences:
+            return []
+        text = " ".join(reversed(sentences))
+        return [
+            Block(
+                text,
+                "text",
+                previous[-1].page,
+                piece.headings,
+                self._count(text),
+                overlap=True,
+            )
+        ]
+
+    def _split_block(self, block: Block, room: int) -> Tuple[Block, Block]:
+        head, rest = self._split_text(block.text, room)
+        if block.kind == "table":
+            lines = block.text.split("\n", 2)
+            header = lines[0]
+            if len(lines) > 1 and _TABLE_RULE.match(lines[1]):
+                header = f"{lines[0]}\n{lines[1]}"
+            if not rest.startswith(header) and len(header) < len(head):
+                rest = f"{header}\n{rest}"
+        head_tokens = self._count(head)
+        # Recounting the remainder would make splitting huge blocks quadratic.
+        rest_tokens = max(1, block.tokens - head_tokens)
+        return (
+            Block(head, block.kind, block.page, block.headings, head_tokens),
+            Block(rest, block.kind, block.page, block.headings, rest_tokens),
+        )
+
+    def _split_text(self, text: str, room: int) -> Tuple[str, str]:
+        """The longest prefix of ``text`` within ``room`` tokens that ends at
+        the coarsest possible split point, and the remainder."""
+        for pattern in _SPLIT_POINTS:
+            end = used = 0
+            for match in pattern.finditer(text):
+                if match.start() == 0:
+                    continue
+                used += self._count(text[end : match.start()])
+                if used > room:
+                    break
+                end = match.start()
+            if end:
+                return text[:end].rstrip(), text[end:].lstrip()
+        head = self.tokenizer.truncate(text, room) or text[:1]
+        return head, text[len(head) :].lstrip()
+
+
+def resolve_chunking(
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None,
+    chunker: Optional[ChunkerName] = None,
+) -> Tuple[ChunkerName, int, int]:
+    if chunker is None:
+        from app.core.config import settings
+
+        chunker = settings.CHUNKER
+    default_size, default_overlap = DEFAULT_CHUNKING[chunker]
+    return (
+        chunker,
+        default_size if chunk_size is None else chunk_size,
+        default_overlap if chunk_overlap is None else chunk_overlap,
+    )
+
+
+@lru_cache(maxsize=16)
+def _recursive_splitter(
+    chunk_size: int, chunk_overlap: int
+) -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
         chunk_size=chunk_size,
         chunk_overlap=chunk_overlap,
         length_function=len,
         separators=["\n\n", "\n", ". ", " ", ""],
     )
+
+
+def iter_chunks(
+    corpus: Union[str, Iterable[str]],
+    metadata: Optional[Dict] = None,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None,
+    start_index: int = 0,
+    page_offset: int = 0,
+    chunker: Optional[ChunkerName] = None,
+) -> Iterator[Document]:
+    """Chunk parsed Markdown lazily.
+
+    The ``markdown`` chunker sizes chunks in embedding-model tokens and adds
+    ``page``, ``page_end`` (1-based) and ``headings`` to the metadata; the
+    ``recursive`` one is the character-based splitter used before it.
+    ``page_offset`` is the 0-based page the corpus starts at. Unset sizes
+    come from ``DEFAULT_CHUNKING``.
+    """
+    chunker, chunk_size, chunk_overlap = resolve_chunking(
+        chunk_size, chunk_overlap, chunker
+    )
     base_metadata = metadata or {}
-    chunks = splitter.split_text(text)
-    return [
-        Document(page_content=chunk, metadata={**base_metadata, "chunk_index": i})
-        for i, chunk in enumerate(chunks)
-    ]
\ No newline at end of file
+    index = start_index
+
+    if chunker == "recursive":
+        if not isinstance(corpus, str):
+            corpus = "".join(corpus)
+        for chunk in _recursive_splitter(chunk_size, chunk_overlap).split_text(corpus):
+            yield Document(
+                page_content=chunk,
+                metadata={
+                    **base_metadata,
+                    "chunk_index": index,
+                    "chunk_hash": chunk_hash(chunk),
+                },
+            )
+            index += 1
+        return
+
+    for blocks in MarkdownChunker(chunk_size, chunk_overlap).split(corpus, page_offset):
+        chunk = "\n\n".join(block.text for block in blocks)
+        yield Document(
+            page_content=chunk,
+            metadata={
+                **base_metadata,
+                "chunk_index": index,
+                "chunk_hash": chunk_hash(chunk),
+                "page": blocks[0].page,
+                "page_end": blocks[-1].page,
+                "headings": list(blocks[-1].headings),
+            },
+        )
+        index += 1
+
+
+def chunk_document(
+    text: str,
+    metadata: Optional[Dict] = None,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None,
+    start_index: int = 0,
+    page_offset: int = 0,
+    chunker: Optional[ChunkerName] = None,
+) -> List[Document]:
+    return list(
+        iter_chunks(
+            text,
+            metadata=metadata,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            start_index=start_index,
+            page_offset=page_offset,
+            chunker=chunker,
+        )
+    )
\ No newline at end of file
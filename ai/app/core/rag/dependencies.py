@@ -1,14 +1,152 @@
 from functools import lru_cache
+from typing import Optional
+
+from langchain_core.embeddings import Embeddings
 from langchain_openai import OpenAIEmbeddings
 
 from app.core.rag import RAG
+from app.core.rag.embedding_cache import (
+    CachedEmbeddings,
+    EmbeddingCacheBackend,
+    InMemoryEmbeddingCache,
+    PostgresEmbeddingCache,
+    SQLiteEmbeddingCache,
+)
+from app.core.rag.indexes import VectorIndexManager
+from app.core.rag.parse_cache import (
+    DiskParseCache,
+    ParseResultCache,
+    PostgresParseCache,
+)
+from app.core.rag.pool import VectorStorePool
+from app.core.rag.search_indexes import SearchIndexSetup
 from app.core.config import settings
 
 
+def _build_embedding_cache_backend() -> Optional[EmbeddingCacheBackend]:
+    if settings.EMBEDDING_CACHE_BACKEND == "sqlite":
+        return SQLiteEmbeddingCache(
+            path=settings.EMBEDDING_CACHE_SQLITE_PATH,
+            max_entries=settings.EMBEDDING_CACHE_PERSISTENT_MAX_ENTRIES,
+            ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS,
+        )
+    if settings.EMBEDDING_CACHE_BACKEND == "postgres":
+        return PostgresEmbeddingCache(
+            connection=settings.POSTGRES_URI,
+            async_connection=settings.POSTGRES_ASYNC_URI,
+            max_entries=settings.EMBEDDING_CACHE_PERSISTENT_MAX_ENTRIES,
+            ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS,
+        )
+    return None
+
+
 @lru_cache(maxsize=1)
-def get_embedding_model() -> OpenAIEmbeddings:
-    return OpenAIEmbeddings(model="text-embedding-3-small", api_key=settings.OPENAI_API_KEY)
+def get_embedding_model() -> Embeddings:
+    options = {"base_url": settings.OPENAI_BASE_URL} if settings.OPENAI_BASE_URL else {}
+    embeddings = OpenAIEmbeddings(
+        model=settings.EMBEDDING_MODEL, api_key=settings.OPENAI_API_KEY, **options
+    )
+    if settings.EMBEDDING_CACHE_BACKEND == "none":
+        return embeddings
+    return CachedEmbeddings(
+        underlying=embeddings,
+        model_name=settings.EMBEDDING_MODEL,
+        memory=InMemoryEmbeddingCache(
+            max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS,
+        ),
+        backend=_build_embedding_cache_backend(),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_vector_store_pool() -> VectorStorePool:
+    return VectorStorePool(
+        embedding=get_embedding_model(),
+        connection=settings.POSTGRES_URI,
+        async_connection=settings.POSTGRES_ASYNC_URI,
+        pool_size=settings.PGVECTOR_POOL_SIZE,
+        max_overflow=settings.PGVECTOR_MAX_OVERFLOW,
+        pool_timeout=settings.PGVECTOR_POOL_TIMEOUT,
+        pool_recycle=settings.PGVECTOR_POOL_RECYCLE,
+        pre_ping=settings.PGVECTOR_POOL_PRE_PING,
+        idle_timeout=settings.PGVECTOR_STORE_IDLE_TIMEOUT,
+        max_stores=settings.PGVECTOR_MAX_STORES,
+    )
+
+
+async def close_vector_store_pool() -> None:
+    if get_vector_store_pool.cache_info().currsize:
+        await get_vector_store_pool().adispose()
+        get_vector_store_pool.cache_clear()
+
+
+@lru_cache(maxsize=1)
+def get_vector_index_manager() -> VectorIndexManager:
+    return VectorIndexManager(
+        engine=get_vector_store_pool().async_engine,
+        dimensions=settings.EMBEDDING_DIMENSIONS,
+        cache_ttl=settings.VECTOR_INDEX_CACHE_TTL_SECONDS,
+    )
+
+
+async def stop_vector_index_manager() -> None:
+    if get_vector_index_manager.cache_info().currsize:
+        await get_vector_index_manager().astop()
+        get_vector_index_manager.cache_clear()
+
+
+@lru_cache(maxsize=1)
+def get_search_index_setup() -> SearchIndexSetup:
+    return SearchIndexSetup(
+        engine=get_vector_store_pool().async_engine,
+        metadata_fields=settings.METADATA_INDEXED_FIELDS,
+        text_search_config=settings.TEXT_SEARCH_CONFIG,
+    )
+
+
+async def stop_search_index_setup() -> None:
+    if get_search_index_setup.cache_info().currsize:
+        await get_search_index_setup().astop()
+        get_search_index_setup.cache_clear()
+
+
+async def close_embedding_model() -> None:
+    if get_embedding_model.cache_info().currsize:
+        embeddings = get_embedding_model()
+        if isinstance(embeddings, CachedEmbeddings):
+            await embeddings.aclose()
+        get_embedding_model.cache_clear()
+
+
+@lru_cache(maxsize=1)
+def get_parse_result_cache() -> Optional[ParseResultCache]:
+    if settings.PARSE_CACHE_BACKEND == "disk":
+        return ParseResultCache(
+            DiskParseCache(
+                settings.PARSE_CACHE_DIR, max_bytes=settings.PARSE_CACHE_MAX_BYTES
+            )
+        )
+    if settings.PARSE_CACHE_BACKEND == "postgres":
+        return ParseResultCache(
+            PostgresParseCache(
+                settings.POSTGRES_URI, max_bytes=settings.PARSE_CACHE_MAX_BYTES
+            )
+        )
+    return None
+
+
+def close_parse_result_cache() -> None:
+    if get_parse_result_cache.cache_info().currsize:
+        cache = get_parse_result_cache()
+        if cache is not None:
+            cache.close()
+        get_parse_result_cache.cache_clear()
 
 
 def get_rag() -> RAG:
-    return RAG(embedding=get_embedding_model())
\ No newline at end of file
+    return RAG(
+        embedding=get_embedding_model(),
+        pool=get_vector_store_pool(),
+        indexes=get_vector_index_manager(),
+    )
\ No newline at end of file
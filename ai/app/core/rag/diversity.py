@@ -0,0 +1,50 @@
+from typing import List, Optional
+
+import numpy as np
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def maximal_marginal_relevance(
+    relevance: np.ndarray,
+    embeddings: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.5,
+    duplicate_threshold: Optional[float] = None,
+) -> List[int]:
+    """Indexes of up to ``k`` candidates chosen by maximal marginal relevance.
+
+    ``relevance`` is each candidate's cosine similarity to the query and
+    ``embeddings`` their (unit-normalized) vectors. Each step picks the
+    candidate maximizing ``lambda * relevance - (1 - lambda) * max similarity
+    to the picked ones``; candidates at least ``duplicate_threshold`` similar
+    to a picked one are dropped, so fewer than ``k`` may be returned.
+
+    Similarities to the picked set are kept as one running maximum, updated
+    with a single matrix-vector product per pick: O(k * N * d) rather than the
+    N x N similarity matrix.
+    """
+    n = len(relevance)
+    if n == 0 or k < 1:
+        return []
+    relevance = relevance.astype(np.float32, copy=False)
+    max_similarity = np.full(n, -np.inf, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    picked: List[int] = []
+    # The most relevant candidate always comes first.
+    scores = relevance.copy()
+    while len(picked) < k:
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        if not available[best]:
+            break
+        picked.append(best)
+        available[best] = False
+        np.maximum(max_similarity, embeddings @ embeddings[best], out=max_similarity)
+        if duplicate_threshold is not None:
+            available &= max_similarity < duplicate_threshold
+        scores = lambda_mult * relevance - (1.0 - lambda_mult) * max_similarity
+    return picked
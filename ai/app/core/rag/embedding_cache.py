@@ -0,0 +1,474 @@
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Literal, Optional, Sequence, Tuple
+
+from langchain_core.embeddings import Embeddings
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+logger = logging.getLogger(__name__)
+
+EmbeddingKind = Literal["query", "document"]
+
+
+def _encode(vector: Sequence[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _decode(blob: bytes) -> List[float]:
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector.tolist()
+
+
+def normalize_text(text: str) -> str:
+    # Whitespace only: the embedding model is case-sensitive, so folding case
+    # would serve one casing's vector for another.
+    return " ".join(text.split())
+
+
+def make_cache_key(model_name: str, text: str, kind: EmbeddingKind) -> str:
+    payload = f"{model_name}\x00{kind}\x00{normalize_text(text)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCacheBackend(ABC):
+    name: str = "backend"
+
+    @abstractmethod
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]: ...
+
+    @abstractmethod
+    def set_many(self, items: Dict[str, List[float]]) -> None: ...
+
+    @abstractmethod
+    def size(self) -> int: ...
+
+    async def aget_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        return await asyncio.to_thread(self.get_many, keys)
+
+    async def aset_many(self, items: Dict[str, List[float]]) -> None:
+        await asyncio.to_thread(self.set_many, items)
+
+    def close(self) -> None:
+        pass
+
+    async def aclose(self) -> None:
+        self.close()
+
+
+class InMemoryEmbeddingCache(EmbeddingCacheBackend):
+    name = "memory"
+
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: float = 86_400.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        now = time.monotonic()
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                expires_at, blob = entry
+                if expires_at <= now:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = _decode(blob)
+        return found
+
+    def set_many(self, items: Dict[str, List[float]]) -> None:
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            for key, vector in items.items():
+                self._entries[key] = (expires_at, _encode(vector))
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    async def aget_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        return self.get_many(keys)
+
+    async def aset_many(self, items: Dict[str, List[float]]) -> None:
+        self.set_many(items)
+
+
+class SQLiteEmbeddingCache(EmbeddingCacheBackend):
+    name = "sqlite"
+    _PRUNE_EVERY = 1000
+
+    def __init__(
+        self, path: str, max_entries: int = 100_000, ttl_seconds: float = 86_400.0
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embedding_cache ("
+            "key TEXT PRIMARY KEY, embedding BLOB NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_embedding_cache_created_at "
+            "ON embedding_cache (created_at)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        if not keys:
+            return {}
+        cutoff = time.time() - self.ttl_seconds
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, embedding FROM embedding_cache "
+                f"WHERE key IN ({placeholders}) AND created_at > ?",
+                (*keys, cutoff),
+            ).fetchall()
+        return {key: _decode(blob) for key, blob in rows}
+
+    def set_many(self, items: Dict[str, List[float]]) -> None:
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embedding_cache (key, embedding, created_at) "
+                "VALUES (?, ?, ?)",
+                [(key, _encode(vector), now) for key, vector in items.items()],
+            )
+            self._writes += len(items)
+            if self._writes >= self._PRUNE_EVERY:
+                self._writes = 0
+                self._prune(now)
+            self._conn.commit()
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM embedding_cache"
+            ).fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _prune(self, now: float) -> None:
+        self._conn.execute(
+            "DELETE FROM embedding_cache WHERE created_at <= ?",
+            (now - self.ttl_seconds,),
+        )
+        self._conn.execute(
+            "DELETE FROM embedding_cache WHERE key IN ("
+            "SELECT key FROM embedding_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+
+class PostgresEmbeddingCache(EmbeddingCacheBackend):
+    name = "postgres"
+    _PRUNE_EVERY = 1000
+    _CREATE_TABLE = text(
+        "CREATE TABLE IF NOT EXISTS embedding_cache ("
+        "key TEXT PRIMARY KEY, embedding BYTEA NOT NULL, "
+        "created_at DOUBLE PRECISION NOT NULL)"
+    )
+    # Pruning orders by age; without an index every prune sorts the table.
+    _CREATE_INDEX = text(
+        "CREATE INDEX IF NOT EXISTS ix_embedding_cache_created_at "
+        "ON embedding_cache (created_at)"
+    )
+    _SELECT = text(
+        "SELECT key, embedding FROM embedding_cache "
+        "WHERE key = ANY(:keys) AND created_at > :cutoff"
+    )
+    _UPSERT = text(
+        "INSERT INTO embedding_cache (key, embedding, created_at) "
+        "VALUES (:key, :embedding, :created_at) "
+        "ON CONFLICT (key) DO UPDATE SET "
+        "embedding = EXCLUDED.embedding, created_at = EXCLUDED.created_at"
+    )
+    _PRUNE = text(
+        "DELETE FROM embedding_cache WHERE created_at <= :cutoff "
+        "OR key IN (SELECT key FROM embedding_cache "
+        "ORDER BY created_at DESC OFFSET :max_entries)"
+    )
+
+    def __init__(
+        self,
+        connection: str,
+        async_connection: Optional[str] = None,
+        max_entries: int = 1_000_000,
+        ttl_seconds: float = 86_400.0,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._engine = create_engine(connection, pool_size=2, pool_pre_ping=True)
+        self._async_engine = create_async_engine(
+            async_connection or connection, pool_size=2, pool_pre_ping=True
+        )
+        self._table_ready = False
+        self._writes = 0
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        if not keys:
+            return {}
+        with self._engine.begin() as conn:
+            self._ensure_table(conn)
+            rows = conn.execute(self._SELECT, self._select_params(keys)).all()
+        return {key: _decode(bytes(blob)) for key, blob in rows}
+
+    def set_many(self, items: Dict[str, List[float]]) -> None:
+        if not items:
+            return
+        with self._engine.begin() as conn:
+            self._ensure_table(conn)
+            conn.execute(self._UPSERT, self._upsert_params(items))
+            if self._should_prune(len(items)):
+                conn.execute(self._PRUNE, self._prune_params())
+
+    def size(self) -> int:
+        with self._engine.begin() as conn:
+            self._ensure_table(conn)
+            return conn.execute(text("SELECT COUNT(*) FROM embedding_cache")).scalar()
+
+    async def aget_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        if not keys:
+            return {}
+        async with self._async_engine.begin() as conn:
+            await self._aensure_table(conn)
+            rows = (await conn.execute(self._SELECT, self._select_params(keys))).all()
+        return {key: _decode(bytes(blob)) for key, blob in rows}
+
+    async def aset_many(self, items: Dict[str, List[float]]) -> None:
+        if not items:
+            return
+        async with self._async_engine.begin() as conn:
+            await self._aensure_table(conn)
+            await conn.execute(self._UPSERT, self._upsert_params(items))
+            if self._should_prune(len(items)):
+                await conn.execute(self._PRUNE, self._prune_params())
+
+    def close(self) -> None:
+        self._engine.dispose()
+        # Outside an event loop the async pool's connections can only be
+        # dropped, not closed; prefer ``aclose``.
+        self._async_engine.sync_engine.dispose(close=False)
+
+    async def aclose(self) -> None:
+        self._engine.dispose()
+        await self._async_engine.dispose()
+
+    def _ensure_table(self, conn: Any) -> None:
+        if not self._table_ready:
+            conn.execute(self._CREATE_TABLE)
+            conn.execute(self._CREATE_INDEX)
+            self._table_ready = True
+
+    async def _aensure_table(self, conn: Any) -> None:
+        if not self._table_ready:
+            await conn.execute(self._CREATE_TABLE)
+            await conn.execute(self._CREATE_INDEX)
+            self._table_ready = True
+
+    def _select_params(self, keys: Sequence[str]) -> Dict[str, Any]:
+        return {"keys": list(keys), "cutoff": time.time() - self.ttl_seconds}
+
+    def _upsert_params(self, items: Dict[str, List[float]]) -> List[Dict[str, Any]]:
+        now = time.time()
+        return [
+            {"key": key, "embedding": _encode(vector), "created_at": now}
+            for key, vector in items.items()
+        ]
+
+    def _should_prune(self, num_written: int) -> bool:
+        self._writes += num_written
+        if self._writes < self._PRUNE_EVERY:
+            return False
+        self._writes = 0
+        return True
+
+    def _prune_params(self) -> Dict[str, Any]:
+        return {
+            "cutoff": time.time() - self.ttl_seconds,
+            "max_entries": self.max_entries,
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper with an in-process LRU/TTL tier and an optional
+    persistent tier shared across workers and restarts."""
+
+    def __init__(
+        self,
+        underlying: Embeddings,
+        model_name: str,
+        memory: InMemoryEmbeddingCache,
+        backend: Optional[EmbeddingCacheBackend] = None,
+    ):
+        self.underlying = underlying
+        self.model_name = model_name
+        self.memory = memory
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._backend_hits = 0
+        self._misses = 0
+        self._errors = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [make_cache_key(self.model_name, t, "document") for t in texts]
+        found = self._lookup(keys)
+        missing = self._missing(texts, keys, found)
+        if missing:
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            self._store(dict(zip(missing, vectors)))
+            found.update(zip(missing, vectors))
+        return [found[k] for k in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = make_cache_key(self.model_name, text, "query")
+        found = self._lookup([key])
+        if key not in found:
+            found[key] = self.underlying.embed_query(text)
+            self._store({key: found[key]})
+        return found[key]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [make_cache_key(self.model_name, t, "document") for t in texts]
+        found = await self._alookup(keys)
+        missing = self._missing(texts, keys, found)
+        if missing:
+            vectors = await self.underlying.aembed_documents(list(missing.values()))
+            await self._astore(dict(zip(missing, vectors)))
+            found.update(zip(missing, vectors))
+        return [found[k] for k in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = make_cache_key(self.model_name, text, "query")
+        found = await self._alookup([key])
+        if key not in found:
+            found[key] = await self.underlying.aembed_query(text)
+            await self._astore({key: found[key]})
+        return found[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, backend_hits, misses = self._hits, self._backend_hits, self._misses
+            errors = self._errors
+        lookups = hits + misses
+        return {
+            "model_name": self.model_name,
+            "backend": self.backend.name if self.backend else self.memory.name,
+            "hits": hits,
+            "backend_hits": backend_hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "errors": errors,
+            "memory_entries": self.memory.size(),
+            "memory_max_entries": self.memory.max_entries,
+        }
+
+    def close(self) -> None:
+        if self.backend is not None:
+            self.backend.close()
+
+    async def aclose(self) -> None:
+        if self.backend is not None:
+            await self.backend.aclose()
+
+    @staticmethod
+    def _missing(
+        texts: List[str], keys: List[str], found: Dict[str, List[float]]
+    ) -> Dict[str, str]:
+        missing: Dict[str, str] = {}
+        for key, t in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = t
+        return missing
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = self.memory.get_many(keys)
+        backend_found: Dict[str, List[float]] = {}
+        if self.backend is not None and len(found) < len(set(keys)):
+            try:
+                backend_found = self.backend.get_many(
+                    [k for k in keys if k not in found]
+                )
+            except Exception as e:
+                self._backend_error("lookup", e)
+            self.memory.set_many(backend_found)
+            found.update(backend_found)
+        self._count(keys, found, backend_found)
+        return found
+
+    async def _alookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = await self.memory.aget_many(keys)
+        backend_found: Dict[str, List[float]] = {}
+        if self.backend is not None and len(found) < len(set(keys)):
+            try:
+                backend_found = await self.backend.aget_many(
+                    [k for k in keys if k not in found]
+                )
+            except Exception as e:
+                self._backend_error("lookup", e)
+            self.memory.set_many(backend_found)
+            found.update(backend_found)
+        self._count(keys, found, backend_found)
+        return found
+
+    def _store(self, items: Dict[str, List[float]]) -> None:
+        self.memory.set_many(items)
+        if self.backend is not None:
+            try:
+                self.backend.set_many(items)
+            except Exception as e:
+                self._backend_error("write", e)
+
+    async def _astore(self, items: Dict[str, List[float]]) -> None:
+        self.memory.set_many(items)
+        if self.backend is not None:
+            try:
+                await self.backend.aset_many(items)
+            except Exception as e:
+                self._backend_error("write", e)
+
+    def _backend_error(self, operation: str, error: Exception) -> None:
+        # The persistent tier is an optimization: a failing backend costs
+        # cache hits, not embedding requests.
+        logger.warning("Embedding cache %s failed: %s", operation, error)
+        with self._lock:
+            self._errors += 1
+
+    def _count(
+        self,
+        keys: List[str],
+        found: Dict[str, List[float]],
+        backend_found: Dict[str, List[float]],
+    ) -> None:
+        hits = sum(1 for k in keys if k in found)
+        with self._lock:
+            self._hits += hits
+            self._backend_hits += sum(1 for k in keys if k in backend_found)
+            self._misses += len(keys) - hits
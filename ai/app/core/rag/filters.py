@@ -0,0 +1,199 @@
+import asyncio
+import itertools
+import json
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+MetadataFilter = Dict[str, Any]
+
+_COMPARISONS = {
+    "$ne": "!=",
+    "$lt": "<",
+    "$lte": "<=",
+    "$gt": ">",
+    "$gte": ">=",
+}
+
+_indexes_ready: Set[str] = set()
+_indexes_lock = asyncio.Lock()
+
+
+class FilterCompiler:
+    """Compiles a PGVector-style metadata filter into a SQL predicate on
+    ``cmetadata``.
+
+    The operators match langchain_postgres (``$eq``, ``$ne``, ``$lt``, ``$lte``,
+    ``$gt``, ``$gte``, ``$in``, ``$nin``, ``$between``, ``$like``, ``$ilike``,
+    ``$exists``, ``$and``, ``$or``, ``$not``), but equality is written as
+    ``cmetadata @> {...}`` and ``$in`` as ``cmetadata->>'field' = ANY(...)`` so
+    the GIN and expression indexes can serve them. PGVector compiles both to
+    ``jsonb_path_match``, which no index supports.
+    """
+
+    def __init__(self, prefix: str = "f"):
+        self.params: Dict[str, Any] = {}
+        self._names: Iterator[str] = (f"{prefix}{i}" for i in itertools.count())
+
+    def compile(self, filter: MetadataFilter) -> str:
+        if not isinstance(filter, dict) or not filter:
+            raise ValueError(f"Expected a non-empty filter dict, got: {filter!r}")
+        clauses = []
+        for key, value in filter.items():
+            if key in ("$and", "$or"):
+                clauses.append(self._logical(key, value))
+            elif key == "$not":
+                clauses.append(f"NOT {self._group(value)}")
+            elif key.startswith("$"):
+                raise ValueError(f"Invalid filter: unexpected operator {key}")
+            else:
+                clauses.append(self._field(key, value))
+        return clauses[0] if len(clauses) == 1 else f"({' AND '.join(clauses)})"
+
+    def _logical(self, operator: str, value: Any) -> str:
+        if not isinstance(value, list) or not value:
+            raise ValueError(f"{operator} expects a non-empty list of filters")
+        joiner = " AND " if operator == "$and" else " OR "
+        return "(" + joiner.join(self.compile(item) for item in value) + ")"
+
+    def _group(self, value: Any) -> str:
+        if isinstance(value, list):
+            return self._logical("$and", value)
+        return f"({self.compile(value)})"
+
+    def _field(self, field: str, value: Any) -> str:
+        if not field.isidentifier():
+            raise ValueError(f"Invalid field name: {field}")
+        if isinstance(value, dict):
+            if len(value) != 1:
+                raise ValueError(
+                    f"Filter for '{field}' must have exactly one operator, "
+                    f"got {list(value)}"
+                )
+            operator, operand = next(iter(value.items()))
+        else:
+            operator, operand = "$eq", value
+
+        if operator == "$eq":
+            param = self._bind(json.dumps({field: operand}))
+            return f"cmetadata @> CAST(:{param} AS jsonb)"
+        if operator in _COMPARISONS:
+            return self._path_match(field, _COMPARISONS[operator], operand)
+        if operator == "$between":
+            low, high = operand
+            return (
+                f"({self._path_match(field, '>=', low)} "
+                f"AND {self._path_match(field, '<=', high)})"
+            )
+        if operator in ("$in", "$nin"):
+            values = self._scalars(operator, operand)
+            clause = f"cmetadata->>'{field}' = ANY(:{self._bind(values)})"
+            return clause if operator == "$in" else f"NOT ({clause})"
+        if operator in ("$like", "$ilike"):
+            keyword = "LIKE" if operator == "$like" else "ILIKE"
+            return f"cmetadata->>'{field}' {keyword} :{self._bind(str(operand))}"
+        if operator == "$exists":
+            if not isinstance(operand, bool):
+                raise ValueError("$exists expects a boolean")
+            clause = f"jsonb_exists(cmetadata, :{self._bind(field)})"
+            return clause if operand else f"NOT {clause}"
+        raise ValueError(f"Unsupported filter operator: {operator}")
+
+    def _path_match(self, field: str, native: str, operand: Any) -> str:
+        param = self._bind(json.dumps({"value": operand}))
+        return (
+            f"jsonb_path_match(cmetadata, "
+            f"CAST('$.{field} {native} $value' AS jsonpath), CAST(:{param} AS jsonb))"
+        )
+
+    @staticmethod
+    def _scalars(operator: str, operand: Any) -> List[str]:
+        if not isinstance(operand, (list, tuple)):
+            raise ValueError(f"{operator} expects a list")
+        for value in operand:
+            if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+                raise ValueError(f"Unsupported {operator} value: {value!r}")
+        return [str(value) for value in operand]
+
+    def _bind(self, value: Any) -> str:
+        name = next(self._names)
+        self.params[name] = value
+        return name
+
+
+def compile_metadata_filter(
+    filter: MetadataFilter, prefix: str = "f"
+) -> Tuple[str, Dict[str, Any]]:
+    compiler = FilterCompiler(prefix)
+    return compiler.compile(filter), compiler.params
+
+
+def metadata_index_ddl(fields: Sequence[str]) -> List[Tuple[str, str]]:
+    """``(index name, CREATE INDEX statement)`` pairs."""
+    statements = [
+        # langchain_postgres declares this one too, but only creates it when it
+        # creates the table.
+        (
+            "ix_cmetadata_gin",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_cmetadata_gin "
+            "ON langchain_pg_embedding USING gin (cmetadata jsonb_path_ops)",
+        )
+    ]
+    for field in fields:
+        if not field.isidentifier():
+            raise ValueError(f"Invalid metadata field: {field}")
+        name = f"ix_emb_meta_{field.lower()}"
+        statements.append(
+            (
+                name,
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                f"ON langchain_pg_embedding (collection_id, (cmetadata->>'{field}'))",
+            )
+        )
+    return statements
+
+
+_INDEX_VALID = text(
+    "SELECT i.indisvalid FROM pg_index i "
+    "JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"
+)
+
+
+async def aindex_valid(conn: AsyncConnection, name: str) -> Optional[bool]:
+    """Whether index ``name`` is usable; ``None`` if it does not exist."""
+    return (await conn.execute(_INDEX_VALID, {"name": name})).scalar()
+
+
+async def acreate_indexes(
+    engine: AsyncEngine, statements: Sequence[Tuple[str, str]]
+) -> None:
+    """Run ``CREATE INDEX CONCURRENTLY`` statements, skipping valid indexes.
+
+    A concurrent build that fails or is cancelled leaves an INVALID index that
+    ``IF NOT EXISTS`` would skip forever, so one is dropped and rebuilt.
+    """
+    async with engine.execution_options(isolation_level="AUTOCOMMIT").connect() as conn:
+        for name, statement in statements:
+            valid = await aindex_valid(conn, name)
+            if valid:
+                continue
+            if valid is not None:
+                await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+            await conn.execute(text(statement))
+
+
+async def aensure_metadata_indexes(engine: AsyncEngine, fields: Sequence[str]) -> None:
+    """Create the metadata indexes once per database.
+
+    Builds can take minutes on a large table, so this runs at startup or from
+    ``POST /rag/search-indexes``, never on the search path.
+    """
+    key = str(engine.url)
+    if key in _indexes_ready:
+        return
+    async with _indexes_lock:
+        if key in _indexes_ready:
+            return
+        await acreate_indexes(engine, metadata_index_ddl(fields))
+        _indexes_ready.add(key)
@@ -0,0 +1,414 @@
+import asyncio
+import logging
+import math
+import re
+import time
+from dataclasses import asdict, dataclass, field, replace
+from datetime import datetime, timezone
+from typing import Dict, List, Literal, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+IndexMethod = Literal["hnsw", "ivfflat"]
+IndexStatus = Literal["building", "ready", "failed"]
+# What the index stores per row: full vectors, half-precision vectors, or one
+# bit per dimension searched by Hamming distance and re-scored exactly.
+Quantization = Literal["none", "halfvec", "binary"]
+
+_OPERATOR_CLASSES = {
+    "none": "vector_cosine_ops",
+    "halfvec": "halfvec_cosine_ops",
+    "binary": "bit_hamming_ops",
+}
+_NAME_PARTS = {"none": "", "halfvec": "_hv", "binary": "_bq"}
+
+
+class VectorIndexError(Exception):
+    """Base exception for vector index management."""
+
+    pass
+
+
+class IndexBuildInProgressError(VectorIndexError):
+    """Raised when a build is requested while one is already running."""
+
+    pass
+
+
+class CollectionNotFoundError(VectorIndexError):
+    """Raised when indexing a collection that does not exist."""
+
+    pass
+
+
+@dataclass
+class VectorIndexConfig:
+    collection_name: str
+    method: IndexMethod = "hnsw"
+    m: int = 16
+    ef_construction: int = 64
+    lists: Optional[int] = None
+    ef_search: int = 40
+    probes: int = 10
+    quantization: Quantization = "none"
+    # Binary mode: Hamming-distance candidates fetched per requested result.
+    rescore: int = 10
+    index_name: Optional[str] = None
+    collection_id: Optional[str] = None
+    status: IndexStatus = "building"
+    error: Optional[str] = None
+    updated_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+    @property
+    def ready(self) -> bool:
+        # While a rebuild runs (or after it fails) the previous index serves.
+        return self.index_name is not None
+
+
+_CREATE_TABLE = text(
+    "CREATE TABLE IF NOT EXISTS rag_vector_index ("
+    "collection_name TEXT PRIMARY KEY, method TEXT NOT NULL, "
+    "m INTEGER NOT NULL, ef_construction INTEGER NOT NULL, lists INTEGER, "
+    "ef_search INTEGER NOT NULL, probes INTEGER NOT NULL, "
+    "quantization TEXT NOT NULL DEFAULT 'none', "
+    "rescore INTEGER NOT NULL DEFAULT 10, index_name TEXT, "
+    "collection_id TEXT, status TEXT NOT NULL, error TEXT, "
+    "updated_at TIMESTAMPTZ NOT NULL)"
+)
+# Tables created before indexes could be quantized lack these columns.
+_MIGRATE_TABLE = (
+    text(
+        "ALTER TABLE rag_vector_index ADD COLUMN IF NOT EXISTS "
+        "quantization TEXT NOT NULL DEFAULT 'none'"
+    ),
+    text(
+        "ALTER TABLE rag_vector_index ADD COLUMN IF NOT EXISTS "
+        "rescore INTEGER NOT NULL DEFAULT 10"
+    ),
+)
+_SELECT = text(
+    "SELECT collection_name, method, m, ef_construction, lists, ef_search, "
+    "probes, quantization, rescore, index_name, collection_id, status, error, "
+    "updated_at "
+    "FROM rag_vector_index "
+    "WHERE collection_name = :collection_name"
+)
+_UPSERT = text(
+    "INSERT INTO rag_vector_index (collection_name, method, m, ef_construction, "
+    "lists, ef_search, probes, quantization, rescore, index_name, collection_id, "
+    "status, error, updated_at) VALUES (:collection_name, :method, :m, "
+    ":ef_construction, :lists, :ef_search, :probes, :quantization, :rescore, "
+    ":index_name, :collection_id, :status, :error, :updated_at) "
+    "ON CONFLICT (collection_name) DO UPDATE SET method = EXCLUDED.method, "
+    "m = EXCLUDED.m, ef_construction = EXCLUDED.ef_construction, "
+    "lists = EXCLUDED.lists, ef_search = EXCLUDED.ef_search, "
+    "probes = EXCLUDED.probes, quantization = EXCLUDED.quantization, "
+    "rescore = EXCLUDED.rescore, index_name = EXCLUDED.index_name, "
+    "collection_id = EXCLUDED.collection_id, status = EXCLUDED.status, "
+    "error = EXCLUDED.error, "
+    "updated_at = EXCLUDED.updated_at"
+)
+_DELETE = text("DELETE FROM rag_vector_index WHERE collection_name = :collection_name")
+_COLLECTION = text("SELECT uuid FROM langchain_pg_collection WHERE name = :name")
+_PGVECTOR_VERSION = text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+_COUNT = text("SELECT count(*) FROM langchain_pg_embedding WHERE collection_id = :id")
+
+
+def vector_expression(dimensions: int, quantization: Quantization = "none") -> str:
+    """The indexed expression. langchain_pg_embedding.embedding has no declared
+    dimensions, which pgvector indexes require, so queries must use the same
+    cast for the planner to pick the index."""
+    dimensions = int(dimensions)
+    if quantization == "halfvec":
+        return f"(embedding::halfvec({dimensions}))"
+    if quantization == "binary":
+        return f"(binary_quantize(embedding)::bit({dimensions}))"
+    return f"(embedding::vector({dimensions}))"
+
+
+def query_expression(dimensions: int, quantization: Quantization = "none") -> str:
+    """The ``:query`` parameter cast to match ``vector_expression``."""
+    dimensions = int(dimensions)
+    if quantization == "halfvec":
+        return f"CAST(:query AS halfvec({dimensions}))"
+    if quantization == "binary":
+        return (
+            f"binary_quantize(CAST(:query AS vector({dimensions})))::bit({dimensions})"
+        )
+    return f"CAST(:query AS vector({dimensions}))"
+
+
+def distance_operator(quantization: Quantization = "none") -> str:
+    return "<~>" if quantization == "binary" else "<=>"
+
+
+def default_lists(num_rows: int) -> int:
+    # pgvector guidance: rows / 1000 up to 1M rows, sqrt(rows) beyond.
+    if num_rows <= 1_000_000:
+        return max(1, num_rows // 1000)
+    return int(math.sqrt(num_rows))
+
+
+class VectorIndexManager:
+    """Builds and tracks one ANN index per collection.
+
+    Indexes are partial (``WHERE collection_id = ...``) so each collection gets
+    a compact graph of its own rows, and are built with CREATE INDEX
+    CONCURRENTLY so ingestion and search keep running. A rebuild creates the
+    new index before dropping the old one. Configs are cached in-process for
+    ``cache_ttl`` seconds to keep the lookup off the query path.
+    """
+
+    def __init__(
+        self, engine: AsyncEngine, dimensions: int = 1536, cache_ttl: float = 60.0
+    ):
+        self.engine = engine
+        self.dimensions = dimensions
+        self.cache_ttl = cache_ttl
+        self._cache: Dict[str, tuple[float, Optional[VectorIndexConfig]]] = {}
+        self._builds: Dict[str, asyncio.Task] = {}
+        # Serializes "is there an index?" checks with starting a build.
+        self._start_lock = asyncio.Lock()
+        self._pgvector_version: Optional[Tuple[int, ...]] = None
+        self._table_ready = False
+
+    async def aget(self, collection_name: str) -> Optional[VectorIndexConfig]:
+        cached = self._cache.get(collection_name)
+        if cached is not None and time.monotonic() - cached[0] < self.cache_ttl:
+            return cached[1]
+        async with self.engine.begin() as conn:
+            await self._ensure_table(conn)
+            row = (
+                await conn.execute(_SELECT, {"collection_name": collection_name})
+            ).first()
+        config = VectorIndexConfig(**row._mapping) if row is not None else None
+        self._cache[collection_name] = (time.monotonic(), config)
+        return config
+
+    def building(self, collection_name: str) -> bool:
+        task = self._builds.get(collection_name)
+        return task is not None and not task.done()
+
+    async def astart_build(self, config: VectorIndexConfig) -> VectorIndexConfig:
+        """Schedule a (re)build in the background and return immediately."""
+        async with self._start_lock:
+            await self._collection_id(config.collection_name)
+            if self.building(config.collection_name):
+                raise IndexBuildInProgressError(
+                    f"An index build for '{config.collection_name}' is already "
+                    "running."
+                )
+            return self._start(config)
+
+    async def aensure(
+        self, config: VectorIndexConfig, ivfflat_min_rows: int = 0
+    ) -> Optional[VectorIndexConfig]:
+        """Start building ``config`` unless the collection already has an index
+        or a build running; concurrent callers start at most one build.
+
+        IVFFlat centroids are computed from the rows present at build time, so
+        an IVFFlat index without explicit ``lists`` waits until the collection
+        has ``ivfflat_min_rows`` rows.
+        """
+        async with self._start_lock:
+            name = config.collection_name
+            if self.building(name) or await self.aget(name) is not None:
+                return None
+            collection_id = await self._collection_id(name)
+            if config.method == "ivfflat" and config.lists is None:
+                async with self.engine.connect() as conn:
+                    rows = (await conn.execute(_COUNT, {"id": collection_id})).scalar()
+                if (rows or 0) < ivfflat_min_rows:
+                    return None
+            return self._start(config)
+
+    def _start(self, config: VectorIndexConfig) -> VectorIndexConfig:
+        config.status = "building"
+        config.error = None
+        self._builds[config.collection_name] = asyncio.create_task(
+            self._build_in_background(config),
+            name=f"vector-index-{config.collection_name}",
+        )
+        return config
+
+    async def _build_in_background(self, config: VectorIndexConfig) -> None:
+        try:
+            await self.abuild(config)
+        except VectorIndexError:
+            pass  # Already logged and recorded on the config.
+
+    async def abuild(self, config: VectorIndexConfig) -> VectorIndexConfig:
+        collection_id = await self._collection_id(config.collection_name)
+        previous = await self.aget(config.collection_name)
+        old_index = previous.index_name if previous else None
+        config.index_name = old_index
+        config.collection_id = collection_id
+        config.status = "building"
+        config.error = None
+        # Searches read the method, quantization and rescore of the saved
+        # config, so it must describe the serving index until the new one is
+        # live: keep saving the old config meanwhile and after a failure.
+        if old_index:
+            serving = replace(previous, status="building", error=None)
+        else:
+            serving = config
+        await self._save(serving)
+
+        new_index = self._index_name(config.method, collection_id, config.quantization)
+        try:
+            if config.method == "ivfflat" and config.lists is None:
+                async with self.engine.connect() as conn:
+                    rows = (await conn.execute(_COUNT, {"id": collection_id})).scalar()
+                config.lists = default_lists(rows or 0)
+            async with self._autocommit() as conn:
+                await conn.execute(
+                    text(self._create_sql(config, new_index, collection_id))
+                )
+        except Exception as e:
+            logger.exception("Building %s failed", new_index)
+            # A failed concurrent build leaves an INVALID index behind.
+            async with self._autocommit() as conn:
+                await conn.execute(
+                    text(f'DROP INDEX CONCURRENTLY IF EXISTS "{new_index}"')
+                )
+            config.status = serving.status = "failed"
+            config.error = serving.error = str(e)
+            await self._save(serving)
+            raise VectorIndexError(f"Failed to build {new_index}: {e}") from e
+
+        config.index_name = new_index
+        config.status = "ready"
+        await self._save(config)
+        # Only drop the old index once searches have switched to the new one.
+        if old_index and old_index != new_index:
+            try:
+                async with self._autocommit() as conn:
+                    await conn.execute(
+                        text(f'DROP INDEX CONCURRENTLY IF EXISTS "{old_index}"')
+                    )
+            except Exception:
+                logger.exception("Dropping the replaced index %s failed", old_index)
+        return config
+
+    async def adrop(self, collection_name: str) -> bool:
+        config = await self.aget(collection_name)
+        if config is None:
+            return False
+        async with self._autocommit() as conn:
+            if config.index_name:
+                await conn.execute(
+                    text(f'DROP INDEX CONCURRENTLY IF EXISTS "{config.index_name}"')
+                )
+            await conn.execute(_DELETE, {"collection_name": collection_name})
+        self._cache.pop(collection_name, None)
+        return True
+
+    def search_settings(
+        self,
+        config: VectorIndexConfig,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        iterative_scan: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[str]:
+        """``SET LOCAL`` statements tuning the scan for one query.
+
+        ``iterative_scan`` (pgvector >= 0.8) keeps scanning the index until
+        enough rows pass a metadata filter instead of returning fewer than k.
+        An HNSW scan returns at most ef_search rows, so it is raised to
+        ``limit`` (up to pgvector's maximum of 1000).
+        """
+        if config.method == "hnsw":
+            ef_search = max(int(ef_search or config.ef_search), min(limit or 0, 1000))
+            statements = [f"SET LOCAL hnsw.ef_search = {ef_search}"]
+        else:
+            statements = [f"SET LOCAL ivfflat.probes = {int(probes or config.probes)}"]
+        if iterative_scan:
+            if iterative_scan not in ("relaxed_order", "strict_order"):
+                raise ValueError(f"Invalid iterative scan mode: {iterative_scan}")
+            if config.method == "ivfflat":
+                iterative_scan = "relaxed_order"  # the only mode IVFFlat has
+            statements.append(
+                f"SET LOCAL {config.method}.iterative_scan = {iterative_scan}"
+            )
+        return statements
+
+    async def aiterative_scan(self, mode: Optional[str]) -> Optional[str]:
+        """Resolve an iterative scan setting; ``"auto"`` is ``relaxed_order``
+        when the server's pgvector supports iterative scans (0.8+)."""
+        if mode != "auto":
+            return mode
+        if self._pgvector_version is None:
+            async with self.engine.connect() as conn:
+                version = (await conn.execute(_PGVECTOR_VERSION)).scalar() or "0"
+            self._pgvector_version = tuple(
+                int(part) for part in re.findall(r"\d+", version)
+            )
+        return "relaxed_order" if self._pgvector_version >= (0, 8) else None
+
+    async def astop(self) -> None:
+        for task in self._builds.values():
+            task.cancel()
+        await asyncio.gather(*self._builds.values(), return_exceptions=True)
+        self._builds.clear()
+
+    def _create_sql(
+        self, config: VectorIndexConfig, index_name: str, collection_id: str
+    ) -> str:
+        if config.method == "hnsw":
+            using = "hnsw"
+            options = (
+                f"m = {int(config.m)}, ef_construction = {int(config.ef_construction)}"
+            )
+        else:
+            using = "ivfflat"
+            options = f"lists = {int(config.lists or 1)}"
+        expression = vector_expression(self.dimensions, config.quantization)
+        return (
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{index_name}" '
+            f"ON langchain_pg_embedding USING {using} "
+            f"({expression} {_OPERATOR_CLASSES[config.quantization]}) "
+            f"WITH ({options}) WHERE collection_id = '{collection_id}'::uuid"
+        )
+
+    @staticmethod
+    def _index_name(
+        method: IndexMethod, collection_id: str, quantization: Quantization = "none"
+    ) -> str:
+        suffix = format(int(time.time()), "x")
+        return (
+            f"ix_emb_{method}{_NAME_PARTS[quantization]}_"
+            f"{collection_id.replace('-', '')[:16]}_{suffix}"
+        )
+
+    async def _collection_id(self, collection_name: str) -> str:
+        async with self.engine.connect() as conn:
+            collection_id = (
+                await conn.execute(_COLLECTION, {"name": collection_name})
+            ).scalar()
+        if collection_id is None:
+            raise CollectionNotFoundError(
+                f"Collection '{collection_name}' does not exist."
+            )
+        return str(collection_id)
+
+    async def _save(self, config: VectorIndexConfig) -> None:
+        config.updated_at = datetime.now(timezone.utc)
+        async with self.engine.begin() as conn:
+            await self._ensure_table(conn)
+            await conn.execute(_UPSERT, asdict(config))
+        self._cache[config.collection_name] = (time.monotonic(), config)
+
+    def _autocommit(self):
+        # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction.
+        return self.engine.execution_options(isolation_level="AUTOCOMMIT").connect()
+
+    async def _ensure_table(self, conn: AsyncConnection) -> None:
+        if not self._table_ready:
+            await conn.execute(_CREATE_TABLE)
+            for statement in _MIGRATE_TABLE:
+                await conn.execute(statement)
+            self._table_ready = True
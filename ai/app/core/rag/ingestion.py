@@ -0,0 +1,409 @@
+import hashlib
+import os
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Literal, Optional
+
+from fastapi import UploadFile
+from langchain_core.documents import Document
+from starlette.concurrency import run_in_threadpool
+
+from ..config import settings
+from ..metrics import observe_ingestion
+from ..response_cache import invalidate_response_cache
+from .chunker import chunk_document, resolve_chunking
+from .dependencies import get_parse_result_cache, get_rag
+from .parse_cache import DocumentLayout
+from .parsers import get_parser_engine
+from .parsers.base import count_pages, iter_page_ranges
+from .parsers.factory import ParserStrategy
+from .writer import PartialWriteError, WriteProgress
+
+StageName = Literal["parse", "chunk", "embed_store"]
+StageState = Literal[
+    "pending", "running", "completed", "skipped", "failed", "cancelled"
+]
+
+STAGES: tuple[StageName, ...] = ("parse", "chunk", "embed_store")
+
+
+class IngestionError(Exception):
+    """Base exception for ingestion pipeline failures."""
+
+    pass
+
+
+class EmptyDocumentError(IngestionError):
+    """Raised when parsing yields no chunks to index."""
+
+    pass
+
+
+class UploadTooLargeError(IngestionError):
+    """Raised when an upload exceeds the configured size limit."""
+
+    pass
+
+
+class ParseCacheMissError(IngestionError):
+    """Raised when re-chunking without the file and its parse is not cached."""
+
+    pass
+
+
+async def save_upload(
+    file: UploadFile,
+    suffix: str = ".pdf",
+    max_bytes: Optional[int] = None,
+    block_size: Optional[int] = None,
+) -> str:
+    if max_bytes is None:
+        max_bytes = settings.UPLOAD_MAX_BYTES
+    block_size = block_size or settings.UPLOAD_BLOCK_BYTES
+    written = 0
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        try:
+            while block := await file.read(block_size):
+                written += len(block)
+                if written > max_bytes:
+                    raise UploadTooLargeError(
+                        f"Upload exceeds the {max_bytes} byte limit."
+                    )
+                tmp.write(block)
+        except BaseException:
+            tmp.close()
+            os.unlink(tmp.name)
+            raise
+        return tmp.name
+
+
+@dataclass
+class StageProgress:
+    status: StageState = "pending"
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    duration_seconds: Optional[float] = None
+
+
+@dataclass
+class IngestionTracker:
+    stages: Dict[StageName, StageProgress] = field(
+        default_factory=lambda: {name: StageProgress() for name in STAGES}
+    )
+    pages_total: Optional[int] = None
+    pages_done: int = 0
+    chunks: WriteProgress = field(default_factory=WriteProgress)
+
+    @contextmanager
+    def stage(self, name: StageName) -> Iterator[StageProgress]:
+        """Time one pass through a stage; repeated passes (one per page
+        window) accumulate into the same StageProgress."""
+        progress = self.stages[name]
+        progress.status = "running"
+        progress.started_at = progress.started_at or datetime.now(timezone.utc)
+        t0 = time.perf_counter()
+        try:
+            yield progress
+        except BaseException as e:
+            progress.status = "failed" if isinstance(e, Exception) else "cancelled"
+            raise
+        else:
+            progress.status = "completed"
+        finally:
+            progress.finished_at = datetime.now(timezone.utc)
+            progress.duration_seconds = (progress.duration_seconds or 0.0) + (
+                time.perf_counter() - t0
+            )
+
+    def window_progress(self) -> Callable[[WriteProgress], None]:
+        """Return a writer callback that adds one window's progress on top of
+        the totals from previous windows."""
+        base = WriteProgress(**vars(self.chunks))
+
+        def update(progress: WriteProgress) -> None:
+            for name in ("total", "skipped", "embedded", "stored", "failed"):
+                setattr(
+                    self.chunks, name, getattr(base, name) + getattr(progress, name)
+                )
+            self.chunks.throttled = progress.throttled
+            self.chunks.concurrency = progress.concurrency
+
+        return update
+
+    def cancel_pending(self) -> None:
+        self._mark_pending("cancelled")
+
+    def skip_pending(self) -> None:
+        self._mark_pending("skipped")
+
+    def _mark_pending(self, status: StageState) -> None:
+        for progress in self.stages.values():
+            if progress.status == "pending":
+                progress.status = status
+
+
+@dataclass
+class IngestionResult:
+    vector_index: str
+    document_ids: List[str]
+    num_chunks: int
+    reused: int = 0
+    added: int = 0
+    deleted: int = 0
+    unchanged: bool = False
+
+
+def file_sha256(path: str, block_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_id(vector_index: str, source: str, chunk_hash: str, occurrence: int) -> str:
+    """Deterministic chunk id: the same text in the same file and collection
+    always maps to the same row, wherever it moves within the document."""
+    key = f"{vector_index}\x00{source}\x00{chunk_hash}\x00{occurrence}"
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, key))
+
+
+async def iter_chunk_windows(
+    pdf_path: Optional[str],
+    filename: str,
+    vector_index: str,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None,
+    parser_strategy: ParserStrategy = "speed",
+    tracker: Optional[IngestionTracker] = None,
+    page_window: Optional[int] = None,
+    metadata: Optional[Dict] = None,
+    document_hash: Optional[str] = None,
+) -> AsyncIterator[List[Document]]:
+    """Parse and chunk the PDF one page window at a time so peak memory is
+    bounded by the window rather than the whole document.
+
+    With ``document_hash`` parsed windows are read from and written to the
+    parse result cache; without ``pdf_path`` every window must be cached.
+    """
+    tracker = tracker or IngestionTracker()
+    window = settings.PARSE_PAGE_WINDOW if page_window is None else page_window
+    engine = get_parser_engine()
+    cache = get_parse_result_cache() if document_hash else None
+
+    with tracker.stage("parse"):
+        layout = None
+        if cache is not None:
+            layout = await cache.aget_layout(document_hash, parser_strategy)
+        if layout is None and pdf_path is None:
+            raise ParseCacheMissError(
+                f"'{filename}' is not in the parse cache; upload the file again."
+            )
+        if layout is None:
+            pages = await run_in_threadpool(count_pages, pdf_path)
+            windows = list(iter_page_ranges(pages, window))
+        else:
+            pages, windows = layout.pages, layout.windows
+        tracker.pages_total = pages
+
+    next_index = 0
+    for page_range in windows:
+        whole_document = page_range == (0, tracker.pages_total)
+        with tracker.stage("parse"):
+            parsed = None
+            if cache is not None:
+                parsed = await cache.aget(document_hash, parser_strategy, page_range)
+            if parsed is None:
+                if pdf_path is None:
+                    raise ParseCacheMissError(
+                        f"Pages {page_range[0] + 1}-{page_range[1]} of "
+                        f"'{filename}' are not in the parse cache."
+                    )
+                parsed = await engine.parse(
+                    parser_strategy,
+                    pdf_path,
+                    page_range=None if whole_document else page_range,
+                )
+                if cache is not None:
+                    await cache.aset(document_hash, parser_strategy, page_range, parsed)
+            raw_corpus, fmt, images = parsed
+            del parsed
+
+        with tracker.stage("chunk"):
+            chunks = await run_in_threadpool(
+                chunk_document,
+                text=raw_corpus,
+                metadata={
+                    **(metadata or {}),
+                    "source": filename,
+                    "vector_index": vector_index,
+                },
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                start_index=next_index,
+                page_offset=page_range[0],
+            )
+        del raw_corpus, images
+
+        tracker.pages_done = page_range[1]
+        if chunks:
+            next_index += len(chunks)
+            yield chunks
+
+    if cache is not None and layout is None:
+        await cache.aset_layout(
+            document_hash, parser_strategy, DocumentLayout(pages, windows)
+        )
+
+
+def _observe(
+    tracker: IngestionTracker,
+    parser_strategy: str,
+    result: IngestionResult,
+    t_start: float,
+) -> None:
+    timings = {
+        name: progress.duration_seconds
+        for name, progress in tracker.stages.items()
+        if progress.duration_seconds is not None
+    }
+    timings["total"] = time.perf_counter() - t_start
+    observe_ingestion(
+        parser_strategy,
+        result.vector_index,
+        timings,
+        pages=tracker.pages_done,
+        added=result.added,
+        reused=result.reused,
+    )
+
+
+async def ingest_pdf(
+    pdf_path: Optional[str],
+    filename: str,
+    vector_index: str,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None,
+    parser_strategy: ParserStrategy = "speed",
+    tracker: Optional[IngestionTracker] = None,
+    rollback_on_error: bool = True,
+    document_hash: Optional[str] = None,
+) -> IngestionResult:
+    """Parse, chunk, embed and store a PDF, reusing what is already indexed.
+
+    A file whose content and chunking settings match the last completed
+    ingestion of ``filename`` is skipped before parsing. Otherwise chunks get
+    content-derived ids: unchanged chunks are kept (only their metadata is
+    refreshed), new ones are embedded and chunks no longer produced are
+    deleted once the new version is fully stored. Because ids are
+    deterministic, re-running a failed ingestion only writes what is missing.
+    With ``rollback_on_error`` the chunks added by a failed run are deleted.
+
+    Without ``pdf_path`` the document is re-chunked from the parse result
+    cache, identified by ``document_hash``.
+    """
+    t_start = time.perf_counter()
+    tracker = tracker or IngestionTracker()
+    rag = get_rag()
+    await rag.ainit_db(collection_name=vector_index)
+
+    if pdf_path is not None:
+        document_hash = await run_in_threadpool(file_sha256, pdf_path)
+    elif document_hash is None:
+        raise ValueError("Either pdf_path or document_hash is required.")
+    chunker, chunk_size, chunk_overlap = resolve_chunking(chunk_size, chunk_overlap)
+    chunking = f"{parser_strategy}:{chunker}:{chunk_size}:{chunk_overlap}"
+    previous = await rag.afind_documents({"source": filename})
+    manifest = await rag.aget_manifest(filename)
+    if (
+        manifest is not None
+        and manifest.document_hash == document_hash
+        and manifest.chunking == chunking
+        and manifest.num_chunks == len(previous)
+        and all(m.get("document_hash") == document_hash for m in previous.values())
+    ):
+        tracker.skip_pending()
+        ingested = IngestionResult(
+            vector_index=vector_index,
+            document_ids=list(previous),
+            num_chunks=len(previous),
+            reused=len(previous),
+            unchanged=True,
+        )
+        _observe(tracker, parser_strategy, ingested, t_start)
+        return ingested
+
+    doc_ids: List[str] = []
+    failed_ids: List[str] = []
+    occurrences: Dict[str, int] = {}
+    try:
+        async for chunks in iter_chunk_windows(
+            pdf_path=pdf_path,
+            filename=filename,
+            vector_index=vector_index,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            parser_strategy=parser_strategy,
+            tracker=tracker,
+            metadata={"document_hash": document_hash},
+            document_hash=document_hash,
+        ):
+            ids = []
+            for chunk in chunks:
+                digest = chunk.metadata["chunk_hash"]
+                occurrence = occurrences.get(digest, 0)
+                occurrences[digest] = occurrence + 1
+                ids.append(chunk_id(vector_index, filename, digest, occurrence))
+            try:
+                with tracker.stage("embed_store"):
+                    result = await rag.awrite_documents(
+                        chunks, ids, on_progress=tracker.window_progress()
+                    )
+                doc_ids.extend(result.ids)
+            except PartialWriteError as e:
+                # Keep going so one bad window does not waste the whole parse.
+                doc_ids.extend(e.stored_ids)
+                failed_ids.extend(e.failed_ids)
+
+        if failed_ids:
+            tracker.stages["embed_store"].status = "failed"
+            raise PartialWriteError(
+                f"{len(failed_ids)} chunks could not be written.",
+                stored_ids=doc_ids,
+                failed_ids=failed_ids,
+            )
+    except BaseException:
+        added = [i for i in doc_ids if i not in previous]
+        if rollback_on_error and added:
+            await rag.adelete(added)
+        if added:
+            invalidate_response_cache(vector_index)
+        raise
+
+    if not doc_ids:
+        raise EmptyDocumentError("No content extracted from the PDF.")
+
+    current = set(doc_ids)
+    stale = [i for i in previous if i not in current]
+    if stale:
+        await rag.adelete(stale)
+    await rag.aset_manifest(filename, document_hash, chunking, len(doc_ids))
+    await rag.aensure_index()
+
+    reused = sum(1 for i in doc_ids if i in previous)
+    if stale or reused < len(doc_ids):
+        invalidate_response_cache(vector_index)
+    ingested = IngestionResult(
+        vector_index=vector_index,
+        document_ids=doc_ids,
+        num_chunks=len(doc_ids),
+        reused=reused,
+        added=len(doc_ids) - reused,
+        deleted=len(stale),
+    )
+    _observe(tracker, parser_strategy, ingested, t_start)
+    return ingested
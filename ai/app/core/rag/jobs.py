@@ -0,0 +1,265 @@
+import asyncio
+import logging
+import os
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, List, Literal, Mapping, Optional
+
+from ..config import settings
+from .ingestion import IngestionTracker, ingest_pdf
+from .parsers.factory import ParserStrategy
+from .writer import PartialWriteError
+
+logger = logging.getLogger(__name__)
+
+JobStatus = Literal["queued", "running", "completed", "failed", "cancelled"]
+
+
+class JobError(Exception):
+    """Base exception for background ingestion jobs."""
+
+    pass
+
+
+class JobQueueFullError(JobError):
+    """Raised when the ingestion queue cannot accept more jobs."""
+
+    pass
+
+
+class JobNotFoundError(JobError):
+    """Raised when a job id is unknown or has expired."""
+
+    pass
+
+
+class JobNotRetryableError(JobError):
+    """Raised when a job cannot be retried."""
+
+    pass
+
+
+@dataclass
+class IngestionJob:
+    pdf_path: str
+    filename: str
+    vector_index: str
+    chunk_size: Optional[int]
+    chunk_overlap: Optional[int]
+    parser_strategy: ParserStrategy
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: JobStatus = "queued"
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    tracker: IngestionTracker = field(default_factory=IngestionTracker)
+    document_ids: List[str] = field(default_factory=list)
+    num_chunks: Optional[int] = None
+    reused: int = 0
+    added: int = 0
+    deleted: int = 0
+    unchanged: bool = False
+    error: Optional[str] = None
+    attempts: int = 0
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+
+class IngestionJobManager:
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_queue_size: int = 100,
+        strategy_limits: Optional[Mapping[str, int]] = None,
+        retention_seconds: float = 3600.0,
+    ):
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.retention = timedelta(seconds=retention_seconds)
+        self._strategy_limits = dict(strategy_limits or {})
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._jobs: Dict[str, IngestionJob] = {}
+        self._queue: Optional[asyncio.Queue[IngestionJob]] = None
+        self._workers: List[asyncio.Task] = []
+
+    def submit(self, job: IngestionJob) -> IngestionJob:
+        self._ensure_started()
+        self._prune()
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFullError(
+                f"Ingestion queue is full ({self.max_queue_size} jobs pending)."
+            )
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> IngestionJob:
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise JobNotFoundError(f"Job '{job_id}' not found.")
+        return job
+
+    def cancel(self, job_id: str) -> IngestionJob:
+        job = self.get(job_id)
+        if job.done:
+            return job
+        if job.task is not None:
+            job.task.cancel()
+        else:
+            self._finish(job, "cancelled")
+        return job
+
+    def retry(self, job_id: str) -> IngestionJob:
+        """Re-queue a failed job. Chunk ids are derived from content, so
+        chunks stored by the previous attempt are not embedded again."""
+        job = self.get(job_id)
+        if job.status != "failed":
+            raise JobNotRetryableError(
+                f"Job '{job_id}' is {job.status}; only failed jobs can be retried."
+            )
+        if not os.path.exists(job.pdf_path):
+            raise JobNotRetryableError(f"The upload for job '{job_id}' is gone.")
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFullError(
+                f"Ingestion queue is full ({self.max_queue_size} jobs pending)."
+            )
+        job.status = "queued"
+        job.error = None
+        job.started_at = job.finished_at = None
+        job.tracker = IngestionTracker()
+        return job
+
+    def stats(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "workers": len(self._workers),
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_queue_size": self.max_queue_size,
+            **counts,
+        }
+
+    async def stop(self) -> None:
+        tasks = [job.task for job in self._jobs.values() if job.task is not None]
+        for job in self._jobs.values():
+            if not job.done:
+                self.cancel(job.id)
+        # Let cancelled jobs record their status and remove their uploads.
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for job in self._jobs.values():
+            if job.status == "failed":
+                self._remove_upload(job)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+        self._queue = None
+
+    def _ensure_started(self) -> None:
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"ingestion-worker-{i}")
+            for i in range(self.max_workers)
+        ]
+
+    def _semaphore(self, strategy: str) -> asyncio.Semaphore:
+        if strategy not in self._semaphores:
+            limit = self._strategy_limits.get(strategy, self.max_workers)
+            self._semaphores[strategy] = asyncio.Semaphore(max(1, limit))
+        return self._semaphores[strategy]
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.done:
+                    continue
+                job.task = asyncio.create_task(self._run(job))
+                await asyncio.wait([job.task])
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: IngestionJob) -> None:
+        try:
+            async with self._semaphore(job.parser_strategy):
+                job.status = "running"
+                job.started_at = datetime.now(timezone.utc)
+                job.attempts += 1
+                result = await ingest_pdf(
+                    pdf_path=job.pdf_path,
+                    filename=job.filename,
+                    vector_index=job.vector_index,
+                    chunk_size=job.chunk_size,
+                    chunk_overlap=job.chunk_overlap,
+                    parser_strategy=job.parser_strategy,
+                    tracker=job.tracker,
+                    rollback_on_error=False,
+                )
+            job.document_ids = result.document_ids
+            job.num_chunks = result.num_chunks
+            job.reused = result.reused
+            job.added = result.added
+            job.deleted = result.deleted
+            job.unchanged = result.unchanged
+            self._finish(job, "completed")
+        except asyncio.CancelledError:
+            self._finish(job, "cancelled")
+        except Exception as e:
+            logger.exception("Ingestion job %s failed", job.id)
+            if isinstance(e, PartialWriteError):
+                job.document_ids = e.stored_ids
+            job.error = str(e)
+            self._finish(job, "failed")
+
+    def _finish(self, job: IngestionJob, status: JobStatus) -> None:
+        job.status = status
+        job.finished_at = datetime.now(timezone.utc)
+        job.task = None
+        if status == "cancelled":
+            job.tracker.cancel_pending()
+        # Failed uploads are kept until the job expires so it can be retried.
+        if status != "failed":
+            self._remove_upload(job)
+
+    @staticmethod
+    def _remove_upload(job: IngestionJob) -> None:
+        if job.pdf_path and os.path.exists(job.pdf_path):
+            os.unlink(job.pdf_path)
+
+    def _prune(self) -> None:
+        cutoff = datetime.now(timezone.utc) - self.retention
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.done and job.finished_at and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            self._remove_upload(self._jobs.pop(job_id))
+
+
+@lru_cache(maxsize=1)
+def get_ingestion_job_manager() -> IngestionJobManager:
+    return IngestionJobManager(
+        max_workers=settings.INGESTION_WORKERS,
+        max_queue_size=settings.INGESTION_QUEUE_SIZE,
+        strategy_limits=settings.INGESTION_PARSER_CONCURRENCY,
+        retention_seconds=settings.INGESTION_JOB_RETENTION_SECONDS,
+    )
+
+
+async def stop_ingestion_job_manager() -> None:
+    if get_ingestion_job_manager.cache_info().currsize:
+        await get_ingestion_job_manager().stop()
+        get_ingestion_job_manager.cache_clear()
@@ -0,0 +1,68 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+_CREATE_TABLE = text(
+    "CREATE TABLE IF NOT EXISTS rag_document_manifest ("
+    "collection_name TEXT NOT NULL, source TEXT NOT NULL, "
+    "document_hash TEXT NOT NULL, chunking TEXT NOT NULL, "
+    "num_chunks INTEGER NOT NULL, updated_at TIMESTAMPTZ NOT NULL DEFAULT now(), "
+    "PRIMARY KEY (collection_name, source))"
+)
+_SELECT = text(
+    "SELECT document_hash, chunking, num_chunks FROM rag_document_manifest "
+    "WHERE collection_name = :collection_name AND source = :source"
+)
+_UPSERT = text(
+    "INSERT INTO rag_document_manifest "
+    "(collection_name, source, document_hash, chunking, num_chunks) "
+    "VALUES (:collection_name, :source, :document_hash, :chunking, :num_chunks) "
+    "ON CONFLICT (collection_name, source) DO UPDATE SET "
+    "document_hash = EXCLUDED.document_hash, chunking = EXCLUDED.chunking, "
+    "num_chunks = EXCLUDED.num_chunks, updated_at = now()"
+)
+
+_table_ready = False
+
+
+@dataclass
+class DocumentManifest:
+    """What was last fully indexed for a source file in a collection."""
+
+    collection_name: str
+    source: str
+    document_hash: str
+    chunking: str
+    num_chunks: int
+
+
+async def _ensure_table(conn) -> None:
+    global _table_ready
+    if not _table_ready:
+        await conn.execute(_CREATE_TABLE)
+        _table_ready = True
+
+
+async def aget_document_manifest(
+    engine: AsyncEngine, collection_name: str, source: str
+) -> Optional[DocumentManifest]:
+    async with engine.begin() as conn:
+        await _ensure_table(conn)
+        row = (
+            await conn.execute(
+                _SELECT, {"collection_name": collection_name, "source": source}
+            )
+        ).first()
+    if row is None:
+        return None
+    return DocumentManifest(collection_name, source, *row)
+
+
+async def aset_document_manifest(
+    engine: AsyncEngine, manifest: DocumentManifest
+) -> None:
+    async with engine.begin() as conn:
+        await _ensure_table(conn)
+        await conn.execute(_UPSERT, vars(manifest))
@@ -0,0 +1,376 @@
+import asyncio
+import base64
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import create_engine, text
+
+from .parsers.base import PageRange, ParseResult
+
+logger = logging.getLogger(__name__)
+
+# Bump when parser output changes so stale entries stop matching.
+PARSE_CACHE_VERSION = 1
+
+
+def make_parse_key(
+    document_hash: str,
+    strategy: str,
+    config: Optional[Dict] = None,
+    page_range: Optional[PageRange] = None,
+) -> str:
+    """Content address of one parse: file SHA-256, parser strategy and config,
+    and the page window (``None`` for the document layout entry)."""
+    payload = json.dumps(
+        {
+            "version": PARSE_CACHE_VERSION,
+            "document": document_hash,
+            "strategy": strategy,
+            "config": config,
+            "pages": list(page_range) if page_range is not None else None,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _encode_image(image: Any) -> str:
+    if isinstance(image, (bytes, bytearray)):
+        data = bytes(image)
+    else:
+        # PIL images, as returned by Marker.
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        data = buffer.getvalue()
+    return base64.b64encode(data).decode("ascii")
+
+
+def _decode_image(data: str) -> Any:
+    raw = base64.b64decode(data)
+    try:
+        from PIL import Image
+    except ImportError:
+        return raw
+    image = Image.open(io.BytesIO(raw))
+    image.load()
+    return image
+
+
+def encode_parse_result(result: ParseResult) -> bytes:
+    text_, fmt, images = result
+    payload = {
+        "text": text_,
+        "format": fmt,
+        "images": {name: _encode_image(image) for name, image in images.items()},
+    }
+    return zlib.compress(json.dumps(payload).encode("utf-8"))
+
+
+def decode_parse_result(blob: bytes) -> ParseResult:
+    payload = json.loads(zlib.decompress(blob))
+    images = {name: _decode_image(data) for name, data in payload["images"].items()}
+    return payload["text"], payload["format"], images
+
+
+class ParseCacheBackend(ABC):
+    """Byte store with a total size cap; least recently used entries are
+    evicted first."""
+
+    name: str = "backend"
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]: ...
+
+    @abstractmethod
+    def set(self, key: str, value: bytes) -> None: ...
+
+    @abstractmethod
+    def size_bytes(self) -> int: ...
+
+    async def aget(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: bytes) -> None:
+        await asyncio.to_thread(self.set, key, value)
+
+    def close(self) -> None:
+        pass
+
+
+class DiskParseCache(ParseCacheBackend):
+    name = "disk"
+
+    def __init__(self, directory: str, max_bytes: int = 2 * 1024**3):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._total = sum(size for _, _, size in self._entries())
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = f.read()
+            # The modification time is the LRU clock.
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return value
+
+    def set(self, key: str, value: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(value)
+        with self._lock:
+            try:
+                self._total -= os.path.getsize(path)
+            except FileNotFoundError:
+                pass
+            os.replace(tmp_path, path)
+            self._total += len(value)
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def size_bytes(self) -> int:
+        return self._total
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.bin")
+
+    def _entries(self) -> List[tuple]:
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".bin"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, path, stat.st_size))
+        return entries
+
+    def _evict(self) -> None:
+        for _, path, size in sorted(self._entries()):
+            if self._total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                continue
+            self._total -= size
+
+
+class PostgresParseCache(ParseCacheBackend):
+    name = "postgres"
+    _CREATE_TABLE = text(
+        "CREATE TABLE IF NOT EXISTS parse_cache ("
+        "key TEXT PRIMARY KEY, payload BYTEA NOT NULL, "
+        "size_bytes BIGINT NOT NULL, last_used_at DOUBLE PRECISION NOT NULL)"
+    )
+    _SELECT = text(
+        "UPDATE parse_cache SET last_used_at = :now WHERE key = :key "
+        "RETURNING payload"
+    )
+    _UPSERT = text(
+        "INSERT INTO parse_cache (key, payload, size_bytes, last_used_at) "
+        "VALUES (:key, :payload, :size_bytes, :now) "
+        "ON CONFLICT (key) DO UPDATE SET payload = EXCLUDED.payload, "
+        "size_bytes = EXCLUDED.size_bytes, last_used_at = EXCLUDED.last_used_at"
+    )
+    _EVICT = text(
+        "DELETE FROM parse_cache WHERE key IN ("
+        "SELECT key FROM (SELECT key, sum(size_bytes) OVER "
+        "(ORDER BY last_used_at DESC, key) AS running FROM parse_cache) AS ranked "
+        "WHERE running > :max_bytes)"
+    )
+
+    def __init__(self, connection: str, max_bytes: int = 2 * 1024**3):
+        self.max_bytes = max_bytes
+        self._engine = create_engine(connection, pool_size=2, pool_pre_ping=True)
+        self._table_ready = False
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._engine.begin() as conn:
+            self._ensure_table(conn)
+            row = conn.execute(self._SELECT, {"key": key, "now": time.time()}).first()
+        return bytes(row[0]) if row is not None else None
+
+    def set(self, key: str, value: bytes) -> None:
+        with self._engine.begin() as conn:
+            self._ensure_table(conn)
+            conn.execute(
+                self._UPSERT,
+                {
+                    "key": key,
+                    "payload": value,
+                    "size_bytes": len(value),
+                    "now": time.time(),
+                },
+            )
+            conn.execute(self._EVICT, {"max_bytes": self.max_bytes})
+
+    def size_bytes(self) -> int:
+        with self._engine.begin() as conn:
+            self._ensure_table(conn)
+            return conn.execute(
+                text("SELECT COALESCE(sum(size_bytes), 0) FROM parse_cache")
+            ).scalar()
+
+    def close(self) -> None:
+        self._engine.dispose()
+
+    def _ensure_table(self, conn: Any) -> None:
+        if not self._table_ready:
+            conn.execute(self._CREATE_TABLE)
+            self._table_ready = True
+
+
+@dataclass
+class DocumentLayout:
+    """How a document was split into page windows when it was parsed."""
+
+    pages: int
+    windows: List[PageRange]
+
+
+class ParseResultCache:
+    """Content-addressed cache of parser output, so re-chunking or indexing a
+    file into another collection skips the conversion.
+
+    Cache failures are logged and treated as misses; they never fail an
+    ingestion.
+    """
+
+    def __init__(self, backend: ParseCacheBackend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._writes = 0
+        self._errors = 0
+
+    async def aget(
+        self,
+        document_hash: str,
+        strategy: str,
+        page_range: PageRange,
+        config: Optional[Dict] = None,
+    ) -> Optional[ParseResult]:
+        key = make_parse_key(document_hash, strategy, config, page_range)
+        blob = await self._aget(key)
+        if blob is None:
+            return None
+        try:
+            return await asyncio.to_thread(decode_parse_result, blob)
+        except Exception as e:
+            self._corrupt(e)
+            return None
+
+    async def aset(
+        self,
+        document_hash: str,
+        strategy: str,
+        page_range: PageRange,
+        result: ParseResult,
+        config: Optional[Dict] = None,
+    ) -> None:
+        key = make_parse_key(document_hash, strategy, config, page_range)
+        try:
+            blob = await asyncio.to_thread(encode_parse_result, result)
+        except Exception as e:
+            logger.warning("Cannot encode parse result for the cache: %s", e)
+            self._count("_errors")
+            return
+        await self._aset(key, blob)
+
+    async def aget_layout(
+        self, document_hash: str, strategy: str, config: Optional[Dict] = None
+    ) -> Optional[DocumentLayout]:
+        blob = await self._aget(make_parse_key(document_hash, strategy, config))
+        if blob is None:
+            return None
+        try:
+            payload = json.loads(blob)
+            return DocumentLayout(
+                pages=payload["pages"],
+                windows=[tuple(window) for window in payload["windows"]],
+            )
+        except Exception as e:
+            self._corrupt(e)
+            return None
+
+    async def aset_layout(
+        self,
+        document_hash: str,
+        strategy: str,
+        layout: DocumentLayout,
+        config: Optional[Dict] = None,
+    ) -> None:
+        blob = json.dumps(
+            {"pages": layout.pages, "windows": [list(w) for w in layout.windows]}
+        ).encode("utf-8")
+        await self._aset(make_parse_key(document_hash, strategy, config), blob)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, misses = self._hits, self._misses
+            writes, errors = self._writes, self._errors
+        lookups = hits + misses
+        return {
+            "backend": self.backend.name,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "writes": writes,
+            "errors": errors,
+            "max_bytes": self.backend.max_bytes,
+        }
+
+    def close(self) -> None:
+        self.backend.close()
+
+    async def _aget(self, key: str) -> Optional[bytes]:
+        try:
+            blob = await self.backend.aget(key)
+        except Exception as e:
+            logger.warning("Parse cache lookup failed: %s", e)
+            self._count("_errors")
+            blob = None
+        self._count("_misses" if blob is None else "_hits")
+        return blob
+
+    async def _aset(self, key: str, blob: bytes) -> None:
+        try:
+            await self.backend.aset(key, blob)
+        except Exception as e:
+            logger.warning("Parse cache write failed: %s", e)
+            self._count("_errors")
+            return
+        self._count("_writes")
+
+    def _corrupt(self, error: Exception) -> None:
+        logger.warning("Cannot decode cached parse result: %s", error)
+        with self._lock:
+            # The lookup found an entry it cannot use: a miss, not a hit.
+            self._hits -= 1
+            self._misses += 1
+            self._errors += 1
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
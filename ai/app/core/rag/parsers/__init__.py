@@ -1,4 +1,5 @@
-from .factory import create_parser
+from .factory import ParserCache, create_parser, get_parser_cache
+from .engine import ParserEngine, get_parser_engine
 from .llama_parser import LlamaParser
 from .marker_parser import MarkerParser
 from .base import BaseDocumentParser, ParseResult, OutputFormat
@@ -9,5 +10,9 @@ __all__ = [
     "OutputFormat",
     "MarkerParser",
     "LlamaParser",
+    "ParserCache",
+    "ParserEngine",
     "create_parser",
+    "get_parser_cache",
+    "get_parser_engine",
 ]
@@ -1,6 +1,6 @@
 import os
 from abc import ABC, abstractmethod
-from typing import Dict, Literal, Tuple
+from typing import Dict, Iterator, Literal, Optional, Tuple
 
 
 class DocumentParserError(Exception):
@@ -29,6 +29,29 @@ class InvalidDocumentError(DocumentParserError):
 
 OutputFormat = Literal["md", "html", "json"]
 ParseResult = Tuple[str, OutputFormat, Dict]
+PageRange = Tuple[int, int]
+
+
+def count_pages(pdf_path: str) -> int:
+    import pypdfium2
+
+    try:
+        pdf = pypdfium2.PdfDocument(pdf_path)
+    except Exception as e:
+        raise InvalidDocumentError(
+            f"Could not open '{os.path.basename(pdf_path)}' as a PDF: {e}"
+        ) from e
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def iter_page_ranges(num_pages: int, window: int) -> Iterator[PageRange]:
+    """Yield half-open, 0-based (start, end) page windows covering the document."""
+    window = window if window > 0 else max(num_pages, 1)
+    for start in range(0, num_pages, window):
+        yield start, min(start + window, num_pages)
 
 
 class BaseDocumentParser(ABC):
@@ -43,6 +66,8 @@ class BaseDocumentParser(ABC):
             )
 
     @abstractmethod
-    def parse(self, pdf_path: str) -> ParseResult:
-        """Parse a PDF file and return (text, format, images)."""
+    def parse(
+        self, pdf_path: str, page_range: Optional[PageRange] = None
+    ) -> ParseResult:
+        """Parse a PDF (or a page window of it) and return (text, format, images)."""
         ...
@@ -0,0 +1,299 @@
+import asyncio
+import itertools
+import multiprocessing
+import queue
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Sequence, Set
+
+from starlette.concurrency import run_in_threadpool
+
+from .base import (
+    DocumentConversionError,
+    DocumentParserError,
+    PageRange,
+    ParseResult,
+)
+from .factory import ParserStrategy, get_parser_cache
+
+# How often a queued job checks whether a worker has picked it up.
+_START_POLL_SECONDS = 1.0
+
+# Set in pool workers: where they report the jobs they start.
+_started: Optional[Any] = None
+
+
+class ParserEngineBusyError(DocumentParserError):
+    """Raised when the parser engine queue is full."""
+
+    pass
+
+
+class ParseTimeoutError(DocumentConversionError):
+    """Raised when a parse job exceeds the configured timeout."""
+
+    pass
+
+
+def _init_worker(preload: Sequence[ParserStrategy], started: Any) -> None:
+    global _started
+    _started = started
+    get_parser_cache().warm_up(preload)
+
+
+def _ping() -> None:
+    pass
+
+
+def _parse_in_worker(
+    strategy: ParserStrategy,
+    config: Optional[Dict],
+    pdf_path: str,
+    page_range: Optional[PageRange],
+    job_id: Optional[int] = None,
+) -> ParseResult:
+    if _started is not None and job_id is not None:
+        _started.put((job_id, time.time()))
+    with get_parser_cache().lease(strategy, config) as parser:
+        return parser.parse(pdf_path, page_range=page_range)
+
+
+@dataclass
+class _Generation:
+    executor: ProcessPoolExecutor
+    started_queue: Any
+    # Job id -> wall-clock time a worker began parsing it.
+    started: Dict[int, float] = field(default_factory=dict)
+    # Distinct documents submitted; page windows of one PDF count once.
+    documents: Set[str] = field(default_factory=set)
+    in_flight: int = 0
+    retired: bool = False
+
+
+class ParserEngine:
+    """Runs ``BaseDocumentParser.parse`` in a dedicated process pool.
+
+    Workers keep their parsers (and Marker models) resident through the
+    worker-local ParserCache. After ``recycle_after`` documents the whole pool
+    is replaced once its in-flight jobs drain, bounding memory growth. With
+    ``max_workers=0`` parsing runs in the threadpool of the current process.
+
+    The timeout counts from when a worker starts the job, so time spent queued
+    behind other documents or a worker warm-up never times a job out.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_queue: int = 16,
+        timeout_seconds: float = 900.0,
+        recycle_after: int = 50,
+        preload: Iterable[ParserStrategy] = (),
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout_seconds = timeout_seconds
+        self.recycle_after = recycle_after
+        self.preload = tuple(preload)
+        self._generation: Optional[_Generation] = None
+        self._retired: list[_Generation] = []
+        self._pending = 0
+        self._completed = 0
+        self._failed = 0
+        self._timeouts = 0
+        self._recycles = 0
+        self._job_ids = itertools.count()
+
+    async def parse(
+        self,
+        strategy: ParserStrategy,
+        pdf_path: str,
+        config: Optional[Dict] = None,
+        page_range: Optional[PageRange] = None,
+    ) -> ParseResult:
+        capacity = max(1, self.max_workers) + self.max_queue
+        if self._pending >= capacity:
+            raise ParserEngineBusyError(
+                f"Parser engine is busy ({self._pending} documents in progress)."
+            )
+
+        self._pending += 1
+        try:
+            if self.max_workers <= 0:
+                result = await asyncio.wait_for(
+                    run_in_threadpool(
+                        _parse_in_worker, strategy, config, pdf_path, page_range
+                    ),
+                    self.timeout_seconds,
+                )
+            else:
+                result = await self._parse_in_pool(
+                    strategy, config, pdf_path, page_range
+                )
+            self._completed += 1
+            return result
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            raise ParseTimeoutError(
+                f"Parsing '{pdf_path}' exceeded {self.timeout_seconds}s."
+            )
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._pending -= 1
+
+    def start(self) -> None:
+        if self.max_workers > 0:
+            self._current()
+
+    def stats(self) -> Dict[str, int]:
+        generation = self._generation
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "pending": self._pending,
+            "in_flight": generation.in_flight if generation else 0,
+            "completed": self._completed,
+            "failed": self._failed,
+            "timeouts": self._timeouts,
+            "recycles": self._recycles,
+            "retired_pools": len(self._retired),
+        }
+
+    def shutdown(self) -> None:
+        generations = self._retired + ([self._generation] if self._generation else [])
+        for generation in generations:
+            self._terminate(generation)
+        self._generation = None
+        self._retired.clear()
+
+    async def _parse_in_pool(
+        self,
+        strategy: ParserStrategy,
+        config: Optional[Dict],
+        pdf_path: str,
+        page_range: Optional[PageRange],
+    ) -> ParseResult:
+        generation = self._current()
+        generation.documents.add(pdf_path)
+        generation.in_flight += 1
+        job_id = next(self._job_ids)
+        future = None
+        try:
+            future = generation.executor.submit(
+                _parse_in_worker, strategy, config, pdf_path, page_range, job_id
+            )
+            return await self._wait(generation, job_id, future)
+        except asyncio.TimeoutError:
+            # The worker cannot be interrupted; stop routing work to this pool
+            # and terminate it once the other jobs on it have finished.
+            self._retire(generation)
+            raise
+        except asyncio.CancelledError:
+            # A job still pending in the executor is dropped. Once handed to a
+            # worker it cannot be recalled and would keep the worker busy with
+            # a result nobody reads, so retire the pool as on a timeout.
+            if future is not None and not future.cancel() and not future.done():
+                self._retire(generation)
+            raise
+        except BrokenProcessPool as e:
+            self._retire(generation)
+            raise DocumentConversionError(
+                f"Parser worker crashed while converting '{pdf_path}': {e}"
+            ) from e
+        finally:
+            generation.started.pop(job_id, None)
+            generation.in_flight -= 1
+            if len(generation.documents) >= self.recycle_after:
+                self._retire(generation)
+            self._reap()
+
+    async def _wait(
+        self, generation: _Generation, job_id: int, future: Future
+    ) -> ParseResult:
+        waiter = asyncio.wrap_future(future)
+        try:
+            while True:
+                started_at = self._started_at(generation, job_id)
+                if started_at is None:
+                    timeout = _START_POLL_SECONDS
+                else:
+                    timeout = started_at + self.timeout_seconds - time.time()
+                    if timeout <= 0:
+                        raise asyncio.TimeoutError
+                done, _ = await asyncio.wait({waiter}, timeout=timeout)
+                if done:
+                    return waiter.result()
+        finally:
+            if not waiter.done():
+                waiter.cancel()
+
+    @staticmethod
+    def _started_at(generation: _Generation, job_id: int) -> Optional[float]:
+        while True:
+            try:
+                started_id, started_at = generation.started_queue.get_nowait()
+            except queue.Empty:
+                break
+            generation.started[started_id] = started_at
+        return generation.started.get(job_id)
+
+    def _current(self) -> _Generation:
+        if self._generation is None or self._generation.retired:
+            ctx = multiprocessing.get_context("spawn")
+            started_queue = ctx.Queue()
+            self._generation = _Generation(
+                executor=ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=ctx,
+                    initializer=_init_worker,
+                    initargs=(self.preload, started_queue),
+                ),
+                started_queue=started_queue,
+            )
+            # Spawn and warm up workers now rather than on the first document.
+            for _ in range(self.max_workers):
+                self._generation.executor.submit(_ping)
+        return self._generation
+
+    def _retire(self, generation: _Generation) -> None:
+        if generation.retired:
+            return
+        generation.retired = True
+        self._recycles += 1
+        self._retired.append(generation)
+        if generation is self._generation:
+            self._generation = None
+
+    def _reap(self) -> None:
+        for generation in [g for g in self._retired if g.in_flight == 0]:
+            self._retired.remove(generation)
+            self._terminate(generation)
+
+    @staticmethod
+    def _terminate(generation: _Generation) -> None:
+        # ProcessPoolExecutor offers no public way to stop a busy worker.
+        processes = list((generation.executor._processes or {}).values())
+        generation.executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        generation.started_queue.close()
+        generation.started_queue.cancel_join_thread()
+
+
+@lru_cache(maxsize=1)
+def get_parser_engine() -> ParserEngine:
+    from app.core.config import settings
+
+    return ParserEngine(
+        max_workers=settings.PARSER_ENGINE_WORKERS,
+        max_queue=settings.PARSER_ENGINE_MAX_QUEUE,
+        timeout_seconds=settings.PARSER_ENGINE_TIMEOUT_SECONDS,
+        recycle_after=settings.PARSER_ENGINE_RECYCLE_AFTER,
+        preload=settings.PARSER_PRELOAD,
+    )
@@ -1,4 +1,11 @@
-from typing import Dict, Literal
+import gc
+import json
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Literal, Tuple
 
 from .base import BaseDocumentParser
 from .llama_parser import LlamaParser
@@ -11,6 +18,8 @@ _REGISTRY: Dict[ParserStrategy, type[BaseDocumentParser]] = {
     "speed": LlamaParser,
 }
 
+_CacheKey = Tuple[str, str]
+
 
 def create_parser(
     strategy: ParserStrategy = "quality",
@@ -21,3 +30,144 @@ def create_parser(
         valid = ", ".join(f"'{k}'" for k in _REGISTRY)
         raise ValueError(f"Unknown parser strategy '{strategy}'. Choose from: {valid}")
     return cls(config=config)
+
+
+@dataclass
+class _CachedParser:
+    parser: BaseDocumentParser
+    last_used: float
+    in_use: bool = False
+
+
+class ParserCache:
+    """Keeps initialized parsers (and the models they load) resident.
+
+    Holds up to ``pool_size`` instances per (strategy, config). Instances idle
+    for longer than ``idle_unload_seconds`` are dropped so their memory can be
+    reclaimed; ``0`` keeps them loaded for the life of the process.
+    """
+
+    def __init__(self, pool_size: int = 1, idle_unload_seconds: float = 0.0):
+        self.pool_size = max(1, pool_size)
+        self.idle_unload_seconds = idle_unload_seconds
+        self._parsers: Dict[_CacheKey, List[_CachedParser]] = {}
+        self._creating: Dict[_CacheKey, int] = {}
+        self._cond = threading.Condition()
+        self._loads = 0
+        self._unloads = 0
+        self._reaper: threading.Thread | None = None
+        if idle_unload_seconds > 0:
+            self._reaper = threading.Thread(
+                target=self._reap_forever, name="parser-cache-reaper", daemon=True
+            )
+            self._reaper.start()
+
+    @staticmethod
+    def _key(strategy: ParserStrategy, config: Dict | None) -> _CacheKey:
+        return strategy, json.dumps(config or {}, sort_keys=True, default=str)
+
+    @contextmanager
+    def lease(
+        self, strategy: ParserStrategy = "quality", config: Dict | None = None
+    ) -> Iterator[BaseDocumentParser]:
+        entry = self._acquire(strategy, config)
+        try:
+            yield entry.parser
+        finally:
+            with self._cond:
+                entry.in_use = False
+                entry.last_used = time.monotonic()
+                self._cond.notify_all()
+
+    def warm_up(self, strategies: Iterable[ParserStrategy]) -> None:
+        for strategy in strategies:
+            with self.lease(strategy):
+                pass
+
+    def unload_idle(self) -> int:
+        if self.idle_unload_seconds <= 0:
+            return 0
+        cutoff = time.monotonic() - self.idle_unload_seconds
+        unloaded = 0
+        with self._cond:
+            for key, entries in list(self._parsers.items()):
+                keep = [e for e in entries if e.in_use or e.last_used > cutoff]
+                unloaded += len(entries) - len(keep)
+                if keep:
+                    self._parsers[key] = keep
+                else:
+                    del self._parsers[key]
+            self._unloads += unloaded
+        if unloaded:
+            gc.collect()
+        return unloaded
+
+    def clear(self) -> None:
+        with self._cond:
+            self._parsers = {
+                key: [e for e in entries if e.in_use]
+                for key, entries in self._parsers.items()
+                if any(e.in_use for e in entries)
+            }
+
+    def stats(self) -> Dict[str, object]:
+        with self._cond:
+            instances = {
+                f"{strategy}:{config}": {
+                    "loaded": len(entries),
+                    "in_use": sum(e.in_use for e in entries),
+                }
+                for (strategy, config), entries in self._parsers.items()
+            }
+            return {
+                "pool_size": self.pool_size,
+                "idle_unload_seconds": self.idle_unload_seconds,
+                "loads": self._loads,
+                "unloads": self._unloads,
+                "instances": instances,
+            }
+
+    def _acquire(self, strategy: ParserStrategy, config: Dict | None) -> _CachedParser:
+        key = self._key(strategy, config)
+        with self._cond:
+            while True:
+                entries = self._parsers.setdefault(key, [])
+                for entry in entries:
+                    if not entry.in_use:
+                        entry.in_use = True
+                        return entry
+                if len(entries) + self._creating.get(key, 0) < self.pool_size:
+                    self._creating[key] = self._creating.get(key, 0) + 1
+                    break
+                self._cond.wait()
+
+        entry = None
+        try:
+            parser = create_parser(strategy=strategy, config=config)
+            entry = _CachedParser(
+                parser=parser, last_used=time.monotonic(), in_use=True
+            )
+            return entry
+        finally:
+            with self._cond:
+                self._creating[key] -= 1
+                if entry is not None:
+                    self._parsers.setdefault(key, []).append(entry)
+                    self._loads += 1
+                self._cond.notify_all()
+
+    def _reap_forever(self) -> None:
+        interval = min(60.0, max(1.0, self.idle_unload_seconds / 2))
+        while True:
+            time.sleep(interval)
+            self.unload_idle()
+
+
+@lru_cache(maxsize=1)
+def get_parser_cache() -> ParserCache:
+    from app.core.config import settings
+
+    return ParserCache(
+        pool_size=settings.PARSER_POOL_SIZE,
+        idle_unload_seconds=settings.PARSER_IDLE_UNLOAD_SECONDS,
+    )
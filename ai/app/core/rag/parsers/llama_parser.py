@@ -1,9 +1,10 @@
-from typing import Dict
+from typing import Dict, Optional
 
 from llama_parse import LlamaParse
 
 from .base import (
     BaseDocumentParser,
+    PageRange,
     ParseResult,
     DocumentConversionError,
     ParserInitError,
@@ -22,19 +23,30 @@ class LlamaParser(BaseDocumentParser):
             )
 
         resolved_config = config or {}
+        self.parser_kwargs = dict(
+            api_key=api_key,
+            result_type=resolved_config.get("result_type", "markdown"),
+            verbose=resolved_config.get("verbose", False),
+        )
+        if settings.LLAMA_CLOUD_BASE_URL:
+            self.parser_kwargs["base_url"] = settings.LLAMA_CLOUD_BASE_URL
         try:
-            self.parser = LlamaParse(
-                api_key=api_key,
-                result_type=resolved_config.get("result_type", "markdown"),
-                verbose=resolved_config.get("verbose", False),
-            )
+            self.parser = LlamaParse(**self.parser_kwargs)
         except Exception as e:
             raise ParserInitError(f"Failed to initialize LlamaParser: {e}") from e
 
-    def parse(self, pdf_path: str) -> ParseResult:
+    def parse(
+        self, pdf_path: str, page_range: Optional[PageRange] = None
+    ) -> ParseResult:
         self._validate_path(pdf_path)
         try:
-            documents = self.parser.load_data(pdf_path)
+            parser = self.parser
+            if page_range is not None:
+                parser = LlamaParse(
+                    **self.parser_kwargs,
+                    target_pages=",".join(str(p) for p in range(*page_range)),
+                )
+            documents = parser.load_data(pdf_path)
         except Exception as e:
             raise DocumentConversionError(
                 f"LlamaParser failed to convert '{pdf_path}': {e}"
@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Dict, Optional
 from marker.models import create_model_dict
 from marker.output import text_from_rendered
 from marker.config.parser import ConfigParser
@@ -6,6 +6,7 @@ from marker.converters.pdf import PdfConverter
 
 from .base import (
     BaseDocumentParser,
+    PageRange,
     ParseResult,
     DocumentConversionError,
     ParserInitError,
@@ -19,21 +20,32 @@ _DEFAULT_CONFIG: Dict = {
 
 class MarkerParser(BaseDocumentParser):
     def __init__(self, config: Dict | None = None):
-        resolved_config = config or _DEFAULT_CONFIG
+        self.config = config or _DEFAULT_CONFIG
         try:
-            config_parser = ConfigParser(resolved_config)
-            self.converter = PdfConverter(
-                renderer=config_parser.get_renderer(),
-                artifact_dict=create_model_dict(),
-                config=resolved_config,
-            )
+            self.artifact_dict = create_model_dict()
+            self.converter = self._build_converter(self.config)
         except Exception as e:
             raise ParserInitError(f"Failed to initialize MarkerParser: {e}") from e
 
-    def parse(self, pdf_path: str) -> ParseResult:
+    def _build_converter(self, config: Dict) -> PdfConverter:
+        config_parser = ConfigParser(config)
+        return PdfConverter(
+            renderer=config_parser.get_renderer(),
+            artifact_dict=self.artifact_dict,
+            config=config,
+        )
+
+    def parse(
+        self, pdf_path: str, page_range: Optional[PageRange] = None
+    ) -> ParseResult:
         self._validate_path(pdf_path)
         try:
-            rendered = self.converter(pdf_path)
+            converter = self.converter
+            if page_range is not None:
+                converter = self._build_converter(
+                    {**self.config, "page_range": list(range(*page_range))}
+                )
+            rendered = converter(pdf_path)
         except Exception as e:
             raise DocumentConversionError(
                 f"MarkerParser failed to convert '{pdf_path}': {e}"
@@ -0,0 +1,198 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+from langchain_postgres import PGVector
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+_StoreKey = Tuple[str, bool]
+
+
+@dataclass
+class _PooledStore:
+    store: PGVector
+    created_at: float
+    last_used: float
+    hits: int = 0
+
+
+class VectorStorePool:
+    """Process-wide registry of initialized PGVector stores keyed by collection.
+
+    All stores share a single SQLAlchemy engine (and a single async engine for
+    async-mode stores), so collection/extension setup runs once per collection
+    and connections are reused across requests.
+    """
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        connection: str,
+        *,
+        async_connection: Optional[str] = None,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_timeout: float = 30.0,
+        pool_recycle: int = 1800,
+        pre_ping: bool = True,
+        idle_timeout: float = 900.0,
+        max_stores: int = 256,
+    ):
+        self.embedding = embedding
+        self.idle_timeout = idle_timeout
+        self.max_stores = max_stores
+        engine_args = dict(
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_recycle=pool_recycle,
+            pool_pre_ping=pre_ping,
+        )
+        self.engine: Engine = create_engine(connection, **engine_args)
+        self.async_engine: AsyncEngine = create_async_engine(
+            async_connection or connection, **engine_args
+        )
+        self._stores: "OrderedDict[_StoreKey, _PooledStore]" = OrderedDict()
+        self._init_locks: Dict[_StoreKey, threading.Lock] = {}
+        self._ainit_locks: Dict[_StoreKey, asyncio.Lock] = {}
+        self._lock = threading.Lock()
+        self._extension_ready = False
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, collection_name: str) -> PGVector:
+        key = (collection_name, False)
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry.store
+            init_lock = self._init_locks.setdefault(key, threading.Lock())
+
+        with init_lock:
+            with self._lock:
+                entry = self._lookup(key)
+                if entry is not None:
+                    return entry.store
+
+            store = PGVector(
+                embeddings=self.embedding,
+                collection_name=collection_name,
+                connection=self.engine,
+                use_jsonb=True,
+                create_extension=not self._extension_ready,
+            )
+            self._register(key, store)
+            return store
+
+    async def aget(self, collection_name: str) -> PGVector:
+        key = (collection_name, True)
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry.store
+            init_lock = self._ainit_locks.setdefault(key, asyncio.Lock())
+
+        async with init_lock:
+            with self._lock:
+                entry = self._lookup(key)
+                if entry is not None:
+                    return entry.store
+
+            store = PGVector(
+                embeddings=self.embedding,
+                collection_name=collection_name,
+                connection=self.async_engine,
+                use_jsonb=True,
+                create_extension=not self._extension_ready,
+            )
+            await store.acreate_collection()
+            self._register(key, store)
+            return store
+
+    def evict(self, collection_name: str) -> bool:
+        with self._lock:
+            evicted = False
+            for key in ((collection_name, False), (collection_name, True)):
+                evicted = self._stores.pop(key, None) is not None or evicted
+            return evicted
+
+    def check_health(self) -> bool:
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            return True
+        except Exception:
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._evict_idle(time.monotonic())
+            collections = sorted({name for name, _ in self._stores})
+            num_stores = len(self._stores)
+            hits, misses, evictions = self._hits, self._misses, self._evictions
+
+        pool = self.engine.pool
+        async_pool = self.async_engine.pool
+        return {
+            "collections": collections,
+            "num_stores": num_stores,
+            "max_stores": self.max_stores,
+            "store_hits": hits,
+            "store_misses": misses,
+            "store_evictions": evictions,
+            "pool_size": pool.size(),
+            "connections_checked_in": pool.checkedin(),
+            "connections_checked_out": pool.checkedout(),
+            "connections_overflow": pool.overflow(),
+            "async_connections_checked_in": async_pool.checkedin(),
+            "async_connections_checked_out": async_pool.checkedout(),
+            "async_connections_overflow": async_pool.overflow(),
+        }
+
+    async def adispose(self) -> None:
+        with self._lock:
+            self._stores.clear()
+            self._extension_ready = False
+        self.engine.dispose()
+        await self.async_engine.dispose()
+
+    def _register(self, key: _StoreKey, store: PGVector) -> None:
+        with self._lock:
+            self._extension_ready = True
+            self._misses += 1
+            now = time.monotonic()
+            self._stores[key] = _PooledStore(store=store, created_at=now, last_used=now)
+            self._init_locks.pop(key, None)
+            self._ainit_locks.pop(key, None)
+            while len(self._stores) > self.max_stores:
+                self._stores.popitem(last=False)
+                self._evictions += 1
+
+    def _lookup(self, key: _StoreKey) -> Optional[_PooledStore]:
+        now = time.monotonic()
+        self._evict_idle(now)
+        entry = self._stores.get(key)
+        if entry is None:
+            return None
+        entry.last_used = now
+        entry.hits += 1
+        self._hits += 1
+        self._stores.move_to_end(key)
+        return entry
+
+    def _evict_idle(self, now: float) -> None:
+        if self.idle_timeout <= 0:
+            return
+        while self._stores:
+            key, entry = next(iter(self._stores.items()))
+            if now - entry.last_used < self.idle_timeout:
+                break
+            del self._stores[key]
+            self._evictions += 1
@@ -0,0 +1,322 @@
+import asyncio
+import re
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .filters import (
+    MetadataFilter,
+    acreate_indexes,
+    aindex_valid,
+    compile_metadata_filter,
+)
+from .indexes import (
+    Quantization,
+    distance_operator,
+    query_expression,
+    vector_expression,
+)
+
+TEXT_SEARCH_COLUMN = "document_tsv"
+TEXT_SEARCH_INDEX = "ix_langchain_pg_embedding_document_tsv"
+
+_TEXT_SEARCH_COLUMN = text(
+    "SELECT 1 FROM information_schema.columns "
+    "WHERE table_name = 'langchain_pg_embedding' AND column_name = :column"
+)
+
+# How long a "not set up" answer is trusted before the catalog is asked again.
+TEXT_SEARCH_RECHECK_SECONDS = 60.0
+
+_text_search_ready: Set[str] = set()
+_text_search_missing: Dict[str, float] = {}
+_text_search_lock = asyncio.Lock()
+
+
+async def acollection_id(engine: AsyncEngine, collection_name: str) -> Optional[str]:
+    async with engine.connect() as conn:
+        collection_id = (
+            await conn.execute(
+                text("SELECT uuid FROM langchain_pg_collection WHERE name = :name"),
+                {"name": collection_name},
+            )
+        ).scalar()
+    return str(collection_id) if collection_id is not None else None
+
+
+def vector_literal(vector: Sequence[float]) -> str:
+    return "[" + ",".join(map(repr, map(float, vector))) + "]"
+
+
+async def asearch_by_vector(
+    engine: AsyncEngine,
+    collection_id: str,
+    vector: Sequence[float],
+    k: int,
+    dimensions: int,
+    settings: Sequence[str] = (),
+    filter: Optional[MetadataFilter] = None,
+    quantization: Quantization = "none",
+    rescore: int = 10,
+) -> List[Tuple[Document, float]]:
+    """Cosine-distance top-k over one collection, written to match the
+    partial expression indexes built by VectorIndexManager.
+
+    The collection id is inlined (it is a UUID read from the database) so the
+    planner can match the partial index predicate even for generic plans.
+    ``settings`` are ``SET LOCAL`` statements such as ``hnsw.ef_search``.
+    ``filter`` is applied in the same query, so the planner chooses between
+    the ANN index and the metadata indexes.
+
+    ``quantization`` selects the index expression to scan. Distances are always
+    exact; with ``binary`` the ``k * rescore`` nearest rows by Hamming distance
+    are re-ranked by exact distance in the same query.
+    """
+    rows = await _avector_rows(
+        engine,
+        collection_id,
+        None,
+        vector,
+        k,
+        dimensions,
+        settings,
+        filter,
+        quantization=quantization,
+        rescore=rescore,
+    )
+    return [
+        (Document(id=id_, page_content=document, metadata=metadata or {}), dist)
+        for id_, document, metadata, dist in rows
+    ]
+
+
+async def asearch_candidates(
+    engine: AsyncEngine,
+    vector: Sequence[float],
+    k: int,
+    dimensions: int,
+    collection_id: Optional[str] = None,
+    collection_name: Optional[str] = None,
+    settings: Sequence[str] = (),
+    filter: Optional[MetadataFilter] = None,
+    quantization: Quantization = "none",
+    rescore: int = 10,
+) -> Tuple[List[Document], np.ndarray, np.ndarray]:
+    """Like ``asearch_by_vector``, but also returns the stored embeddings, so
+    candidates can be re-ranked without another query.
+
+    Returns the documents, their cosine distances and a ``(k, dimensions)``
+    float32 matrix. Embeddings travel in pgvector's binary format. Without a
+    ``collection_id`` the collection is looked up by name in the same query.
+    """
+    rows = await _avector_rows(
+        engine,
+        collection_id,
+        collection_name,
+        vector,
+        k,
+        dimensions,
+        settings,
+        filter,
+        quantization=quantization,
+        rescore=rescore,
+        extra_columns=", vector_send(embedding) AS raw_embedding",
+    )
+    documents = [
+        Document(id=id_, page_content=document, metadata=metadata or {})
+        for id_, document, metadata, _, _ in rows
+    ]
+    distances = np.array([row[3] for row in rows], dtype=np.float32)
+    embeddings = np.empty((len(rows), dimensions), dtype=np.float32)
+    for i, row in enumerate(rows):
+        # vector_send: int16 dimensions, int16 unused, big-endian float4s.
+        embeddings[i] = np.frombuffer(row[4], dtype=">f4", offset=4)
+    return documents, distances, embeddings
+
+
+async def _avector_rows(
+    engine: AsyncEngine,
+    collection_id: Optional[str],
+    collection_name: Optional[str],
+    vector: Sequence[float],
+    k: int,
+    dimensions: int,
+    settings: Sequence[str],
+    filter: Optional[MetadataFilter],
+    quantization: Quantization = "none",
+    rescore: int = 10,
+    extra_columns: str = "",
+) -> List[Tuple]:
+    where, params = _filter_clause(filter)
+    params.update(query=vector_literal(vector), k=k)
+    if collection_id is not None:
+        collection = f"'{uuid.UUID(str(collection_id))}'::uuid"
+    else:
+        collection = "(SELECT uuid FROM langchain_pg_collection WHERE name = :name)"
+        params["name"] = collection_name
+    exact = (
+        f"{vector_expression(dimensions)} <=> {query_expression(dimensions)} "
+        f"AS distance{extra_columns}"
+    )
+    scan = (
+        f"{vector_expression(dimensions, quantization)} "
+        f"{distance_operator(quantization)} "
+        f"{query_expression(dimensions, quantization)}"
+    )
+    source = f"FROM langchain_pg_embedding WHERE collection_id = {collection}{where}"
+    if quantization == "binary":
+        query = text(
+            f"WITH candidates AS MATERIALIZED ("
+            f"SELECT id, document, cmetadata, embedding {source} "
+            f"ORDER BY {scan} LIMIT :candidates) "
+            f"SELECT id, document, cmetadata, {exact} FROM candidates "
+            f"ORDER BY distance LIMIT :k"
+        )
+        params["candidates"] = k * max(1, rescore)
+    elif quantization == "halfvec":
+        query = text(
+            f"SELECT id, document, cmetadata, {exact} {source} "
+            f"ORDER BY {scan} LIMIT :k"
+        )
+    else:
+        query = text(
+            f"SELECT id, document, cmetadata, {exact} {source} "
+            f"ORDER BY distance LIMIT :k"
+        )
+    async with engine.begin() as conn:
+        for statement in settings:
+            await conn.execute(text(statement))
+        rows = (await conn.execute(query, params)).all()
+    # Iterative index scans in relaxed_order may return rows slightly out of
+    # order.
+    rows.sort(key=lambda row: row[3])
+    return rows
+
+
+def _filter_clause(filter: Optional[MetadataFilter]) -> Tuple[str, Dict[str, Any]]:
+    if not filter:
+        return "", {}
+    clause, params = compile_metadata_filter(filter)
+    return f" AND {clause}", params
+
+
+def _text_search_ddl(config: str) -> List[str]:
+    if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_.]*", config):
+        raise ValueError(f"Invalid text search configuration: {config!r}")
+    return [
+        # A stored generated column is kept up to date by every INSERT/UPDATE,
+        # whichever path (add_documents, COPY, upsert) wrote the row.
+        f"ALTER TABLE langchain_pg_embedding ADD COLUMN IF NOT EXISTS "
+        f"{TEXT_SEARCH_COLUMN} tsvector GENERATED ALWAYS AS "
+        f"(to_tsvector('{config}'::regconfig, coalesce(document, ''))) STORED",
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {TEXT_SEARCH_INDEX} "
+        f"ON langchain_pg_embedding USING gin ({TEXT_SEARCH_COLUMN})",
+    ]
+
+
+async def aensure_text_search(engine: AsyncEngine, config: str = "english") -> None:
+    """Add the full-text column and GIN index once per database.
+
+    Adding the column takes an ACCESS EXCLUSIVE lock on the shared
+    langchain_pg_embedding table and rewrites it: every read and write, on
+    every collection, waits until the rewrite is done. Run it as a migration
+    (``POST /rag/search-indexes?text_search=true`` or
+    ``TEXT_SEARCH_SETUP_ON_STARTUP``), never from a request.
+    """
+    key = str(engine.url)
+    if key in _text_search_ready:
+        return
+    async with _text_search_lock:
+        if key in _text_search_ready:
+            return
+        column, index = _text_search_ddl(config)
+        async with engine.execution_options(
+            isolation_level="AUTOCOMMIT"
+        ).connect() as conn:
+            await conn.execute(text(column))
+        await acreate_indexes(engine, [(TEXT_SEARCH_INDEX, index)])
+        _text_search_ready.add(key)
+
+
+async def atext_search_ready(engine: AsyncEngine) -> bool:
+    """Whether the full-text column and a valid GIN index exist."""
+    key = str(engine.url)
+    if key in _text_search_ready:
+        return True
+    checked_at = _text_search_missing.get(key)
+    if checked_at and time.monotonic() - checked_at < TEXT_SEARCH_RECHECK_SECONDS:
+        return False
+    async with engine.connect() as conn:
+        column = (
+            await conn.execute(_TEXT_SEARCH_COLUMN, {"column": TEXT_SEARCH_COLUMN})
+        ).scalar()
+        valid = await aindex_valid(conn, TEXT_SEARCH_INDEX)
+    if column and valid:
+        _text_search_ready.add(key)
+        return True
+    _text_search_missing[key] = time.monotonic()
+    return False
+
+
+async def asearch_by_text(
+    engine: AsyncEngine,
+    collection_name: str,
+    query: str,
+    k: int,
+    config: str = "english",
+    filter: Optional[MetadataFilter] = None,
+) -> List[Tuple[Document, float]]:
+    """Full-text top-k over one collection, ranked by ``ts_rank_cd``.
+
+    Query terms are OR-ed so a chunk that contains only the rare identifier
+    still matches; chunks matching more terms rank higher.
+    """
+    _text_search_ddl(config)  # validates ``config``
+    where, params = _filter_clause(filter)
+    tsquery = (
+        f"replace(plainto_tsquery('{config}'::regconfig, :query)::text, "
+        f"' & ', ' | ')::tsquery"
+    )
+    statement = text(
+        f"SELECT id, document, cmetadata, "
+        f"ts_rank_cd({TEXT_SEARCH_COLUMN}, q) AS rank "
+        f"FROM langchain_pg_embedding, {tsquery} AS q "
+        f"WHERE collection_id = (SELECT uuid FROM langchain_pg_collection "
+        f"WHERE name = :collection) AND {TEXT_SEARCH_COLUMN} @@ q{where} "
+        f"ORDER BY rank DESC LIMIT :k"
+    )
+    async with engine.connect() as conn:
+        rows = await conn.execute(
+            statement,
+            {**params, "query": query, "collection": collection_name, "k": k},
+        )
+        return [
+            (Document(id=id_, page_content=document, metadata=metadata or {}), rank)
+            for id_, document, metadata, rank in rows
+        ]
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Document]],
+    weights: Optional[Sequence[float]] = None,
+    k: int = 60,
+) -> List[Document]:
+    """Merge ranked lists by weighted reciprocal rank, ``sum(w / (k + rank))``.
+
+    Documents are matched by id (falling back to their text); the first
+    occurrence is the one returned.
+    """
+    weights = weights or [1.0] * len(rankings)
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, doc in enumerate(ranking, start=1):
+            key = doc.id if doc.id is not None else doc.page_content
+            scores[key] = scores.get(key, 0.0) + weight / (k + rank)
+            documents.setdefault(key, doc)
+    return [documents[key] for key in sorted(scores, key=scores.get, reverse=True)]
@@ -0,0 +1,78 @@
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .filters import aensure_metadata_indexes, aindex_valid, metadata_index_ddl
+from .search import aensure_text_search, atext_search_ready
+
+logger = logging.getLogger(__name__)
+
+
+class SearchSetupInProgressError(Exception):
+    """Raised when search indexes are already being created."""
+
+    pass
+
+
+class SearchIndexSetup:
+    """Creates the indexes metadata-filtered search relies on, and optionally
+    the full-text column hybrid search needs, off the request path: in the
+    background at startup or from an admin endpoint.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        metadata_fields: Sequence[str],
+        text_search_config: str = "english",
+    ):
+        self.engine = engine
+        self.metadata_fields = list(metadata_fields)
+        self.text_search_config = text_search_config
+        self.error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, text_search: bool = False) -> None:
+        """``text_search`` also adds the full-text column, which rewrites the
+        embeddings table under an exclusive lock (see ``aensure_text_search``).
+        """
+        if self.running:
+            raise SearchSetupInProgressError("Search indexes are already being built.")
+        self.error = None
+        self._task = asyncio.create_task(
+            self._run(text_search), name="search-index-setup"
+        )
+
+    async def astatus(self) -> Dict[str, Any]:
+        async with self.engine.connect() as conn:
+            indexes = {
+                name: await aindex_valid(conn, name)
+                for name, _ in metadata_index_ddl(self.metadata_fields)
+            }
+        return {
+            "running": self.running,
+            "error": self.error,
+            "indexes": indexes,
+            "text_search": await atext_search_ready(self.engine),
+        }
+
+    async def astop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self, text_search: bool) -> None:
+        try:
+            await aensure_metadata_indexes(self.engine, self.metadata_fields)
+            if text_search:
+                await aensure_text_search(self.engine, self.text_search_config)
+        except Exception as e:
+            logger.exception("Creating the search indexes failed")
+            self.error = str(e)
@@ -0,0 +1,279 @@
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Literal, Optional, Sequence
+
+from langchain_core.documents import Document
+from langchain_postgres import PGVector
+from sqlalchemy import bindparam, select, update
+
+from ..concurrency import AdaptiveConcurrencyLimiter, call_with_backoff
+from .search import vector_literal
+
+logger = logging.getLogger(__name__)
+
+InsertMethod = Literal["copy", "insert"]
+
+
+class WriterError(Exception):
+    """Base exception for ingestion writer failures."""
+
+    pass
+
+
+class PartialWriteError(WriterError):
+    """Raised when some batches failed after retries.
+
+    ``stored_ids`` are already committed; writing the same documents with the
+    same ids again only embeds and stores ``failed_ids``.
+    """
+
+    def __init__(self, message: str, stored_ids: List[str], failed_ids: List[str]):
+        super().__init__(message)
+        self.stored_ids = stored_ids
+        self.failed_ids = failed_ids
+
+
+@dataclass
+class WriteProgress:
+    total: int = 0
+    skipped: int = 0
+    embedded: int = 0
+    stored: int = 0
+    failed: int = 0
+    throttled: int = 0
+    concurrency: int = 0
+
+
+ProgressCallback = Callable[[WriteProgress], None]
+
+
+@dataclass
+class WriteResult:
+    ids: List[str]
+    skipped_ids: List[str] = field(default_factory=list)
+    progress: WriteProgress = field(default_factory=WriteProgress)
+
+
+class IngestionWriter:
+    """Embeds and stores documents in batches.
+
+    Embedding requests run ``concurrency`` at a time under an AIMD limiter that
+    backs off on rate limits. Each embedded batch is stored with COPY into a
+    temporary table followed by an upsert (or a multi-row INSERT), so a retry
+    with the same ids never duplicates rows. Ids that already exist are skipped
+    before embedding, which makes re-running a partially failed write cheap;
+    their metadata is refreshed if it changed.
+    """
+
+    def __init__(
+        self,
+        store: PGVector,
+        batch_size: int = 128,
+        concurrency: int = 4,
+        insert_batch_size: int = 500,
+        insert_method: InsertMethod = "copy",
+        max_retries: int = 6,
+        base_delay: float = 1.0,
+    ):
+        self.store = store
+        self.batch_size = max(1, batch_size)
+        self.insert_batch_size = max(1, insert_batch_size)
+        self.insert_method = insert_method
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.limiter = AdaptiveConcurrencyLimiter(concurrency)
+
+    async def write(
+        self,
+        docs: Sequence[Document],
+        ids: Sequence[str],
+        on_progress: Optional[ProgressCallback] = None,
+        skip_existing: bool = True,
+    ) -> WriteResult:
+        if len(docs) != len(ids):
+            raise WriterError(f"Got {len(docs)} documents but {len(ids)} ids.")
+        progress = WriteProgress(total=len(docs))
+
+        existing = await self.existing(ids) if skip_existing else {}
+        pending = [(i, d) for i, d in zip(ids, docs) if i not in existing]
+        stale = {
+            i: d.metadata
+            for i, d in zip(ids, docs)
+            if i in existing and existing[i] != d.metadata
+        }
+        if stale:
+            await self.update_metadata(stale)
+        progress.skipped = len(docs) - len(pending)
+        self._report(progress, on_progress)
+
+        collection_id = await self._collection_id()
+        failed: List[str] = []
+
+        async def run(batch: List[tuple[str, Document]]) -> None:
+            batch_ids = [i for i, _ in batch]
+            try:
+                texts = [d.page_content for _, d in batch]
+                vectors = await call_with_backoff(
+                    lambda: self.store.embeddings.aembed_documents(texts),
+                    limiter=self.limiter,
+                    max_retries=self.max_retries,
+                    base_delay=self.base_delay,
+                )
+                progress.embedded += len(batch)
+                self._report(progress, on_progress)
+
+                for start in range(0, len(batch), self.insert_batch_size):
+                    end = start + self.insert_batch_size
+                    await self._store(
+                        collection_id,
+                        batch_ids[start:end],
+                        texts[start:end],
+                        vectors[start:end],
+                        [d.metadata for _, d in batch[start:end]],
+                    )
+                    progress.stored += len(batch_ids[start:end])
+                    self._report(progress, on_progress)
+            except Exception:
+                logger.exception("Failed to write a batch of %d chunks", len(batch))
+                failed.extend(batch_ids)
+                progress.failed = len(failed)
+                self._report(progress, on_progress)
+
+        batches = [
+            pending[i : i + self.batch_size]
+            for i in range(0, len(pending), self.batch_size)
+        ]
+        await asyncio.gather(*(run(batch) for batch in batches))
+
+        if failed:
+            failed_set = set(failed)
+            raise PartialWriteError(
+                f"{len(failed)} of {len(docs)} chunks could not be written.",
+                stored_ids=[i for i in ids if i not in failed_set],
+                failed_ids=failed,
+            )
+        return WriteResult(
+            ids=list(ids),
+            skipped_ids=[i for i in ids if i in existing],
+            progress=progress,
+        )
+
+    async def existing(self, ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """Map the ids already stored to their metadata."""
+        found: Dict[str, Dict[str, Any]] = {}
+        table = self.store.EmbeddingStore
+        async with self.store._make_async_session() as session:
+            for start in range(0, len(ids), self.insert_batch_size):
+                chunk = list(ids[start : start + self.insert_batch_size])
+                rows = await session.execute(
+                    select(table.id, table.cmetadata).where(table.id.in_(chunk))
+                )
+                found.update((id_, metadata or {}) for id_, metadata in rows)
+        return found
+
+    async def find(self, metadata: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """Map the ids of all chunks in the collection whose metadata contains
+        ``metadata`` to their metadata."""
+        table = self.store.EmbeddingStore
+        collection_id = await self._collection_id()
+        async with self.store._make_async_session() as session:
+            rows = await session.execute(
+                select(table.id, table.cmetadata).where(
+                    table.collection_id == collection_id,
+                    table.cmetadata.contains(metadata),
+                )
+            )
+            return {id_: cmetadata or {} for id_, cmetadata in rows}
+
+    async def update_metadata(self, metadatas: Dict[str, Dict[str, Any]]) -> None:
+        table = self.store.EmbeddingStore.__table__
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("_id"))
+            .values(cmetadata=bindparam("_cmetadata"))
+        )
+        rows = [{"_id": i, "_cmetadata": m} for i, m in metadatas.items()]
+        async with self.store._make_async_session() as session:
+            for start in range(0, len(rows), self.insert_batch_size):
+                await session.execute(
+                    stmt, rows[start : start + self.insert_batch_size]
+                )
+            await session.commit()
+
+    async def _collection_id(self) -> str:
+        async with self.store._make_async_session() as session:
+            collection = await self.store.aget_collection(session)
+            if not collection:
+                raise WriterError(
+                    f"Collection '{self.store.collection_name}' not found."
+                )
+            return str(collection.uuid)
+
+    async def _store(
+        self,
+        collection_id: str,
+        ids: List[str],
+        texts: List[str],
+        vectors: List[List[float]],
+        metadatas: List[dict],
+    ) -> None:
+        engine = self.store._async_engine
+        if self.insert_method == "copy" and engine.dialect.driver == "psycopg":
+            await self._copy(collection_id, ids, texts, vectors, metadatas)
+        else:
+            await self.store.aadd_embeddings(
+                texts=texts, embeddings=vectors, metadatas=metadatas, ids=ids
+            )
+
+    async def _copy(
+        self,
+        collection_id: str,
+        ids: List[str],
+        texts: List[str],
+        vectors: List[List[float]],
+        metadatas: List[dict],
+    ) -> None:
+        # COPY cannot upsert, so stage rows in a temp table and merge them.
+        async with self.store._async_engine.begin() as conn:
+            raw = await conn.get_raw_connection()
+            pg = raw.driver_connection
+            async with pg.cursor() as cur:
+                await cur.execute(
+                    "CREATE TEMP TABLE IF NOT EXISTS _ingest_stage ("
+                    "id varchar, collection_id uuid, embedding vector, "
+                    "document varchar, cmetadata jsonb) ON COMMIT DELETE ROWS"
+                )
+                async with cur.copy(
+                    "COPY _ingest_stage (id, collection_id, embedding, document, "
+                    "cmetadata) FROM STDIN"
+                ) as copy:
+                    for id_, text, vector, metadata in zip(
+                        ids, texts, vectors, metadatas
+                    ):
+                        await copy.write_row(
+                            (
+                                id_,
+                                collection_id,
+                                vector_literal(vector),
+                                text,
+                                json.dumps(metadata or {}),
+                            )
+                        )
+                await cur.execute(
+                    "INSERT INTO langchain_pg_embedding "
+                    "(id, collection_id, embedding, document, cmetadata) "
+                    "SELECT id, collection_id, embedding, document, cmetadata "
+                    "FROM _ingest_stage "
+                    "ON CONFLICT (id) DO UPDATE SET embedding = EXCLUDED.embedding, "
+                    "document = EXCLUDED.document, cmetadata = EXCLUDED.cmetadata"
+                )
+
+    def _report(
+        self, progress: WriteProgress, on_progress: Optional[ProgressCallback]
+    ) -> None:
+        progress.throttled = self.limiter.throttled
+        progress.concurrency = self.limiter.limit
+        if on_progress is not None:
+            on_progress(progress)
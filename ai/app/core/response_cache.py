@@ -0,0 +1,210 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Literal, Optional, Sequence, Tuple
+
+import numpy as np
+
+CacheMatch = Literal["exact", "semantic"]
+
+
+def _normalize(content: str) -> str:
+    return " ".join(content.split())
+
+
+def _digest(payload: Any) -> str:
+    raw = json.dumps(payload, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CachedResponse:
+    content: str
+    model_name: str
+    usage: Optional[Dict[str, Any]] = None
+    reasoning_content: Optional[str] = None
+
+
+@dataclass
+class _Entry:
+    response: CachedResponse
+    vector_index: Optional[str]
+    scope: str
+    expires_at: float
+    query_vector: Optional[np.ndarray] = None
+
+
+class ResponseCache:
+    """In-memory LRU/TTL cache of chat completions.
+
+    The exact key covers the model, the normalized message history, the ids of
+    the retrieved context documents and the sampling kwargs. When
+    ``similarity_threshold`` is set, a miss falls back to comparing the last
+    user message's embedding with cached entries that share everything except
+    that message and the retrieved context. Entries are tagged with their
+    collection so ingestion and deletes can invalidate them.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        ttl_seconds: float = 3600.0,
+        similarity_threshold: Optional[float] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._generations: Dict[Optional[str], int] = {}
+        self._lock = threading.Lock()
+        self._exact_hits = 0
+        self._semantic_hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    @property
+    def semantic(self) -> bool:
+        return self.similarity_threshold is not None
+
+    @staticmethod
+    def make_keys(
+        model_name: str,
+        messages: Sequence[Dict[str, str]],
+        vector_index: Optional[str],
+        context_ids: Sequence[Optional[str]],
+        sampling: Dict[str, Any],
+    ) -> Tuple[str, str]:
+        """Return the exact key and the semantic scope key."""
+        history = [(m["role"], _normalize(m["content"])) for m in messages]
+        scope_payload = [model_name, vector_index, history[:-1], sampling]
+        exact = _digest([*scope_payload, history[-1:], sorted(map(str, context_ids))])
+        return exact, _digest(scope_payload)
+
+    def generation(self, vector_index: Optional[str]) -> int:
+        return self._generations.get(vector_index, 0)
+
+    def get(
+        self,
+        key: str,
+        scope: str,
+        query_vector: Optional[Sequence[float]] = None,
+    ) -> Tuple[Optional[CachedResponse], Optional[CacheMatch]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > now:
+                self._entries.move_to_end(key)
+                self._exact_hits += 1
+                return entry.response, "exact"
+            if entry is not None:
+                del self._entries[key]
+
+            if self.semantic and query_vector is not None:
+                match = self._nearest(scope, np.asarray(query_vector), now)
+                if match is not None:
+                    self._entries.move_to_end(match)
+                    self._semantic_hits += 1
+                    return self._entries[match].response, "semantic"
+
+            self._misses += 1
+            return None, None
+
+    def set(
+        self,
+        key: str,
+        scope: str,
+        response: CachedResponse,
+        vector_index: Optional[str],
+        generation: int,
+        query_vector: Optional[Sequence[float]] = None,
+    ) -> bool:
+        """Store ``response`` unless the collection was invalidated since
+        ``generation`` was read (the answer may be based on stale context)."""
+        with self._lock:
+            if self._generations.get(vector_index, 0) != generation:
+                return False
+            vector = None
+            if self.semantic and query_vector is not None:
+                vector = np.asarray(query_vector, dtype=np.float32)
+                vector /= np.linalg.norm(vector) or 1.0
+            self._entries[key] = _Entry(
+                response=response,
+                vector_index=vector_index,
+                scope=scope,
+                expires_at=time.monotonic() + self.ttl_seconds,
+                query_vector=vector,
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return True
+
+    def invalidate(self, vector_index: Optional[str]) -> int:
+        with self._lock:
+            self._generations[vector_index] = self.generation(vector_index) + 1
+            stale = [
+                k for k, e in self._entries.items() if e.vector_index == vector_index
+            ]
+            for key in stale:
+                del self._entries[key]
+            self._invalidations += 1
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generations = {k: v + 1 for k, v in self._generations.items()}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self._exact_hits + self._semantic_hits
+            lookups = hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "similarity_threshold": self.similarity_threshold,
+                "exact_hits": self._exact_hits,
+                "semantic_hits": self._semantic_hits,
+                "misses": self._misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "invalidations": self._invalidations,
+            }
+
+    def _nearest(self, scope: str, query: np.ndarray, now: float) -> Optional[str]:
+        candidates = [
+            (key, entry.query_vector)
+            for key, entry in self._entries.items()
+            if entry.scope == scope
+            and entry.query_vector is not None
+            and entry.expires_at > now
+        ]
+        if not candidates:
+            return None
+        query = query.astype(np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        scores = np.stack([vector for _, vector in candidates]) @ query
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity_threshold:
+            return None
+        return candidates[best][0]
+
+
+@lru_cache(maxsize=1)
+def get_response_cache() -> ResponseCache:
+    from app.core.config import settings
+
+    return ResponseCache(
+        max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+        similarity_threshold=settings.RESPONSE_CACHE_SIMILARITY_THRESHOLD,
+    )
+
+
+def invalidate_response_cache(vector_index: Optional[str]) -> None:
+    if get_response_cache.cache_info().currsize:
+        get_response_cache().invalidate(vector_index)
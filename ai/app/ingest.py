@@ -0,0 +1,90 @@
+"""Ingest a local directory of PDFs into a collection.
+
+Uses the same pipeline as ``POST /rag/bulk-upload``: a shared parser engine,
+files ingested concurrently, unchanged files skipped. Prints one JSON line
+per file and a final summary line.
+
+    uv run python -m app.ingest ./archive --vector-index docs --concurrency 8
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.llm import close_llm_clients
+from app.core.rag.bulk import BulkIngestionSummary, find_pdfs, ingest_files
+from app.core.rag.dependencies import (
+    close_embedding_model,
+    close_parse_result_cache,
+    close_vector_store_pool,
+    get_vector_index_manager,
+    stop_vector_index_manager,
+)
+from app.core.rag.parsers import get_parser_cache, get_parser_engine
+
+
+async def main(args: argparse.Namespace) -> int:
+    files = find_pdfs(args.directory, recursive=not args.no_recursive)
+    if not files:
+        print(f"No PDFs found under {args.directory}.", file=sys.stderr)
+        return 1
+
+    if settings.PARSER_ENGINE_WORKERS > 0:
+        get_parser_engine().start()
+    elif settings.PARSER_PRELOAD:
+        await run_in_threadpool(get_parser_cache().warm_up, settings.PARSER_PRELOAD)
+
+    summary = BulkIngestionSummary(vector_index=args.vector_index)
+    try:
+        async for result in ingest_files(
+            files,
+            vector_index=args.vector_index,
+            chunk_size=args.chunk_size,
+            chunk_overlap=args.chunk_overlap,
+            parser_strategy=args.parser_strategy,
+            concurrency=args.concurrency,
+        ):
+            summary.add(result)
+            print(json.dumps({"file": vars(result)}), flush=True)
+        manager = get_vector_index_manager()
+        if manager.building(args.vector_index):
+            print("Waiting for the vector index build...", file=sys.stderr)
+            while manager.building(args.vector_index):
+                await asyncio.sleep(1.0)
+    finally:
+        await stop_vector_index_manager()
+        await close_vector_store_pool()
+        await close_embedding_model()
+        close_parse_result_cache()
+        await close_llm_clients()
+        get_parser_engine().shutdown()
+        get_parser_cache().clear()
+
+    print(json.dumps({"summary": summary.as_dict()}), flush=True)
+    return 1 if summary.failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory")
+    parser.add_argument("--vector-index", required=True)
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        help="Tokens (characters with CHUNKER=recursive); default 256 or 1000.",
+    )
+    parser.add_argument(
+        "--chunk-overlap", type=int, help="Default 50 tokens or 200 characters."
+    )
+    parser.add_argument(
+        "--parser-strategy", choices=["quality", "speed"], default="speed"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=settings.BULK_INGESTION_CONCURRENCY
+    )
+    parser.add_argument("--no-recursive", action="store_true")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -1,10 +1,27 @@
+from contextlib import asynccontextmanager
+
 import sentry_sdk
 from fastapi import FastAPI
 from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.cors import CORSMiddleware
 
 from app.api.main import api_router
+from app.api.routes import metrics
+from app.core.admission import AdmissionMiddleware
 from app.core.config import settings
+from app.core.llm import close_llm_clients
+from app.core.metrics import MetricsMiddleware, instrument_sqlalchemy
+from app.core.rag.dependencies import (
+    close_embedding_model,
+    close_parse_result_cache,
+    close_vector_store_pool,
+    get_search_index_setup,
+    stop_search_index_setup,
+    stop_vector_index_manager,
+)
+from app.core.rag.jobs import stop_ingestion_job_manager
+from app.core.rag.parsers import get_parser_cache, get_parser_engine
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
@@ -14,12 +31,42 @@ def custom_generate_unique_id(route: APIRoute) -> str:
 if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
     sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.METRICS_ENABLED:
+        instrument_sqlalchemy()
+    if settings.PARSER_ENGINE_WORKERS > 0:
+        get_parser_engine().start()
+    elif settings.PARSER_PRELOAD:
+        await run_in_threadpool(get_parser_cache().warm_up, settings.PARSER_PRELOAD)
+    if settings.SEARCH_INDEXES_ON_STARTUP or settings.TEXT_SEARCH_SETUP_ON_STARTUP:
+        get_search_index_setup().start(
+            text_search=settings.TEXT_SEARCH_SETUP_ON_STARTUP
+        )
+    yield
+    await stop_search_index_setup()
+    await stop_ingestion_job_manager()
+    await stop_vector_index_manager()
+    await close_vector_store_pool()
+    await close_embedding_model()
+    close_parse_result_cache()
+    await close_llm_clients()
+    get_parser_engine().shutdown()
+    get_parser_cache().clear()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
+    lifespan=lifespan,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
 )
 
+# Inside the metrics middleware, so queue waits and shed requests are counted.
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(MetricsMiddleware)
+
 if settings.all_cors_origins:
     app.add_middleware(
         CORSMiddleware,
@@ -29,4 +76,6 @@ if settings.all_cors_origins:
         allow_headers=["*"],
     )
 
-app.include_router(api_router, prefix=settings.API_V1_STR)
\ No newline at end of file
+app.include_router(api_router, prefix=settings.API_V1_STR)
+# Scraped at the root, outside the versioned API.
+app.include_router(metrics.router)
\ No newline at end of file
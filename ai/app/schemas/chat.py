@@ -17,10 +17,50 @@ class ChatRequest(BaseModel):
     k: int = Field(
         default=10, ge=1, description="Number of documents to retrieve for RAG."
     )
+    filter: Optional[Dict[str, Any]] = Field(
+        default=None,
+        description=(
+            "Metadata filter for RAG retrieval in PGVector syntax, e.g. "
+            '{"source": "manual.pdf"} or {"source": {"$in": ["a.pdf", "b.pdf"]}}.'
+        ),
+    )
+    search_type: Literal["similarity", "hybrid", "mmr"] = Field(
+        default="similarity",
+        description=(
+            "RAG retrieval mode: vector similarity, vector plus full-text "
+            "search fused by reciprocal rank, or similarity re-ranked by maximal "
+            "marginal relevance with near-duplicates dropped."
+        ),
+    )
     kwargs: Dict[str, Any] = Field(
         default_factory=dict,
         description="Additional kwargs passed to the LLM (temperature, max_tokens, reasoning_effort, etc.).",
     )
+    context_token_budget: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Token budget for retrieved context (defaults to the server setting).",
+    )
+    history_token_budget: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Token budget for the message history (defaults to the server setting).",
+    )
+    cache: bool = Field(
+        default=False,
+        description="Serve /chat/response from the response cache when possible.",
+    )
+    pipeline: bool = Field(
+        default=False,
+        description=(
+            "/chat/stream only: start the stream immediately, retrieve context "
+            "while the LLM connection warms up and report stage timings."
+        ),
+    )
+    include_sources: bool = Field(
+        default=False,
+        description="With pipeline, emit the retrieved sources before tokens.",
+    )
 
 
 class ChatResponse(BaseModel):
@@ -28,3 +68,31 @@ class ChatResponse(BaseModel):
     model_name: str
     usage: Optional[Dict[str, Any]] = None
     reasoning_content: Optional[str] = None
+    cached: Optional[Literal["exact", "semantic"]] = None
+
+
+class ChatBatchRequest(BaseModel):
+    requests: List[ChatRequest] = Field(min_length=1)
+    max_concurrency: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Concurrent LLM calls (defaults to the server setting).",
+    )
+
+
+class ChatBatchItem(BaseModel):
+    index: int
+    response: Optional[ChatResponse] = None
+    error: Optional[str] = None
+
+
+class ResponseCacheStats(BaseModel):
+    entries: int
+    max_entries: int
+    ttl_seconds: float
+    similarity_threshold: Optional[float] = None
+    exact_hits: int
+    semantic_hits: int
+    misses: int
+    hit_rate: float
+    invalidations: int
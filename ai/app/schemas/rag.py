@@ -1,4 +1,5 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import Dict, List, Literal, Optional
 from pydantic import BaseModel, Field
 
 
@@ -6,9 +7,105 @@ class RAGUploadResponse(BaseModel):
     vector_index: str
     document_ids: List[str]
     num_chunks: int
+    reused: int = 0
+    added: int = 0
+    deleted: int = 0
+    unchanged: bool = False
     message: str = "Documents uploaded and indexed successfully."
 
 
+class RAGUploadJobResponse(BaseModel):
+    job_id: str
+    status: str
+    message: str = "Upload accepted for background ingestion."
+
+
+class RAGJobStage(BaseModel):
+    status: str
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    duration_seconds: Optional[float] = None
+
+
+class RAGJobChunkProgress(BaseModel):
+    total: int = 0
+    skipped: int = 0
+    embedded: int = 0
+    stored: int = 0
+    failed: int = 0
+    throttled: int = 0
+    concurrency: int = 0
+
+
+class RAGJobResponse(BaseModel):
+    job_id: str
+    status: str
+    vector_index: str
+    filename: str
+    parser_strategy: str
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    stages: Dict[str, RAGJobStage]
+    pages_total: Optional[int] = None
+    pages_done: int = 0
+    chunks: RAGJobChunkProgress = Field(default_factory=RAGJobChunkProgress)
+    attempts: int = 0
+    document_ids: List[str] = Field(default_factory=list)
+    num_chunks: Optional[int] = None
+    reused: int = 0
+    added: int = 0
+    deleted: int = 0
+    unchanged: bool = False
+    error: Optional[str] = None
+
+
+class RAGBulkFileResult(BaseModel):
+    filename: str
+    status: Literal["completed", "unchanged", "failed"]
+    pages: int = 0
+    num_chunks: int = 0
+    reused: int = 0
+    added: int = 0
+    deleted: int = 0
+    duration_seconds: float = 0.0
+    error: Optional[str] = None
+
+
+class RAGBulkSummary(BaseModel):
+    vector_index: str
+    files: int
+    completed: int
+    unchanged: int
+    failed: int
+    pages: int
+    chunks: int
+    added: int
+    elapsed_seconds: float
+    pages_per_second: float
+    chunks_per_second: float
+
+
+class RAGRechunkRequest(BaseModel):
+    vector_index: str = Field(..., description="Collection the file is indexed in.")
+    filename: str
+    target_vector_index: Optional[str] = Field(
+        default=None, description="Collection to write to; defaults to vector_index."
+    )
+    chunk_size: Optional[int] = Field(
+        default=None,
+        ge=100,
+        description="Tokens (characters with the 'recursive' chunker); "
+        "defaults to 256 tokens or 1000 characters.",
+    )
+    chunk_overlap: Optional[int] = Field(
+        default=None, ge=0, description="Defaults to 50 tokens or 200 characters."
+    )
+    parser_strategy: Optional[Literal["quality", "speed"]] = Field(
+        default=None, description="Defaults to the strategy the file was parsed with."
+    )
+
+
 class RAGDeleteRequest(BaseModel):
     vector_index: str
     document_ids: List[str]
@@ -17,4 +114,77 @@ class RAGDeleteRequest(BaseModel):
 class RAGDeleteResponse(BaseModel):
     vector_index: str
     deleted_ids: List[str]
-    message: str = "Documents deleted successfully."
\ No newline at end of file
+    message: str = "Documents deleted successfully."
+
+
+class VectorStorePoolStats(BaseModel):
+    collections: List[str]
+    num_stores: int
+    max_stores: int
+    store_hits: int
+    store_misses: int
+    store_evictions: int
+    pool_size: int
+    connections_checked_in: int
+    connections_checked_out: int
+    connections_overflow: int
+    async_connections_checked_in: int
+    async_connections_checked_out: int
+    async_connections_overflow: int
+    healthy: bool
+
+
+class EmbeddingCacheStats(BaseModel):
+    model_name: str
+    backend: str
+    hits: int
+    backend_hits: int
+    misses: int
+    hit_rate: float
+    # Persistent-tier lookups and writes that failed and were skipped.
+    errors: int
+    memory_entries: int
+    memory_max_entries: int
+
+
+class RAGIndexRequest(BaseModel):
+    method: Literal["hnsw", "ivfflat"] = "hnsw"
+    m: int = Field(default=16, ge=2, le=100)
+    ef_construction: int = Field(default=64, ge=4, le=1000)
+    lists: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="IVFFlat lists; derived from row count if unset.",
+    )
+    ef_search: int = Field(default=40, ge=1, le=1000)
+    probes: int = Field(default=10, ge=1)
+    quantization: Literal["none", "halfvec", "binary"] = Field(
+        default="none",
+        description=(
+            "Index storage: full vectors, half precision, or binary (Hamming "
+            "distance candidates re-scored exactly)."
+        ),
+    )
+    rescore: int = Field(
+        default=10,
+        ge=1,
+        le=100,
+        description="Binary only: candidates re-scored per requested result.",
+    )
+
+
+class RAGIndexResponse(BaseModel):
+    collection_name: str
+    method: str
+    m: int
+    ef_construction: int
+    lists: Optional[int] = None
+    ef_search: int
+    probes: int
+    quantization: str = "none"
+    rescore: int = 10
+    index_name: Optional[str] = None
+    status: str
+    building: bool = False
+    error: Optional[str] = None
+    updated_at: datetime
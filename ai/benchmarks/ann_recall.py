@@ -0,0 +1,137 @@
+"""ANN recall vs latency for one collection.
+
+Samples stored embeddings as queries, computes exact top-k with index scans
+disabled, then measures recall@k and latency for each ef_search (HNSW) or
+probes (IVFFlat) value against the collection's index.
+
+    uv run python -m benchmarks.ann_recall --vector-index docs --values 10,20,40,80,160
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.core.config import settings
+from app.core.rag.indexes import VectorIndexManager
+from app.core.rag.search import asearch_by_vector
+
+from .chat_concurrency import summarize
+
+
+async def sample_queries(
+    engine: AsyncEngine, collection_id: str, n: int
+) -> List[List[float]]:
+    async with engine.connect() as conn:
+        rows = await conn.execute(
+            text(
+                "SELECT embedding::text FROM langchain_pg_embedding "
+                "WHERE collection_id = CAST(:id AS uuid) ORDER BY random() LIMIT :n"
+            ),
+            {"id": collection_id, "n": n},
+        )
+        return [json.loads(row[0]) for row in rows]
+
+
+async def timed_search(
+    engine: AsyncEngine,
+    collection_id: str,
+    queries: Sequence[List[float]],
+    k: int,
+    dimensions: int,
+    settings_sql: Sequence[str],
+    quantization: str = "none",
+    rescore: int = 10,
+) -> tuple[List[List[str]], List[float]]:
+    ids, latencies = [], []
+    for vector in queries:
+        t0 = time.perf_counter()
+        results = await asearch_by_vector(
+            engine,
+            collection_id,
+            vector,
+            k,
+            dimensions,
+            settings_sql,
+            quantization=quantization,
+            rescore=rescore,
+        )
+        latencies.append(time.perf_counter() - t0)
+        ids.append([doc.id for doc, _ in results])
+    return ids, latencies
+
+
+async def main(args: argparse.Namespace) -> None:
+    engine = create_async_engine(settings.POSTGRES_ASYNC_URI or settings.POSTGRES_URI)
+    manager = VectorIndexManager(engine, dimensions=args.dimensions)
+    config = await manager.aget(args.vector_index)
+    if config is None or not config.ready:
+        raise SystemExit(f"No ready index for '{args.vector_index}'.")
+
+    queries = await sample_queries(engine, config.collection_id, args.queries)
+    exact, exact_latency = await timed_search(
+        engine,
+        config.collection_id,
+        queries,
+        args.k,
+        args.dimensions,
+        ["SET LOCAL enable_indexscan = off"],
+    )
+
+    limit = args.k * (config.rescore if config.quantization == "binary" else 1)
+    runs: List[Dict] = []
+    for value in args.values:
+        ef_search = value if config.method == "hnsw" else None
+        probes = value if config.method == "ivfflat" else None
+        found, latency = await timed_search(
+            engine,
+            config.collection_id,
+            queries,
+            args.k,
+            args.dimensions,
+            manager.search_settings(
+                config, ef_search=ef_search, probes=probes, limit=limit
+            ),
+            quantization=config.quantization,
+            rescore=config.rescore,
+        )
+        recall = [len(set(a) & set(e)) / max(1, len(e)) for a, e in zip(found, exact)]
+        runs.append(
+            {
+                "ef_search" if config.method == "hnsw" else "probes": value,
+                "recall": sum(recall) / max(1, len(recall)),
+                "latency": summarize(latency),
+            }
+        )
+    await engine.dispose()
+
+    report = {
+        "vector_index": args.vector_index,
+        "method": config.method,
+        "quantization": config.quantization,
+        "index_name": config.index_name,
+        "queries": len(queries),
+        "k": args.k,
+        "exact_latency": summarize(exact_latency),
+        "runs": runs,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vector-index", required=True)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dimensions", type=int, default=settings.EMBEDDING_DIMENSIONS)
+    parser.add_argument(
+        "--values",
+        type=lambda s: [int(v) for v in s.split(",")],
+        default=[10, 20, 40, 80, 160],
+        help="ef_search (HNSW) or probes (IVFFlat) values to sweep.",
+    )
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,117 @@
+"""Concurrent /chat/stream load test.
+
+Opens N simultaneous SSE streams against a running server and reports
+time-to-first-token and total latency percentiles.
+
+    uv run python -m benchmarks.chat_concurrency --streams 100 --vector-index docs
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "mean": statistics.fmean(values) if values else float("nan"),
+        "max": max(values) if values else float("nan"),
+    }
+
+
+async def run_stream(
+    client: httpx.AsyncClient,
+    url: str,
+    payload: Dict,
+    start: asyncio.Event,
+) -> Dict[str, Optional[float]]:
+    await start.wait()
+    t0 = time.perf_counter()
+    ttft: Optional[float] = None
+    error: Optional[str] = None
+    try:
+        async with client.stream("POST", url, json=payload) as resp:
+            if resp.status_code != 200:
+                error = f"HTTP {resp.status_code}"
+            else:
+                async for line in resp.aiter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    data = line[len("data: ") :]
+                    if data == "[DONE]":
+                        break
+                    event = json.loads(data)
+                    if "error" in event:
+                        error = event["error"]
+                        break
+                    if ttft is None and "token" in event:
+                        ttft = time.perf_counter() - t0
+    except httpx.HTTPError as e:
+        error = str(e)
+    return {"ttft": ttft, "total": time.perf_counter() - t0, "error": error}
+
+
+async def main(args: argparse.Namespace) -> None:
+    url = f"{args.base_url.rstrip('/')}/api/v1/chat/stream"
+    payload = {
+        "messages": [{"role": "user", "content": args.question}],
+        "model_name": args.model,
+        "vector_index": args.vector_index,
+        "k": args.k,
+        "pipeline": args.pipeline,
+    }
+    limits = httpx.Limits(max_connections=args.streams)
+    timeout = httpx.Timeout(args.timeout)
+
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+        start = asyncio.Event()
+        tasks = [
+            asyncio.create_task(run_stream(client, url, payload, start))
+            for _ in range(args.streams)
+        ]
+        wall0 = time.perf_counter()
+        start.set()
+        results = await asyncio.gather(*tasks)
+        wall = time.perf_counter() - wall0
+
+    ok = [r for r in results if not r["error"]]
+    report = {
+        "streams": args.streams,
+        "succeeded": len(ok),
+        "failed": len(results) - len(ok),
+        "wall_seconds": wall,
+        "ttft": summarize([r["ttft"] for r in ok if r["ttft"] is not None]),
+        "total": summarize([r["total"] for r in ok]),
+        "errors": sorted({r["error"] for r in results if r["error"]})[:10],
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--streams", type=int, default=100)
+    parser.add_argument("--vector-index", default=None)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--model", default="gpt-5-mini")
+    parser.add_argument("--question", default="What is the refund policy?")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument(
+        "--pipeline", action="store_true", help="Use the pipelined streaming mode."
+    )
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,228 @@
+"""Chunker throughput and retrieval quality on a large Markdown document.
+
+Compares the structure-aware ``markdown`` chunker with the ``recursive``
+character splitter. The recursive splitter gets the same average chunk size,
+converted to characters with the corpus' characters-per-token ratio.
+
+Structure is measured as the share of chunks that mix two sections or two
+pages. Without ``--file`` a synthetic Marker-style document is generated: paginated
+sections of filler prose and tables, each planting facts that a question
+later asks for. Quality is the share of planted facts that survive intact in
+one chunk, and hit@k / MRR of a retriever over the chunks: a hashed TF-IDF
+model offline, or the configured embedding model with ``--embeddings``.
+
+    uv run python -m benchmarks.chunking --pages 2000 --chunk-size 512
+"""
+
+import argparse
+import json
+import random
+import re
+import time
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.context import get_tokenizer
+from app.core.rag.chunker import iter_chunks
+
+from .chat_concurrency import summarize
+
+WORDS = (
+    "system data model process result value method analysis report policy "
+    "network storage request service quality review budget control signal "
+    "output input design market customer product energy sample measure"
+).split()
+
+HEADING = re.compile(r"#{1,6} ")
+PAGE_MARKER = re.compile(r"^\{\d+\}-{3,}", re.MULTILINE)
+
+Fact = Tuple[str, str, str]  # (sentence, question, answer)
+
+
+def mixes_sections(chunk: str) -> bool:
+    """Whether a heading follows other content inside the chunk."""
+    lines = [line for line in chunk.split("\n") if line.strip()]
+    starts = [bool(HEADING.match(line)) for line in lines]
+    return any(starts[starts.index(False) :]) if False in starts else False
+
+
+def synthetic_document(pages: int, seed: int = 0) -> Tuple[str, List[Fact]]:
+    rng = random.Random(seed)
+    facts: List[Fact] = []
+    parts: List[str] = []
+
+    def filler(sentences: int) -> str:
+        return " ".join(
+            " ".join(rng.choices(WORDS, k=rng.randint(8, 20))).capitalize() + "."
+            for _ in range(sentences)
+        )
+
+    for page in range(pages):
+        parts.append(f"{{{page}}}" + "-" * 48)
+        if page % 3 == 0:
+            parts.append(f"# Chapter {page // 3 + 1}")
+        parts.append(f"## Section {page + 1}")
+        for _ in range(rng.randint(2, 5)):
+            subject = f"unit {rng.randint(1000, 99999)}"
+            answer = f"{rng.randint(10, 999)} {rng.choice(['kg', 'ms', 'kW', 'GB'])}"
+            sentence = f"The rated capacity of {subject} is {answer}."
+            facts.append(
+                (sentence, f"What is the rated capacity of {subject}?", answer)
+            )
+            paragraph = filler(rng.randint(3, 12))
+            cut = rng.randint(0, len(paragraph))
+            cut = paragraph.rfind(". ", 0, cut) + 1 if ". " in paragraph[:cut] else 0
+            parts.append(f"{paragraph[:cut]} {sentence} {paragraph[cut:]}".strip())
+        rows = [f"| item {rng.randint(1, 99999)} | {filler(1)} |" for _ in range(30)]
+        parts.append("\n".join(["| Item | Notes |", "|---|---|", *rows]))
+    return "\n\n".join(parts), facts
+
+
+def hashed_tfidf(texts: Sequence[str], dims: int = 1 << 14) -> np.ndarray:
+    matrix = np.zeros((len(texts), dims), dtype=np.float32)
+    for i, text in enumerate(texts):
+        for word in re.findall(r"\w+", text.lower()):
+            matrix[i, hash(word) % dims] += 1.0
+    df = np.count_nonzero(matrix, axis=0)
+    matrix = np.log1p(matrix) * np.log((1 + len(texts)) / (1 + df))
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-9)
+
+
+def embed(texts: Sequence[str], questions: Sequence[str], use_embeddings: bool):
+    if not use_embeddings:
+        matrix = hashed_tfidf(list(texts) + list(questions))
+        return matrix[: len(texts)], matrix[len(texts) :]
+    from app.core.rag.dependencies import get_embedding_model
+
+    model = get_embedding_model()
+    docs = np.array(model.embed_documents(list(texts)), dtype=np.float32)
+    queries = np.array(model.embed_documents(list(questions)), dtype=np.float32)
+    return docs, queries
+
+
+def run(
+    name: str,
+    corpus: str,
+    facts: Sequence[Fact],
+    chunk_size: int,
+    chunk_overlap: int,
+    repeats: int,
+    k: int,
+    use_embeddings: bool,
+) -> Dict:
+    timings = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        docs = list(
+            iter_chunks(
+                corpus,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                chunker=name,
+            )
+        )
+        timings.append(time.perf_counter() - t0)
+    chunks = [doc.page_content for doc in docs]
+    tokenizer = get_tokenizer(settings.EMBEDDING_MODEL)
+    sizes = [tokenizer.count(chunk) for chunk in chunks]
+    best = min(timings)
+    report = {
+        "chunker": name,
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "chunks": len(chunks),
+        "mb_per_second": len(corpus.encode()) / 1e6 / best,
+        "chunks_per_second": len(chunks) / best,
+        "seconds": summarize(timings),
+        "chunk_tokens": {
+            "mean": float(np.mean(sizes)),
+            "p95": float(np.percentile(sizes, 95)),
+            "max": max(sizes),
+        },
+        # Chunks mixing two sections, or text from two pages.
+        "cross_section": sum(map(mixes_sections, chunks)) / len(docs),
+        "cross_page": sum(
+            bool(PAGE_MARKER.search(doc.page_content))
+            or doc.metadata.get("page") != doc.metadata.get("page_end")
+            for doc in docs
+        )
+        / len(docs),
+    }
+    if not facts:
+        return report
+
+    intact = sum(any(fact in chunk for chunk in chunks) for fact, _, _ in facts)
+    docs, queries = embed(chunks, [q for _, q, _ in facts], use_embeddings)
+    top = np.argsort(-(queries @ docs.T), axis=1)[:, :k]
+    hits, reciprocal = 0, 0.0
+    for (sentence, _, _), ranked in zip(facts, top):
+        for rank, i in enumerate(ranked, start=1):
+            if sentence in chunks[i]:
+                hits += 1
+                reciprocal += 1.0 / rank
+                break
+    report["retrieval"] = {
+        "facts": len(facts),
+        "intact": intact / len(facts),
+        f"hit@{k}": hits / len(facts),
+        "mrr": reciprocal / len(facts),
+    }
+    return report
+
+
+def main(args: argparse.Namespace) -> None:
+    facts: List[Fact] = []
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            corpus = f.read()
+    else:
+        corpus, facts = synthetic_document(args.pages)
+        facts = random.Random(1).sample(facts, min(args.questions, len(facts)))
+
+    tokenizer = get_tokenizer(settings.EMBEDDING_MODEL)
+    chars_per_token = len(corpus) / max(1, tokenizer.count(corpus))
+    runs = [
+        run(
+            "recursive",
+            corpus,
+            facts,
+            round(args.chunk_size * chars_per_token),
+            round(args.chunk_overlap * chars_per_token),
+            args.repeats,
+            args.k,
+            args.embeddings,
+        ),
+        run(
+            "markdown",
+            corpus,
+            facts,
+            args.chunk_size,
+            args.chunk_overlap,
+            args.repeats,
+            args.k,
+            args.embeddings,
+        ),
+    ]
+    report = {
+        "corpus_mb": len(corpus.encode()) / 1e6,
+        "tokenizer": tokenizer.name,
+        "chars_per_token": chars_per_token,
+        "retriever": settings.EMBEDDING_MODEL if args.embeddings else "tfidf",
+        "runs": runs,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--file", help="Markdown file (default: synthetic)")
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--questions", type=int, default=500)
+    parser.add_argument("--chunk-size", type=int, default=512)
+    parser.add_argument("--chunk-overlap", type=int, default=64)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--embeddings", action="store_true")
+    main(parser.parse_args())
@@ -0,0 +1,276 @@
+"""Local stand-ins for the OpenAI and LlamaParse APIs.
+
+One server answers the OpenAI-compatible ``/v1/embeddings`` and
+``/v1/chat/completions`` endpoints and LlamaParse's upload/job/result
+endpoints, so the service can be benchmarked without network access or API
+costs. Point ``OPENAI_BASE_URL`` at ``http://host:port/v1`` and
+``LLAMA_CLOUD_BASE_URL`` at ``http://host:port``.
+
+Everything is deterministic: embeddings are feature-hashed bags of words (so
+similar texts get similar vectors and retrieval behaves sensibly), completions
+are words drawn from a generator seeded by the prompt, and parsed pages are
+synthetic Markdown seeded by the file hash and page number. Latency is
+configurable per call, per token and per parsed page.
+
+    uv run python -m benchmarks.fake_services --port 9100 --ttft 0.3 --token-delay 0.02
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence, Union
+
+import numpy as np
+from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import JSONResponse, StreamingResponse
+
+WORDS = (
+    "system data model process result value method analysis report policy "
+    "network storage request service quality review budget control signal "
+    "output input design market customer product energy sample measure "
+    "refund contract invoice support account region latency capacity"
+).split()
+
+
+@dataclass
+class FakeServiceConfig:
+    embedding_dimensions: int = 1536
+    embedding_latency: float = 0.02
+    ttft: float = 0.2
+    token_delay: float = 0.01
+    completion_tokens: int = 64
+    parse_page_latency: float = 0.0
+    max_jobs: int = 1024
+
+
+def _seed(*parts: object) -> int:
+    digest = hashlib.sha256(":".join(map(str, parts)).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "little")
+
+
+def fake_embedding(value: Union[str, Sequence[int]], dimensions: int) -> List[float]:
+    """Signed feature hashing of the words (or token ids) in ``value``."""
+    features = re.findall(r"\w+", value.lower()) if isinstance(value, str) else value
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for feature in features:
+        h = _seed(feature)
+        vector[h % dimensions] += 1.0 if (h >> 32) & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        vector[_seed(value) % dimensions] = 1.0
+        norm = 1.0
+    return (vector / norm).tolist()
+
+
+def fake_completion(messages: List[Dict[str, Any]], tokens: int) -> List[str]:
+    rng = random.Random(_seed(json.dumps(messages, sort_keys=True, default=str)))
+    words = rng.choices(WORDS, k=tokens)
+    return [word if i == 0 else f" {word}" for i, word in enumerate(words)]
+
+
+def fake_page(document_hash: str, page: int) -> str:
+    rng = random.Random(_seed(document_hash, page))
+    paragraphs = [
+        " ".join(
+            " ".join(rng.choices(WORDS, k=rng.randint(8, 20))).capitalize() + "."
+            for _ in range(rng.randint(3, 8))
+        )
+        for _ in range(rng.randint(2, 5))
+    ]
+    return "\n\n".join([f"## Page {page + 1}", *paragraphs])
+
+
+def _count_tokens(messages: List[Dict[str, Any]]) -> int:
+    return sum(len(str(m.get("content", "")).split()) + 4 for m in messages)
+
+
+def _count_pdf_pages(data: bytes) -> int:
+    try:
+        import pypdfium2
+
+        pdf = pypdfium2.PdfDocument(data)
+    except Exception:
+        return 1
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def create_app(config: FakeServiceConfig) -> FastAPI:
+    app = FastAPI(title="Fake OpenAI and LlamaParse")
+    jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    @app.api_route("/v1", methods=["GET", "HEAD"])
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        inputs = body["input"]
+        # A string, a token array, or a list of either.
+        if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+        dimensions = body.get("dimensions") or config.embedding_dimensions
+        await asyncio.sleep(config.embedding_latency)
+        data = [
+            {
+                "object": "embedding",
+                "index": i,
+                "embedding": fake_embedding(value, dimensions),
+            }
+            for i, value in enumerate(inputs)
+        ]
+        tokens = sum(len(v.split()) if isinstance(v, str) else len(v) for v in inputs)
+        return {
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "fake-embedding"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        messages = body.get("messages", [])
+        model = body.get("model", "fake-chat")
+        pieces = fake_completion(messages, config.completion_tokens)
+        usage = {
+            "prompt_tokens": _count_tokens(messages),
+            "completion_tokens": len(pieces),
+            "total_tokens": _count_tokens(messages) + len(pieces),
+        }
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+
+        if not body.get("stream"):
+            await asyncio.sleep(config.ttft + config.token_delay * len(pieces))
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "".join(pieces)},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": usage,
+            }
+
+        def chunk(delta: Dict[str, Any], finish_reason=None) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [
+                    {"index": 0, "delta": delta, "finish_reason": finish_reason}
+                ],
+            }
+            return f"data: {json.dumps(payload)}\n\n"
+
+        include_usage = (body.get("stream_options") or {}).get("include_usage")
+
+        async def events():
+            await asyncio.sleep(config.ttft)
+            yield chunk({"role": "assistant", "content": ""})
+            for i, piece in enumerate(pieces):
+                if i:
+                    await asyncio.sleep(config.token_delay)
+                yield chunk({"content": piece})
+            yield chunk({}, finish_reason="stop")
+            if include_usage:
+                payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [],
+                    "usage": usage,
+                }
+                yield f"data: {json.dumps(payload)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/api/parsing/upload")
+    @app.post("/api/v1/parsing/upload")
+    async def parsing_upload(
+        file: UploadFile = File(...), target_pages: str = Form(default="")
+    ):
+        data = await file.read()
+        document_hash = hashlib.sha256(data).hexdigest()
+        if target_pages.strip():
+            pages = [int(p) for p in target_pages.split(",") if p.strip()]
+        else:
+            pages = list(range(_count_pdf_pages(data)))
+        await asyncio.sleep(config.parse_page_latency * len(pages))
+        job_id = str(uuid.uuid4())
+        jobs[job_id] = {
+            "markdown": "\n---\n".join(fake_page(document_hash, p) for p in pages),
+            "pages": len(pages),
+        }
+        while len(jobs) > config.max_jobs:
+            jobs.popitem(last=False)
+        return {"id": job_id, "status": "PENDING"}
+
+    @app.get("/api/parsing/job/{job_id}")
+    @app.get("/api/v1/parsing/job/{job_id}")
+    async def parsing_job(job_id: str):
+        if job_id not in jobs:
+            raise HTTPException(status_code=404, detail="Unknown job.")
+        return {"id": job_id, "status": "SUCCESS"}
+
+    @app.get("/api/parsing/job/{job_id}/result/{result_type}")
+    @app.get("/api/v1/parsing/job/{job_id}/result/{result_type}")
+    async def parsing_result(job_id: str, result_type: str):
+        job = jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Unknown job.")
+        return JSONResponse(
+            {
+                result_type: job["markdown"],
+                "job_metadata": {"job_pages": job["pages"], "credits_used": 0},
+            }
+        )
+
+    return app
+
+
+def main(args: argparse.Namespace) -> None:
+    import uvicorn
+
+    config = FakeServiceConfig(
+        embedding_dimensions=args.embedding_dimensions,
+        embedding_latency=args.embedding_latency,
+        ttft=args.ttft,
+        token_delay=args.token_delay,
+        completion_tokens=args.completion_tokens,
+        parse_page_latency=args.parse_page_latency,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--embedding-dimensions", type=int, default=1536)
+    parser.add_argument("--embedding-latency", type=float, default=0.02)
+    parser.add_argument("--ttft", type=float, default=0.2)
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    parser.add_argument("--completion-tokens", type=int, default=64)
+    parser.add_argument("--parse-page-latency", type=float, default=0.0)
+    main(parser.parse_args())
@@ -0,0 +1,204 @@
+"""Metadata-filtered vector search latency.
+
+Optionally seeds a collection with synthetic chunks spread over many sources,
+then compares unfiltered search with filters on one source and on a set of
+sources, through the same query path the API uses (ANN index when one is
+ready, metadata indexes for the filter).
+
+    uv run python -m benchmarks.filtered_search --vector-index bench --seed-sources 5000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.core.config import settings
+from app.core.rag.filters import aensure_metadata_indexes
+from app.core.rag.indexes import VectorIndexConfig, VectorIndexManager
+from app.core.rag.search import acollection_id, asearch_by_vector, vector_literal
+
+from .chat_concurrency import summarize
+
+
+def random_vector(dimensions: int) -> List[float]:
+    vector = [random.gauss(0.0, 1.0) for _ in range(dimensions)]
+    norm = sum(v * v for v in vector) ** 0.5
+    return [v / norm for v in vector]
+
+
+async def seed(
+    engine: AsyncEngine,
+    collection_name: str,
+    sources: int,
+    chunks_per_source: int,
+    dimensions: int,
+) -> str:
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                "INSERT INTO langchain_pg_collection (uuid, name, cmetadata) "
+                "VALUES (:uuid, :name, '{}') ON CONFLICT (name) DO NOTHING"
+            ),
+            {"uuid": uuid.uuid4(), "name": collection_name},
+        )
+    collection_id = await acollection_id(engine, collection_name)
+    insert = text(
+        "INSERT INTO langchain_pg_embedding "
+        "(id, collection_id, embedding, document, cmetadata) "
+        "VALUES (:id, CAST(:collection_id AS uuid), CAST(:embedding AS vector), "
+        ":document, CAST(:cmetadata AS jsonb)) ON CONFLICT (id) DO NOTHING"
+    )
+    for start in range(0, sources, 100):
+        rows = [
+            {
+                "id": f"{collection_name}-{source}-{chunk}",
+                "collection_id": collection_id,
+                "embedding": vector_literal(random_vector(dimensions)),
+                "document": f"Synthetic chunk {chunk} of source {source}.",
+                "cmetadata": json.dumps(
+                    {
+                        "source": f"source-{source}.pdf",
+                        "vector_index": collection_name,
+                        "chunk_index": chunk,
+                    }
+                ),
+            }
+            for source in range(start, min(start + 100, sources))
+            for chunk in range(chunks_per_source)
+        ]
+        async with engine.begin() as conn:
+            await conn.execute(insert, rows)
+    async with engine.connect() as conn:
+        await conn.execute(text("ANALYZE langchain_pg_embedding"))
+    return collection_id
+
+
+async def timed(
+    engine: AsyncEngine,
+    collection_id: str,
+    k: int,
+    dimensions: int,
+    queries: int,
+    scan: List[str],
+    filter: Optional[Dict],
+) -> Dict:
+    latencies, returned = [], []
+    for _ in range(queries):
+        vector = random_vector(dimensions)
+        t0 = time.perf_counter()
+        results = await asearch_by_vector(
+            engine, collection_id, vector, k, dimensions, scan, filter=filter
+        )
+        latencies.append(time.perf_counter() - t0)
+        returned.append(len(results))
+    return {
+        "filter": filter,
+        "latency": summarize(latencies),
+        "mean_results": sum(returned) / max(1, len(returned)),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    engine = create_async_engine(settings.POSTGRES_ASYNC_URI or settings.POSTGRES_URI)
+    if args.seed_sources:
+        await seed(
+            engine,
+            args.vector_index,
+            args.seed_sources,
+            args.chunks_per_source,
+            args.dimensions,
+        )
+    collection_id = await acollection_id(engine, args.vector_index)
+    if collection_id is None:
+        raise SystemExit(f"Collection '{args.vector_index}' does not exist.")
+    await aensure_metadata_indexes(engine, settings.METADATA_INDEXED_FIELDS)
+
+    manager = VectorIndexManager(engine, dimensions=args.dimensions)
+    config = await manager.aget(args.vector_index)
+    if args.build_index and (config is None or not config.ready):
+        config = await manager.abuild(VectorIndexConfig(args.vector_index))
+
+    async with engine.connect() as conn:
+        sources = [
+            row[0]
+            for row in await conn.execute(
+                text(
+                    "SELECT DISTINCT cmetadata->>'source' FROM langchain_pg_embedding "
+                    "WHERE collection_id = CAST(:id AS uuid) LIMIT 1000"
+                ),
+                {"id": collection_id},
+            )
+        ]
+        num_sources = (
+            await conn.execute(
+                text(
+                    "SELECT count(DISTINCT cmetadata->>'source') "
+                    "FROM langchain_pg_embedding WHERE collection_id = CAST(:id AS uuid)"
+                ),
+                {"id": collection_id},
+            )
+        ).scalar()
+
+    filters = [
+        None,
+        {"source": random.choice(sources)},
+        {"source": {"$in": random.sample(sources, min(10, len(sources)))}},
+    ]
+    runs = []
+    for filter in filters:
+        scan = []
+        if config is not None and config.ready:
+            iterative_scan = None
+            if filter:
+                iterative_scan = await manager.aiterative_scan(
+                    settings.VECTOR_INDEX_ITERATIVE_SCAN
+                )
+            scan = manager.search_settings(
+                config,
+                iterative_scan=iterative_scan,
+                limit=(
+                    settings.VECTOR_INDEX_FILTERED_EF_SEARCH
+                    if filter and iterative_scan is None
+                    else None
+                ),
+            )
+        runs.append(
+            await timed(
+                engine,
+                collection_id,
+                args.k,
+                args.dimensions,
+                args.queries,
+                scan,
+                filter,
+            )
+        )
+    await engine.dispose()
+
+    report = {
+        "vector_index": args.vector_index,
+        "sources": num_sources,
+        "ann_index": config.index_name if config is not None else None,
+        "k": args.k,
+        "runs": runs,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vector-index", required=True)
+    parser.add_argument("--seed-sources", type=int, default=0)
+    parser.add_argument("--chunks-per-source", type=int, default=20)
+    parser.add_argument("--build-index", action="store_true")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dimensions", type=int, default=settings.EMBEDDING_DIMENSIONS)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,137 @@
+"""In-process cost of MMR re-ranking over N fetched candidates.
+
+Candidates are synthetic embeddings in clusters of near-duplicates, like the
+overlapping chunks of one passage. For each N the benchmark times decoding
+the candidates' binary embeddings (pgvector's ``vector_send`` format, as
+fetched by ``search_type="mmr"``) and the vectorized selection, against
+``langchain_core``'s MMR, and reports how many near-duplicate pairs and
+distinct clusters the top-k holds with plain similarity and with MMR.
+
+    uv run python -m benchmarks.mmr_selection --candidates 200,500,1000 --k 10
+"""
+
+import argparse
+import json
+import struct
+import time
+from typing import Dict, List, Sequence
+
+import numpy as np
+from langchain_core.vectorstores.utils import maximal_marginal_relevance as lc_mmr
+
+from app.core.rag.diversity import maximal_marginal_relevance, normalize_rows
+
+from .chat_concurrency import summarize
+
+
+def synthetic_candidates(
+    n: int, dimensions: int, cluster_size: int, noise: float, seed: int = 0
+):
+    rng = np.random.default_rng(seed)
+    clusters = -(-n // cluster_size)
+    centers = normalize_rows(rng.standard_normal((clusters, dimensions)))
+    labels = np.repeat(np.arange(clusters), cluster_size)[:n]
+    embeddings = normalize_rows(
+        centers[labels] + noise * rng.standard_normal((n, dimensions)) / dimensions**0.5
+    ).astype(np.float32)
+    query = normalize_rows(
+        centers[:5].mean(axis=0, keepdims=True)
+        + 0.5 * rng.standard_normal((1, dimensions)) / dimensions**0.5
+    )[0].astype(np.float32)
+    return query, embeddings, labels
+
+
+def to_vector_send(embeddings: np.ndarray) -> List[bytes]:
+    header = struct.pack(">hh", embeddings.shape[1], 0)
+    return [header + row.astype(">f4").tobytes() for row in embeddings]
+
+
+def decode(raw: Sequence[bytes], dimensions: int) -> np.ndarray:
+    matrix = np.empty((len(raw), dimensions), dtype=np.float32)
+    for i, blob in enumerate(raw):
+        matrix[i] = np.frombuffer(blob, dtype=">f4", offset=4)
+    return matrix
+
+
+def timed(fn, repeats: int) -> Dict[str, float]:
+    timings = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - t0) * 1000)
+    return summarize(timings)
+
+
+def diversity(picked: Sequence[int], embeddings: np.ndarray, labels, threshold):
+    chosen = embeddings[list(picked)]
+    similarity = chosen @ chosen.T
+    pairs = int((np.triu(similarity, 1) >= threshold).sum())
+    return {"duplicate_pairs": pairs, "clusters": len(set(labels[list(picked)]))}
+
+
+def run(n: int, args: argparse.Namespace) -> Dict:
+    query, embeddings, labels = synthetic_candidates(
+        n, args.dimensions, args.cluster_size, args.noise
+    )
+    raw = to_vector_send(embeddings)
+    relevance = embeddings @ query
+    # Candidates arrive ordered by distance.
+    order = np.argsort(-relevance)
+    embeddings, labels, relevance = embeddings[order], labels[order], relevance[order]
+    raw = [raw[i] for i in order]
+
+    def ours():
+        matrix = normalize_rows(decode(raw, args.dimensions))
+        return maximal_marginal_relevance(
+            relevance,
+            matrix,
+            args.k,
+            lambda_mult=args.lambda_mult,
+            duplicate_threshold=args.threshold,
+        )
+
+    def baseline():
+        return lc_mmr(
+            query,
+            list(embeddings),
+            lambda_mult=args.lambda_mult,
+            k=args.k,
+        )
+
+    return {
+        "candidates": n,
+        "decode_ms": timed(lambda: decode(raw, args.dimensions), args.repeats),
+        "mmr_ms": timed(ours, args.repeats),
+        "langchain_mmr_ms": timed(baseline, args.repeats),
+        "similarity_top_k": diversity(
+            range(args.k), embeddings, labels, args.threshold
+        ),
+        "mmr_top_k": diversity(ours(), embeddings, labels, args.threshold),
+    }
+
+
+def main(args: argparse.Namespace) -> None:
+    report = {
+        "dimensions": args.dimensions,
+        "k": args.k,
+        "lambda": args.lambda_mult,
+        "duplicate_threshold": args.threshold,
+        "cluster_size": args.cluster_size,
+        "runs": [run(int(n), args) for n in args.candidates.split(",")],
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--candidates", default="200,500,1000")
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--lambda-mult", type=float, default=0.5)
+    parser.add_argument("--threshold", type=float, default=0.95)
+    parser.add_argument("--cluster-size", type=int, default=4)
+    parser.add_argument(
+        "--noise", type=float, default=0.2, help="Spread within a cluster."
+    )
+    parser.add_argument("--repeats", type=int, default=20)
+    main(parser.parse_args())
@@ -0,0 +1,135 @@
+"""Recall, latency and index size of full, halfvec and binary ANN indexes.
+
+For each ``--modes`` entry the collection's index is rebuilt with that
+quantization, then sampled stored embeddings are searched with it and
+compared with exact (sequential scan) top-k. Reported per mode: index size
+on disk (what has to stay in shared buffers for fast scans), bytes per
+indexed vector, recall@k and latency percentiles. Binary indexes are also
+swept over ``--rescore`` values. The collection's original index config is
+rebuilt at the end.
+
+    uv run python -m benchmarks.quantization --vector-index docs --modes none,halfvec,binary
+"""
+
+import argparse
+import asyncio
+import json
+from dataclasses import replace
+from typing import Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import settings
+from app.core.rag.indexes import VectorIndexConfig, VectorIndexManager
+
+from .ann_recall import sample_queries, timed_search
+from .chat_concurrency import summarize
+
+
+async def index_bytes(engine, index_name: str) -> int:
+    async with engine.connect() as conn:
+        return (
+            await conn.execute(
+                text("SELECT pg_relation_size(CAST(:name AS regclass))"),
+                {"name": f'"{index_name}"'},
+            )
+        ).scalar()
+
+
+async def main(args: argparse.Namespace) -> None:
+    engine = create_async_engine(settings.POSTGRES_ASYNC_URI or settings.POSTGRES_URI)
+    manager = VectorIndexManager(engine, dimensions=args.dimensions)
+    original = await manager.aget(args.vector_index)
+    base = original or VectorIndexConfig(collection_name=args.vector_index)
+
+    runs: List[Dict] = []
+    exact = None
+    try:
+        for mode in args.modes:
+            config = await manager.abuild(replace(base, quantization=mode))
+            size = await index_bytes(engine, config.index_name)
+            async with engine.connect() as conn:
+                rows = (
+                    await conn.execute(
+                        text(
+                            "SELECT count(*) FROM langchain_pg_embedding "
+                            "WHERE collection_id = CAST(:id AS uuid)"
+                        ),
+                        {"id": config.collection_id},
+                    )
+                ).scalar()
+            if exact is None:
+                queries = await sample_queries(
+                    engine, config.collection_id, args.queries
+                )
+                exact, exact_latency = await timed_search(
+                    engine,
+                    config.collection_id,
+                    queries,
+                    args.k,
+                    args.dimensions,
+                    ["SET LOCAL enable_indexscan = off"],
+                )
+            for rescore in args.rescore if mode == "binary" else [config.rescore]:
+                limit = args.k * (rescore if mode == "binary" else 1)
+                found, latency = await timed_search(
+                    engine,
+                    config.collection_id,
+                    queries,
+                    args.k,
+                    args.dimensions,
+                    manager.search_settings(config, limit=limit),
+                    quantization=mode,
+                    rescore=rescore,
+                )
+                recall = [
+                    len(set(a) & set(e)) / max(1, len(e)) for a, e in zip(found, exact)
+                ]
+                run = {
+                    "quantization": mode,
+                    "index_mb": size / 1024**2,
+                    "bytes_per_vector": size / max(1, rows),
+                    "recall": sum(recall) / max(1, len(recall)),
+                    "latency": summarize(latency),
+                }
+                if mode == "binary":
+                    run["rescore"] = rescore
+                runs.append(run)
+    finally:
+        if original is not None:
+            await manager.abuild(original)
+        else:
+            await manager.adrop(args.vector_index)
+        await engine.dispose()
+
+    report = {
+        "vector_index": args.vector_index,
+        "method": base.method,
+        "dimensions": args.dimensions,
+        "queries": len(exact or []),
+        "k": args.k,
+        "exact_latency": summarize(exact_latency) if exact is not None else None,
+        "runs": runs,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vector-index", required=True)
+    parser.add_argument(
+        "--modes",
+        type=lambda s: s.split(","),
+        default=["none", "halfvec", "binary"],
+    )
+    parser.add_argument(
+        "--rescore",
+        type=lambda s: [int(v) for v in s.split(",")],
+        default=[4, 10, 20],
+        help="Binary candidates per result to sweep.",
+    )
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dimensions", type=int, default=settings.EMBEDDING_DIMENSIONS)
+    asyncio.run(main(parser.parse_args()))